@@ -0,0 +1,71 @@
+# backend/benchmarks/batch_recommendations.py
+"""
+Throughput of the batch recommendation variants versus calling the single-target rule
+in a loop (same shared MenuIndex / ItemSimilarity / CooccurrenceModel), per menu size.
+Pure Python, no database needed:
+
+    cd backend && python -m benchmarks.batch_recommendations --sizes 500 5000 --targets 500
+"""
+import argparse
+import random
+import time
+
+from recommendations import rule_based_recommender as rules
+from recommendations.cooccurrence import CooccurrenceModel, basket_pair_counts
+from recommendations.menu_index import MenuIndex
+from recommendations.similarity import ItemSimilarity
+from .menu_index_rules import synthetic_menu_items_dict
+from .menus import INGREDIENTS
+
+
+def synthetic_cooccurrence(menu_items_dict: dict, orders: int, rng: random.Random) -> CooccurrenceModel:
+    item_ids = list(menu_items_dict)
+    baskets = [rng.sample(item_ids, rng.randint(1, min(5, len(item_ids)))) for _ in range(orders)]
+    return CooccurrenceModel([(a, b, count) for (a, b), count in basket_pair_counts(baskets).items()], orders)
+
+
+def targets_per_second(function, *args, **kwargs) -> float:
+    started = time.perf_counter()
+    results = function(*args, **kwargs)
+    return len(results) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000])
+    parser.add_argument("--targets", type=int, default=500, help="Items / carts per batch.")
+    parser.add_argument("--orders", type=int, default=20000, help="Synthetic orders behind the co-occurrence model.")
+    parser.add_argument("--seed", type=int, default=17)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'items':>6} {'rule':<22} {'loop/s':>10} {'batch/s':>10} {'speedup':>8}")
+    for size in args.sizes:
+        menu_items_dict = synthetic_menu_items_dict(size, rng)
+        for details in menu_items_dict.values():
+            details['ingredients'] = rng.sample(INGREDIENTS, 3)
+        menu_index, similarity = MenuIndex(menu_items_dict), ItemSimilarity(menu_items_dict)
+        cooccurrence = synthetic_cooccurrence(menu_items_dict, args.orders, rng)
+        items = [rng.randrange(size) for _ in range(args.targets)]
+        carts = [rng.sample(range(size), rng.randint(1, 4)) for _ in range(args.targets)]
+
+        cases = [
+            ("similar (rules)", rules.suggest_similar_items, rules.suggest_similar_items_batch, items,
+             {'menu_index': menu_index}),
+            ("similar (jaccard)", rules.suggest_similar_items, rules.suggest_similar_items_batch, items,
+             {'mode': "jaccard", 'similarity': similarity}),
+            ("alternatives (cosine)", rules.suggest_alternatives_for_out_of_stock,
+             rules.suggest_alternatives_for_out_of_stock_batch,
+             [i for i in items if not menu_items_dict[i]['is_available']] or items,
+             {'mode': "cosine", 'similarity': similarity}),
+            ("add-ons (lift)", rules.suggest_add_ons, rules.suggest_add_ons_batch, carts,
+             {'cooccurrence': cooccurrence}),
+        ]
+        for name, single, batch, targets, kwargs in cases:
+            loop = targets_per_second(lambda: [single(target, menu_items_dict, **kwargs) for target in targets])
+            batched = targets_per_second(batch, targets, menu_items_dict, **kwargs)
+            print(f"{size:>6} {name:<22} {loop:>10.0f} {batched:>10.0f} {batched / loop:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
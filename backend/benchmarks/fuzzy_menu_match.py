@@ -0,0 +1,86 @@
+# backend/benchmarks/fuzzy_menu_match.py
+"""
+Latency of typo-tolerant menu item matching versus menu size.
+
+Compares nlp.fuzzy_index.TrigramIndex.find() (trigram candidates, then edit distance)
+with brute-force edit distance against every item, and a one-item incremental index
+update with a full rebuild. Pure Python, no spaCy model or database needed:
+
+    cd backend && python -m benchmarks.fuzzy_menu_match --sizes 50 200 1000 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from nlp.fuzzy_index import TrigramIndex, bounded_edit_distance, FUZZY_MAX_EDIT_RATIO
+from .menus import synthetic_menu
+
+
+def with_typo(text: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(text) - 1)
+    edit = rng.choice(("drop", "swap", "double"))
+    if edit == "drop":
+        return text[:i] + text[i + 1:]
+    if edit == "swap":
+        return text[:i - 1] + text[i] + text[i - 1] + text[i + 1:]
+    return text[:i] + text[i] + text[i:]
+
+
+def brute_force_find(names, words):
+    """Reference: every name against every same-width window of the query."""
+    words = [word.lower() for word in words]
+    found = []
+    for name in names:
+        key = name.lower()
+        width = len(key.split())
+        max_distance = max(1, int(len(key) * FUZZY_MAX_EDIT_RATIO))
+        for start in range(len(words) - width + 1):
+            if bounded_edit_distance(" ".join(words[start:start + width]), key, max_distance) <= max_distance:
+                found.append(name)
+                break
+    return found
+
+
+def time_per_call_ms(function, arguments) -> float:
+    samples = []
+    for args in arguments:
+        started = time.perf_counter()
+        function(*args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000, 5000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'items':>6} {'build ms':>9} {'update ms':>9} {'index ms/q':>11} {'brute ms/q':>11} {'recall':>7}")
+    for size in args.sizes:
+        menu = synthetic_menu(size, rng)
+        targets = [rng.choice(menu) for _ in range(args.queries)]
+        queries = [f"can i get a {with_typo(target.lower(), rng)} please".split() for target in targets]
+
+        started = time.perf_counter()
+        index = TrigramIndex(menu)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        edited_menu = menu[1:] + ["House Special Ramen"] # One item replaced
+        started = time.perf_counter()
+        index.updated(edited_menu)
+        update_ms = (time.perf_counter() - started) * 1000
+
+        index_ms = time_per_call_ms(index.find, [(query,) for query in queries])
+        brute_ms = time_per_call_ms(brute_force_find, [(menu, query) for query in queries[:20]])
+        recall = sum(
+            target in [name for name, _, _ in index.find(query)] for target, query in zip(targets, queries)
+        ) / len(queries)
+        print(f"{size:>6} {build_ms:>9.2f} {update_ms:>9.2f} {index_ms:>11.3f} {brute_ms:>11.3f} {recall:>7.2%}")
+
+
+if __name__ == "__main__":
+    main()
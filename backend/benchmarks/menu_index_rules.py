@@ -0,0 +1,77 @@
+# backend/benchmarks/menu_index_rules.py
+"""
+Latency of suggest_similar_items / suggest_alternatives_for_out_of_stock versus menu size,
+with a prebuilt MenuIndex (built once per menu version) and with a full scan per call
+(no index passed: the rule builds one itself, i.e. the old O(menu) behaviour).
+Pure Python, no database needed:
+
+    cd backend && python -m benchmarks.menu_index_rules --sizes 100 1000 5000 20000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from recommendations.menu_index import MenuIndex
+from recommendations.rule_based_recommender import suggest_alternatives_for_out_of_stock, suggest_similar_items
+from .menus import synthetic_menu, STYLES, BASES, DISHES
+
+CATEGORIES_PER_100_ITEMS = 2 # Bigger menus have more categories, not just fuller ones
+
+
+def synthetic_menu_items_dict(size: int, rng: random.Random) -> dict:
+    categories = [f"category-{i}" for i in range(max(5, size * CATEGORIES_PER_100_ITEMS // 100))]
+    menu_items_dict = {}
+    for i, name in enumerate(synthetic_menu(size, rng)):
+        words = name.lower().split()
+        menu_items_dict[i] = {
+            'id': i,
+            'name': name,
+            'category': rng.choice(categories),
+            'tags': [word for word in words if word in STYLES or word in BASES or word in DISHES],
+            'is_available': rng.random() < 0.9,
+        }
+    return menu_items_dict
+
+
+def median_us(function, calls) -> float:
+    samples = []
+    for args, kwargs in calls:
+        started = time.perf_counter()
+        function(*args, **kwargs)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'items':>6} {'build ms':>9} {'similar us':>11} {'scan us':>9} {'altern. us':>11} {'scan us':>9}")
+    for size in args.sizes:
+        menu_items_dict = synthetic_menu_items_dict(size, rng)
+        started = time.perf_counter()
+        menu_index = MenuIndex(menu_items_dict)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        targets = [rng.randrange(size) for _ in range(args.calls)]
+        unavailable = [i for i, item in menu_items_dict.items() if not item['is_available']] or [0]
+        oos_targets = [rng.choice(unavailable) for _ in range(args.calls)]
+        scan_calls = min(args.calls, 50)
+
+        similar = median_us(suggest_similar_items, [((t, menu_items_dict), {'menu_index': menu_index}) for t in targets])
+        similar_scan = median_us(suggest_similar_items, [((t, menu_items_dict), {}) for t in targets[:scan_calls]])
+        alternatives = median_us(suggest_alternatives_for_out_of_stock,
+                                 [((t, menu_items_dict), {'menu_index': menu_index}) for t in oos_targets])
+        alternatives_scan = median_us(suggest_alternatives_for_out_of_stock,
+                                      [((t, menu_items_dict), {}) for t in oos_targets[:scan_calls]])
+        print(f"{size:>6} {build_ms:>9.2f} {similar:>11.1f} {similar_scan:>9.1f} "
+              f"{alternatives:>11.1f} {alternatives_scan:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
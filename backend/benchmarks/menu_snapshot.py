@@ -0,0 +1,85 @@
+# backend/benchmarks/menu_snapshot.py
+"""
+Memory and rule latency of a MenuSnapshot versus the dict-of-dicts menu_items_dict.
+
+Reports the Python heap held by each menu representation (tracemalloc), the time to
+build / save / memory-map a snapshot, and the median latency of the rules that check
+availability per candidate. Pure Python, no database needed:
+
+    cd backend && python -m benchmarks.menu_snapshot --sizes 1000 10000 50000
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from recommendations import rule_based_recommender as rules
+from recommendations.menu_index import MenuIndex
+from recommendations.snapshot import MenuSnapshot
+from .menu_index_rules import synthetic_menu_items_dict
+from .menus import INGREDIENTS
+
+
+def traced_mb(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size / 2 ** 20
+
+
+def elapsed_ms(function) -> float:
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+
+def median_us(function, arguments) -> float:
+    samples = []
+    for args in arguments:
+        started = time.perf_counter()
+        function(*args)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=19)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    directory = tempfile.mkdtemp(prefix="menu-snapshot-")
+
+    print(f"{'items':>6} {'dict MB':>8} {'snap MB':>8} {'mmap MB':>8} {'build ms':>9} {'save ms':>8} {'load ms':>8} "
+          f"{'dict us':>8} {'snap us':>8}")
+    try:
+        for size in args.sizes:
+            menu_items_dict, dict_mb = traced_mb(lambda: synthetic_menu_items_dict(size, rng))
+            for details in menu_items_dict.values():
+                details['ingredients'] = rng.sample(INGREDIENTS, 3)
+                details['price'] = rng.randrange(300, 3000) / 100
+            snapshot, snapshot_mb = traced_mb(lambda: MenuSnapshot.from_menu_items_dict(menu_items_dict))
+            build_ms = elapsed_ms(lambda: MenuSnapshot.from_menu_items_dict(menu_items_dict))
+            path = f"{directory}/{size}"
+            save_ms = elapsed_ms(lambda: snapshot.save(path))
+            load_ms = elapsed_ms(lambda: MenuSnapshot.load(path))
+            _, mapped_mb = traced_mb(lambda: MenuSnapshot.load(path))
+
+            # Popular items and past orders check availability per candidate
+            scores = [{rng.randrange(size): rng.random() for _ in range(200)} for _ in range(args.calls)]
+            dict_us = median_us(rules.suggest_popular_items, [(menu_items_dict, s, 10) for s in scores])
+            snapshot_us = median_us(rules.suggest_popular_items, [(snapshot, s, 10) for s in scores])
+            print(f"{size:>6} {dict_mb:>8.1f} {snapshot_mb:>8.1f} {mapped_mb:>8.1f} {build_ms:>9.1f} {save_ms:>8.1f} "
+                  f"{load_ms:>8.1f} {dict_us:>8.1f} {snapshot_us:>8.1f}")
+            MenuIndex(snapshot) # Smoke: index straight from the columns
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# backend/benchmarks/menus.py
+"""Synthetic restaurant menus for the benchmarks."""
+import random
+
+STYLES = ["classic", "spicy", "smoked", "grilled", "crispy", "garlic", "truffle", "tandoori",
+          "bbq", "honey", "lemon", "pesto", "cajun", "teriyaki", "buffalo", "vegan"]
+BASES = ["chicken", "paneer", "mushroom", "prawn", "lamb", "tofu", "beef", "salmon",
+         "halloumi", "falafel", "pork", "veggie", "egg", "cheese", "bean", "duck"]
+DISHES = ["pizza", "burger", "wrap", "salad", "biryani", "noodles", "tacos", "curry",
+          "risotto", "sandwich", "pasta", "soup", "bowl", "skewers", "quesadilla", "dumplings"]
+INGREDIENTS = ["basil", "rocket", "chilli", "coriander", "feta", "gouda", "cheddar", "avocado",
+               "spinach", "pineapple", "anchovy", "egg", "corn", "capers", "sesame", "peanut"]
+
+
+def synthetic_menu(size: int, rng: random.Random, anchor=()) -> list:
+    """
+    size distinct "<style> <base> <dish>" names (16**3 = 4096 combinations, then numbered
+    variants), always including the anchor names.
+    """
+    names = set(anchor)
+    while len(names) < size:
+        name = f"{rng.choice(STYLES)} {rng.choice(BASES)} {rng.choice(DISHES)}".title()
+        if name in names:
+            name = f"{name} No {rng.randrange(2, 100)}"
+        names.add(name)
+    return sorted(names)
+
+
+def synthetic_ingredients(size: int, rng: random.Random, anchor=()) -> list:
+    """
+    size distinct "<style> <ingredient>" names (16**2 = 256 combinations, then numbered
+    variants), always including the anchor names.
+    """
+    names = set(anchor)
+    while len(names) < size:
+        name = f"{rng.choice(STYLES)} {rng.choice(INGREDIENTS)}"
+        if name in names:
+            name = f"{name} no {rng.randrange(2, 100)}"
+        names.add(name)
+    return sorted(names)
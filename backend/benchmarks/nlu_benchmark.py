@@ -0,0 +1,234 @@
+# backend/benchmarks/nlu_benchmark.py
+"""
+NLU latency and accuracy over the golden utterance corpus.
+
+For each synthetic menu size the corpus is run through nlp.pipeline.analyze() (result
+cache off) and analyze_batch(), reporting p50/p95/p99 latency, per-stage medians,
+throughput, peak memory and per-intent / food-item accuracy. Results are written as
+JSON so two commits can be compared:
+
+    cd backend && python -m benchmarks.nlu_benchmark --output before.json
+    ... change things ...
+    cd backend && python -m benchmarks.nlu_benchmark --output after.json --compare before.json
+
+--compare exits with status 1 when p95 latency grew by more than --tolerance or any
+accuracy figure dropped. Needs the spaCy model (NLP_SPACY_MODEL), no database.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from nlp.entity_extractor import load_menu_data_for_nlp
+from nlp.pipeline import analyze, analyze_batch
+from nlp.utils import SPACY_MODEL_NAME, warm_up
+from .menus import synthetic_menu, synthetic_ingredients
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+DEFAULT_CORPUS = os.path.join(DATA_DIR, "nlu_golden_v1.jsonl")
+DEFAULT_MENU = os.path.join(DATA_DIR, "nlu_menu_v1.json")
+DEFAULT_SIZES = [50, 500, 5000]
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as corpus:
+        return [json.loads(line) for line in corpus if line.strip()]
+
+
+def percentiles(samples) -> dict:
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49], "p95": cuts[94], "p99": cuts[98],
+        "mean": statistics.fmean(samples), "max": max(samples),
+    }
+
+
+def row_context(row: dict, restaurant_id: str, menu_version: str, scorer) -> dict:
+    return {
+        "previous_intent": row.get("previous_intent"),
+        "dialog_context": row.get("dialog_context") or {},
+        "restaurant_id": restaurant_id,
+        "menu_version": menu_version,
+        "intent_scorer": scorer,
+        "use_cache": False, # Measure the pipeline, not the cache
+    }
+
+
+def accuracy_report(corpus, results) -> dict:
+    per_intent, food_total, food_correct, misses = {}, 0, 0, []
+    for row, result in zip(corpus, results):
+        stats = per_intent.setdefault(row["intent"], {"n": 0, "correct": 0})
+        stats["n"] += 1
+        if result.intent == row["intent"]:
+            stats["correct"] += 1
+        else:
+            misses.append({"id": row["id"], "expected": row["intent"], "got": result.intent})
+        if "foodItems" in row:
+            food_total += 1
+            food_correct += set(result.entities.get("foodItems", [])) == set(row["foodItems"])
+    for stats in per_intent.values():
+        stats["accuracy"] = stats["correct"] / stats["n"]
+    return {
+        "intent": sum(s["correct"] for s in per_intent.values()) / len(corpus),
+        "per_intent": dict(sorted(per_intent.items())),
+        "food_items": food_correct / food_total if food_total else None,
+        "misclassified": misses,
+    }
+
+
+def run_size(corpus, size: int, anchor_menu: dict, scorer, repeats: int, batch_size: int, rng) -> dict:
+    menu_items = synthetic_menu(size, rng, anchor=anchor_menu["menu_items"])
+    ingredients = synthetic_ingredients(max(len(anchor_menu["ingredients"]), size // 5), rng,
+                                        anchor=anchor_menu["ingredients"])
+    restaurant_id, menu_version = f"benchmark-{size}", "1"
+
+    started = time.perf_counter()
+    load_menu_data_for_nlp(menu_items, ingredients, restaurant_id=restaurant_id, menu_version=menu_version)
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    contexts = [row_context(row, restaurant_id, menu_version, scorer) for row in corpus]
+    results = [analyze(row["text"], context) for row, context in zip(corpus, contexts)] # Warm-up + accuracy
+
+    latencies, stages = [], {}
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for row, context in zip(corpus, contexts):
+            call_started = time.perf_counter()
+            result = analyze(row["text"], context)
+            latencies.append((time.perf_counter() - call_started) * 1000)
+            for stage, ms in result.timings_ms.items():
+                stages.setdefault(stage, []).append(ms)
+    sequential_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        analyze_batch([row["text"] for row in corpus], contexts, batch_size=batch_size)
+    batch_seconds = time.perf_counter() - started
+
+    # Separate pass: tracemalloc slows allocation-heavy code down too much to time it
+    tracemalloc.start()
+    analyze_batch([row["text"] for row in corpus], contexts, batch_size=batch_size)
+    for row, context in zip(corpus, contexts):
+        analyze(row["text"], context)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    calls = repeats * len(corpus)
+    return {
+        "menu_size": size,
+        "ingredient_count": len(ingredients),
+        "compile_ms": compile_ms,
+        "latency_ms": percentiles(latencies),
+        "stage_p50_ms": {stage: statistics.median(values) for stage, values in stages.items()},
+        "throughput_qps": {"sequential": calls / sequential_seconds, "batch": calls / batch_seconds},
+        "peak_memory_mb": {
+            "traced_python": traced_peak / 2 ** 20,
+            "max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, # Linux reports KiB
+        },
+        "accuracy": accuracy_report(corpus, results),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(__file__), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list:
+    """Returns human-readable regressions of current against baseline (same menu sizes only)."""
+    regressions = []
+    previous = {result["menu_size"]: result for result in baseline["results"]}
+    for result in current["results"]:
+        before = previous.get(result["menu_size"])
+        if before is None:
+            continue
+        size = result["menu_size"]
+        old_p95, new_p95 = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        if new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"menu {size}: p95 latency {old_p95:.2f} -> {new_p95:.2f} ms")
+        for key in ("intent", "food_items"):
+            old, new = before["accuracy"][key], result["accuracy"][key]
+            if old is not None and new is not None and new < old:
+                regressions.append(f"menu {size}: {key} accuracy {old:.3f} -> {new:.3f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labelled JSONL utterances.")
+    parser.add_argument("--menu", default=DEFAULT_MENU, help="Menu items / ingredients the corpus refers to.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Synthetic menu sizes.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed passes over the corpus per size.")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--scorer", help="ScoringIntentClassifier .npz artifact to benchmark with.")
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout).")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative p95 latency growth.")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    with open(args.menu, encoding="utf-8") as menu_file:
+        anchor_menu = json.load(menu_file)
+    scorer = None
+    if args.scorer:
+        from nlp.scoring_classifier import ScoringIntentClassifier
+        scorer = ScoringIntentClassifier.from_artifact(args.scorer)
+
+    started = time.perf_counter()
+    warm_up()
+    model_load_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(args.seed)
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "corpus": os.path.basename(args.corpus),
+            "corpus_size": len(corpus),
+            "menu": anchor_menu.get("version"),
+            "spacy_model": SPACY_MODEL_NAME,
+            "scorer": args.scorer,
+            "python": platform.python_version(),
+            "repeats": args.repeats,
+            "model_load_ms": model_load_ms,
+        },
+        "results": [
+            run_size(corpus, size, anchor_menu, scorer, args.repeats, args.batch_size, rng) for size in args.sizes
+        ],
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+
+    for result in report["results"]:
+        latency = result["latency_ms"]
+        print(f"menu {result['menu_size']:>5}: p50 {latency['p50']:.2f} ms, p95 {latency['p95']:.2f} ms, "
+              f"p99 {latency['p99']:.2f} ms, {result['throughput_qps']['batch']:.0f} q/s batched, "
+              f"intent accuracy {result['accuracy']['intent']:.1%}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare(json.load(baseline_file), report, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
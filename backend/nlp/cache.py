@@ -0,0 +1,124 @@
+# backend/nlp/cache.py
+import copy
+import dataclasses
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CACHE_SIZE = int(os.environ.get("NLP_RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("NLP_RESULT_CACHE_TTL", "600"))
+
+# Dialog-context slots the intent rules read. Other slots do not change the NLU output
+# and are left out of the key so they do not fragment the cache.
+CACHE_CONTEXT_SLOTS = ("expecting", "currentItemToCustomize")
+
+
+def names_digest(names) -> str:
+    """Short content digest of a list of names (menu items, ingredients); None for none."""
+    if not names:
+        return None
+    return hashlib.blake2b("\x1f".join(map(str, names)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class NLUResultCache:
+    """
+    Bounded LRU + TTL cache of NLUResults for repeated utterances ("hi", "yes", "show me
+    the menu"). Keys are built by make_key() from the preprocessed query and everything
+    else the result depends on, including the restaurant menu version, so a menu edit
+    makes old entries unreachable; invalidate_restaurant() also frees them eagerly.
+    Thread-safe; counters are per process.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl_seconds: float = RESULT_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, NLUResult)
+        self._keys_by_restaurant = {}  # restaurant_id -> {key, ...}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @staticmethod
+    def make_key(processed_query: str, context: dict) -> tuple:
+        dialog_context = context.get("dialog_context") or {}
+        scorer = context.get("intent_scorer")
+        return (
+            processed_query,
+            context.get("previous_intent"),
+            tuple(str(dialog_context.get(slot)) for slot in CACHE_CONTEXT_SLOTS),
+            context.get("restaurant_id"),
+            context.get("menu_version"),
+            # Ad-hoc contexts without a restaurant are told apart by the names themselves
+            names_digest(context.get("menu_items_master_list")),
+            names_digest(context.get("ingredients_master_list")),
+            context.get("min_intent_confidence"),
+            scorer.version if scorer is not None else None, # A newly activated model gets fresh entries
+        )
+
+    def get(self, key):
+        """Returns a copy of the cached NLUResult (safe to mutate), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry[1]
+        return dataclasses.replace(result, entities=copy.deepcopy(result.entities), timings_ms={}, cache_hit=True)
+
+    def put(self, key, result) -> None:
+        """Stores a copy of result, so the caller may go on mutating the one it returns."""
+        restaurant_id = key[3]
+        result = dataclasses.replace(
+            result, entities=copy.deepcopy(result.entities), ranked_intents=list(result.ranked_intents), timings_ms={}
+        )
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            self._keys_by_restaurant.setdefault(restaurant_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_restaurant.get(key[3])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_restaurant[key[3]]
+
+    def invalidate_restaurant(self, restaurant_id=None) -> None:
+        """Drops every entry of one restaurant, or the whole cache for restaurant_id=None."""
+        with self._lock:
+            if restaurant_id is None:
+                self._entries.clear()
+                self._keys_by_restaurant.clear()
+                return
+            for key in self._keys_by_restaurant.pop(restaurant_id, ()):
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+nlu_result_cache = NLUResultCache()
@@ -1,75 +1,211 @@
 # backend/nlp/entity_extractor.py
+import os
 import re
+from recommendations.cache import VersionedRegistry
 from .utils import (
-    preprocess_text, get_spacy_doc,
+    preprocess_text, get_spacy_doc, get_nlp, ENTITY_COMPONENTS,
     FOOD_CATEGORIES_KEYWORDS, INGREDIENT_KEYWORDS_GENERIC, QUANTITY_WORDS
 )
+from .fuzzy_index import TrigramIndex
 from spacy.matcher import Matcher, PhraseMatcher # For more advanced matching
 
 # This should be dynamically loaded from your menu database (menu.models.MenuItem)
 # For now, a placeholder. Structure: {'lower_case_item_name': 'Canonical Item Name'}
-# Or a list of spaCy Doc objects for PhraseMatcher
-DYNAMIC_MENU_ITEMS = {} # Populate this from your database (e.g., at app startup or on demand)
-DYNAMIC_INGREDIENTS = {} # Populate this too
+# Populated by load_menu_data_for_nlp() when it is called without a restaurant_id
+# (i.e. the platform-wide default vocabulary).
+DYNAMIC_MENU_ITEMS = {}
+DYNAMIC_INGREDIENTS = {}
 
-def load_menu_data_for_nlp(menu_items_from_db, ingredients_from_db):
+# Upper bound on the number of restaurants whose compiled matchers are kept in memory
+# per worker. Least recently used restaurants are evicted first.
+MENU_MATCHER_CACHE_SIZE = int(os.environ.get("NLP_MENU_MATCHER_CACHE_SIZE", "256"))
+
+# Registry key used for the default vocabulary loaded without a restaurant_id.
+DEFAULT_MATCHER_KEY = "__default__"
+
+
+class CompiledMenuMatchers:
+    """
+    PhraseMatchers for one restaurant's menu, compiled once and shared across requests.
+    PhraseMatcher is read-only once built, so one instance can serve concurrent requests.
+    menu_index / ingredient_index are the trigram indexes behind typo-tolerant matching.
+    """
+    __slots__ = ("menu_matcher", "ingredient_matcher", "menu_items", "ingredients", "menu_index", "ingredient_index")
+
+    def __init__(self, menu_matcher, ingredient_matcher, menu_items: dict, ingredients: dict,
+                 menu_index: TrigramIndex = None, ingredient_index: TrigramIndex = None):
+        self.menu_matcher = menu_matcher
+        self.ingredient_matcher = ingredient_matcher
+        self.menu_items = menu_items  # {'lower_case_item_name': 'Canonical Item Name'}
+        self.ingredients = ingredients
+        self.menu_index = menu_index if menu_index is not None else TrigramIndex(menu_items.values())
+        self.ingredient_index = ingredient_index if ingredient_index is not None else TrigramIndex(ingredients.values())
+
+
+class MenuMatcherRegistry(VersionedRegistry):
+    """
+    VersionedRegistry of CompiledMenuMatchers keyed by restaurant. Invalidated matchers
+    are retired rather than forgotten, so the rebuild after a menu edit updates their
+    trigram indexes instead of indexing the whole menu again.
+    """
+
+    def __init__(self, max_entries: int = MENU_MATCHER_CACHE_SIZE):
+        super().__init__(max_entries, keep_invalidated=True)
+
+    def get_or_build(self, restaurant_key, menu_version, loader):
+        """
+        Returns the compiled matchers for (restaurant_key, menu_version), calling
+        loader() -> (menu_item_names, ingredient_names) and compiling on a miss.
+        """
+        def build():
+            menu_item_names, ingredient_names = loader()
+            return compile_menu_matchers(menu_item_names, ingredient_names, previous=self.previous(restaurant_key))
+
+        return super().get_or_build(restaurant_key, menu_version, build)
+
+
+menu_matcher_registry = MenuMatcherRegistry()
+
+
+def compile_menu_matchers(menu_item_names, ingredient_names, previous: CompiledMenuMatchers = None) -> CompiledMenuMatchers:
     """
-    Call this function when your app starts or when menu changes significantly
-    to populate DYNAMIC_MENU_ITEMS and DYNAMIC_INGREDIENTS.
+    Builds the menu and ingredient PhraseMatchers for a list of item / ingredient names.
+    This is the expensive step (one make_doc per name) that the registry amortises.
+    previous: the entry for an older version of the same menu; its trigram indexes are
+    updated with just the added / removed names instead of being rebuilt.
+    """
+    nlp_spacy = get_nlp() # make_doc only needs the tokenizer and vocab
+
+    menu_items = {name.lower(): name for name in menu_item_names or []}
+    ingredients = {name.lower(): name for name in ingredient_names or []}
+
+    menu_matcher = PhraseMatcher(nlp_spacy.vocab, attr='LOWER')
+    if menu_items:
+        menu_matcher.add("MENU_ITEM", [nlp_spacy.make_doc(name) for name in menu_items.values()])
+
+    ingredient_matcher = PhraseMatcher(nlp_spacy.vocab, attr='LOWER')
+    if ingredients:
+        ingredient_matcher.add("INGREDIENT", [nlp_spacy.make_doc(name) for name in ingredients.values()])
+
+    if previous is not None:
+        menu_index = previous.menu_index.updated(menu_items.values())
+        ingredient_index = previous.ingredient_index.updated(ingredients.values())
+    else:
+        menu_index, ingredient_index = TrigramIndex(menu_items.values()), TrigramIndex(ingredients.values())
+
+    return CompiledMenuMatchers(menu_matcher, ingredient_matcher, menu_items, ingredients, menu_index, ingredient_index)
+
+
+def load_menu_data_for_nlp(menu_items_from_db, ingredients_from_db, restaurant_id=None, menu_version=None):
+    """
+    Call this function when your app starts or when a menu changes to compile the
+    PhraseMatchers for it and register them in menu_matcher_registry.
     menu_items_from_db: list of strings (item names)
     ingredients_from_db: list of strings (ingredient names)
+    restaurant_id / menu_version: key of the registry entry. Without a restaurant_id the
+    names become the default vocabulary (DYNAMIC_MENU_ITEMS / DYNAMIC_INGREDIENTS) used
+    by extract_entities when it is given neither a restaurant nor master lists.
+    Returns the CompiledMenuMatchers.
     """
-    global DYNAMIC_MENU_ITEMS, DYNAMIC_INGREDIENTS, nlp_spacy # Ensure nlp_spacy is from utils
-    from .utils import nlp_spacy as spacy_nlp_instance # Import from utils
-    
-    DYNAMIC_MENU_ITEMS.clear()
-    for item_name in menu_items_from_db:
-        DYNAMIC_MENU_ITEMS[item_name.lower()] = item_name
-        # For phrase matcher, pre-process them into spaCy docs
-        # DYNAMIC_MENU_ITEMS_PATTERNS.append(spacy_nlp_instance(item_name))
+    registry_key = DEFAULT_MATCHER_KEY if restaurant_id is None else restaurant_id
+    compiled = compile_menu_matchers(menu_items_from_db, ingredients_from_db,
+                                     previous=menu_matcher_registry.previous(registry_key))
 
-    DYNAMIC_INGREDIENTS.clear()
-    for ing_name in ingredients_from_db:
-        DYNAMIC_INGREDIENTS[ing_name.lower()] = ing_name
-        # DYNAMIC_INGREDIENTS_PATTERNS.append(spacy_nlp_instance(ing_name))
+    if restaurant_id is None:
+        DYNAMIC_MENU_ITEMS.clear()
+        DYNAMIC_MENU_ITEMS.update(compiled.menu_items)
+        DYNAMIC_INGREDIENTS.clear()
+        DYNAMIC_INGREDIENTS.update(compiled.ingredients)
+        menu_matcher_registry.put(DEFAULT_MATCHER_KEY, menu_version, compiled)
+    else:
+        menu_matcher_registry.put(restaurant_id, menu_version, compiled)
+    return compiled
 
-    # Initialize PhraseMatchers (do this once after loading data)
-    # global phrase_matcher_menu, phrase_matcher_ingredients
-    # phrase_matcher_menu = PhraseMatcher(spacy_nlp_instance.vocab, attr='LOWER')
-    # phrase_matcher_ingredients = PhraseMatcher(spacy_nlp_instance.vocab, attr='LOWER')
-    # if DYNAMIC_MENU_ITEMS_PATTERNS:
-    #    phrase_matcher_menu.add("MENU_ITEM", DYNAMIC_MENU_ITEMS_PATTERNS)
-    # if DYNAMIC_INGREDIENTS_PATTERNS:
-    #    phrase_matcher_ingredients.add("INGREDIENT", DYNAMIC_INGREDIENTS_PATTERNS)
 
+def invalidate_menu_matchers(restaurant_id=None):
+    """
+    Drops the compiled matchers of a restaurant (or all restaurants) in this process.
+    Other processes pick up the change through the bumped menu version.
+    """
+    menu_matcher_registry.invalidate(restaurant_id)
 
-def extract_entities(query: str, intent: str, menu_items_master_list: list = None, ingredients_master_list: list = None) -> dict:
+
+def _resolve_menu_matchers(menu_items_master_list, ingredients_master_list, restaurant_id, menu_version):
+    """
+    Picks the compiled matchers for a request:
+    1. restaurant_id given -> registry entry for (restaurant_id, menu_version), compiled
+       from the master lists on a miss when they are provided.
+    2. only master lists given -> registry entry keyed by the lists' content, so repeated
+       calls with the same lists compile once.
+    3. nothing given -> the default vocabulary from load_menu_data_for_nlp(), if any.
+    """
+    if restaurant_id is not None:
+        compiled = menu_matcher_registry.get(restaurant_id, menu_version)
+        if compiled is None and (menu_items_master_list or ingredients_master_list):
+            compiled = menu_matcher_registry.get_or_build(
+                restaurant_id, menu_version,
+                lambda: (menu_items_master_list, ingredients_master_list)
+            )
+        return compiled
+
+    if menu_items_master_list or ingredients_master_list:
+        content_key = hash((tuple(menu_items_master_list or ()), tuple(ingredients_master_list or ())))
+        return menu_matcher_registry.get_or_build(
+            ("__adhoc__", content_key), content_key,
+            lambda: (menu_items_master_list, ingredients_master_list)
+        )
+
+    return menu_matcher_registry.get_latest(DEFAULT_MATCHER_KEY)
+
+
+def _fuzzy_matches(index: TrigramIndex, doc, covered: set) -> list:
+    """
+    Fuzzy matches index names over the runs of doc tokens not in covered (token indices
+    already claimed by an exact PhraseMatcher match).
+    Returns [(canonical_name, start, end), ...] in doc token offsets.
+    """
+    matches, run_start = [], 0
+    for i in range(len(doc) + 1):
+        if i == len(doc) or i in covered or doc[i].is_punct:
+            if i > run_start:
+                words = [token.lower_ for token in doc[run_start:i]]
+                matches.extend((name, run_start + start, run_start + end) for name, start, end in index.find(words))
+            run_start = i + 1
+    return matches
+
+
+def extract_entities(query: str, intent: str, menu_items_master_list: list = None, ingredients_master_list: list = None,
+                     restaurant_id=None, menu_version=None) -> dict:
     """
     Extracts entities from a user query based on the detected intent.
     menu_items_master_list: A list of canonical menu item names from your DB.
     ingredients_master_list: A list of canonical ingredient names from your DB.
+    restaurant_id / menu_version: Selects the restaurant's compiled matchers from
+    menu_matcher_registry (see load_menu_data_for_nlp). The master lists are only
+    compiled when the registry has no entry for that version yet.
+    Thin wrapper that parses the query itself; nlp.pipeline.analyze() reuses the Doc
+    already produced for intent classification instead.
     """
     processed_query = preprocess_text(query)
-    doc = get_spacy_doc(processed_query) # Use spaCy doc for linguistic features
+    doc = get_spacy_doc(processed_query, ENTITY_COMPONENTS) # Use spaCy doc for linguistic features
+    return extract_entities_from_doc(doc, intent, menu_items_master_list, ingredients_master_list,
+                                     restaurant_id, menu_version)
+
+
+def extract_entities_from_doc(doc, intent: str, menu_items_master_list: list = None, ingredients_master_list: list = None,
+                              restaurant_id=None, menu_version=None) -> dict:
+    """
+    Entity extraction on an already parsed (preprocessed) query Doc.
+    Arguments other than doc are the same as for extract_entities.
+    """
     entities = {}
 
-    # --- Populate dynamic lists if provided (better than global for testing/flexibility) ---
-    # This simulates loading DYNAMIC_MENU_ITEMS and DYNAMIC_INGREDIENTS
-    # In a real app, these would be populated from the DB once, or passed in.
-    
-    # For robust matching, use PhraseMatcher with actual menu/ingredient names
-    from .utils import nlp_spacy # Get the loaded spaCy instance
-    phrase_matcher_menu = PhraseMatcher(nlp_spacy.vocab, attr='LOWER')
-    if menu_items_master_list:
-        menu_patterns = [nlp_spacy.make_doc(name) for name in menu_items_master_list]
-        if menu_patterns:
-            phrase_matcher_menu.add("MENU_ITEM", menu_patterns)
-
-    phrase_matcher_ingredients = PhraseMatcher(nlp_spacy.vocab, attr='LOWER')
-    if ingredients_master_list:
-        ingredient_patterns = [nlp_spacy.make_doc(name) for name in ingredients_master_list]
-        if ingredient_patterns:
-            phrase_matcher_ingredients.add("INGREDIENT", ingredient_patterns)
+    # PhraseMatchers are compiled once per restaurant menu version and reused across requests.
+    compiled = _resolve_menu_matchers(menu_items_master_list, ingredients_master_list, restaurant_id, menu_version)
+    phrase_matcher_menu = compiled.menu_matcher if compiled and compiled.menu_items else None
+    phrase_matcher_ingredients = compiled.ingredient_matcher if compiled and compiled.ingredients else None
+    fuzzy_menu_index = compiled.menu_index if compiled and compiled.menu_items else None
+    fuzzy_ingredient_index = compiled.ingredient_index if compiled and compiled.ingredients else None
 
 
     # --- Entity Extraction Logic based on Intent ---
@@ -77,11 +213,16 @@ def extract_entities(query: str, intent: str, menu_items_master_list: list = Non
     if intent in ["orderFood", "searchFood", "customizeItem", "addToCart"]:
         # 1. Extract Food Items using PhraseMatcher (more robust)
         food_items_found = []
-        if menu_items_master_list:
+        covered = set()
+        if phrase_matcher_menu is not None:
             matches = phrase_matcher_menu(doc)
             for match_id, start, end in matches:
                 span = doc[start:end]
                 food_items_found.append(span.text) # Use span.text to get the exact matched phrase
+                covered.update(range(start, end))
+        # Typo-tolerant fallback on the words no exact match claimed ("margarita piza")
+        if fuzzy_menu_index is not None:
+            food_items_found.extend(name for name, _, _ in _fuzzy_matches(fuzzy_menu_index, doc, covered))
         
         if food_items_found:
             entities["foodItems"] = list(set(food_items_found)) # list of canonical names
@@ -105,12 +246,14 @@ def extract_entities(query: str, intent: str, menu_items_master_list: list = Non
         added_ingredients = []
         removed_ingredients = []
         
-        if ingredients_master_list:
-            ingredient_matches = phrase_matcher_ingredients(doc)
+        if phrase_matcher_ingredients is not None:
+            ingredient_matches, covered = [], set()
+            for match_id, start, end in phrase_matcher_ingredients(doc):
+                ingredient_matches.append((doc[start:end].text, start))
+                covered.update(range(start, end))
+            ingredient_matches.extend((name, start) for name, start, _ in _fuzzy_matches(fuzzy_ingredient_index, doc, covered))
             # Check context around ingredient matches (e.g., "add cheese", "no onions", "without pickles")
-            for match_id, start, end in ingredient_matches:
-                ingredient_span = doc[start:end]
-                ingredient_name = ingredient_span.text # Canonical name
+            for ingredient_name, ingredient_start in ingredient_matches:
 
                 # Check preceding tokens for "add", "extra", "with"
                 # Check preceding tokens for "remove", "no", "without", "hold"
@@ -121,7 +264,7 @@ def extract_entities(query: str, intent: str, menu_items_master_list: list = Non
                 
                 # Simple check: iterate tokens and look for keywords around the entity
                 action = None
-                for i in range(max(0, ingredient_span.start - 3), ingredient_span.start): # Look 3 tokens before
+                for i in range(max(0, ingredient_start - 3), ingredient_start): # Look 3 tokens before
                     token_text = doc[i].lemma_.lower()
                     if token_text in ["add", "extra", "with"]:
                         action = "add"
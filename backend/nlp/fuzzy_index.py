@@ -0,0 +1,164 @@
+# backend/nlp/fuzzy_index.py
+import os
+
+# A candidate must share at least this fraction of its trigrams with the query text.
+FUZZY_MIN_TRIGRAM_OVERLAP = float(os.environ.get("NLP_FUZZY_MIN_TRIGRAM_OVERLAP", "0.4"))
+# Edit distance allowed per character of the name ("margarita piza" -> "margherita pizza" is 2/16).
+FUZZY_MAX_EDIT_RATIO = float(os.environ.get("NLP_FUZZY_MAX_EDIT_RATIO", "0.2"))
+# Candidates kept after trigram filtering; only these are scored by edit distance.
+FUZZY_MAX_CANDIDATES = int(os.environ.get("NLP_FUZZY_MAX_CANDIDATES", "10"))
+# Names shorter than this are only matched exactly: one edit away from a short name is
+# usually an ordinary word, not a typo ("nice" -> "Rice", "later" -> "Water", "paste" ->
+# "Pasta", "union" -> "Onion"), and such pairs share as many trigrams as real typos do.
+FUZZY_MIN_NAME_LENGTH = 6
+# Function words and common chat words. They are never read as a misspelt menu name on
+# their own ("where" -> "Water") and do not count towards a candidate's trigram overlap.
+FUZZY_SKIP_WORDS = frozenset("""
+a about after again all also am an and any are as at be been before but by can could
+did do does for from get give got had has have he her here him his how i if in into is
+it its just like me meet more most my no not now of off on one only or our out please
+she so some than thank thanks that the their them then there these they this those to
+too up us very was we well were what when where which while who why will with would
+yes you your
+bad best cold cool day fine good great hello hey hot hungry kind large little lot make
+much need nice okay order right small sure take time today tonight want way
+""".split())
+
+
+def word_trigrams(words) -> set:
+    """Character trigrams of each word padded with one space on each side (" piz", "za ")."""
+    trigrams = set()
+    for word in words:
+        padded = f" {word.lower()} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between a and b, or max_distance + 1 as soon as it is known
+    to exceed max_distance (only a diagonal band of the DP table is filled).
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+    too_far = max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        low, high = max(1, i - max_distance), min(len(b), i + max_distance)
+        current = [i if i <= max_distance else too_far] + [too_far] * len(b)
+        for j in range(low, high + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        if min(current[low - 1:high + 1]) > max_distance:
+            return too_far
+        previous = current
+    return min(previous[len(b)], too_far)
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index over one restaurant's menu item (or ingredient) names.
+    lookup() narrows a query to the few names sharing enough trigrams with it, and only
+    those are compared by edit distance, so fuzzy matching cost follows the number of
+    candidates rather than the size of the menu.
+    Instances are not mutated once published: updated() returns a new index that shares
+    every posting list the menu edit did not touch.
+    """
+
+    def __init__(self, names=()):
+        self._names = {}     # lower-case name -> canonical name
+        self._trigrams = {}  # lower-case name -> frozenset of its trigrams
+        self._postings = {}  # trigram -> frozenset of lower-case names
+        self.max_words = 0
+        self._apply(added={name.lower(): name for name in names}, removed=())
+
+    def _apply(self, added: dict, removed):
+        touched = {}
+        for key in removed:
+            self._names.pop(key, None)
+            for trigram in self._trigrams.pop(key, ()):
+                touched.setdefault(trigram, set(self._postings.get(trigram, ()))).discard(key)
+        for key, name in added.items():
+            trigrams = frozenset(word_trigrams(key.split()))
+            self._names[key] = name
+            self._trigrams[key] = trigrams
+            for trigram in trigrams:
+                touched.setdefault(trigram, set(self._postings.get(trigram, ()))).add(key)
+        for trigram, keys in touched.items():
+            if keys:
+                self._postings[trigram] = frozenset(keys)
+            else:
+                self._postings.pop(trigram, None)
+        self.max_words = max((len(key.split()) for key in self._names), default=0)
+
+    def updated(self, names) -> "TrigramIndex":
+        """
+        Returns an index over names, reusing this one: only names added or removed since
+        it was built are (un)indexed, so a one-item menu edit costs one item, not the menu.
+        """
+        wanted = {name.lower(): name for name in names}
+        clone = TrigramIndex.__new__(TrigramIndex)
+        clone._names = dict(self._names)
+        clone._trigrams = dict(self._trigrams)
+        clone._postings = dict(self._postings)
+        clone.max_words = self.max_words
+        removed = [key for key in self._names if key not in wanted]
+        added = {key: name for key, name in wanted.items() if self._names.get(key) != name}
+        clone._apply(added, removed)
+        return clone
+
+    def __len__(self):
+        return len(self._names)
+
+    def lookup(self, words, max_candidates: int = FUZZY_MAX_CANDIDATES,
+               min_overlap: float = FUZZY_MIN_TRIGRAM_OVERLAP) -> list:
+        """
+        Returns up to max_candidates lower-case names that share at least min_overlap of
+        their trigrams with the words: most shared trigrams first, so a longer name
+        containing a shorter candidate ("margherita pizza large") is not cut off by it,
+        then best overlap ratio, then name.
+        """
+        shared = {}
+        for trigram in word_trigrams(word for word in words if word.lower() not in FUZZY_SKIP_WORDS):
+            for key in self._postings.get(trigram, ()):
+                shared[key] = shared.get(key, 0) + 1
+        scored = [
+            (-count, -count / len(self._trigrams[key]), key) for key, count in shared.items()
+            if count >= min_overlap * len(self._trigrams[key])
+        ]
+        scored.sort()
+        return [key for _, _, key in scored[:max_candidates]]
+
+    def find(self, words, max_edit_ratio: float = FUZZY_MAX_EDIT_RATIO,
+             max_candidates: int = FUZZY_MAX_CANDIDATES) -> list:
+        """
+        Fuzzy matches names inside a word sequence (e.g. the tokens of a query).
+        Returns [(canonical_name, start, end), ...] where words[start:end] is the matched
+        phrase; overlapping matches keep the one with the lowest edit distance, then the
+        longest phrase (like spaCy's longest-span rule). Phrases made only of
+        FUZZY_SKIP_WORDS are not matched.
+        """
+        words = [word.lower() for word in words]
+        if not words or not self._names or all(word in FUZZY_SKIP_WORDS for word in words):
+            return []
+        hits = []
+        for key in self.lookup(words, max_candidates):
+            n_words = len(key.split())
+            max_distance = max(1, int(len(key) * max_edit_ratio)) if len(key) >= FUZZY_MIN_NAME_LENGTH else 0
+            # The phrase may be typed with one word more or less ("pepper oni pizza")
+            for width in {max(1, n_words - 1), n_words, n_words + 1}:
+                for start in range(len(words) - width + 1):
+                    if all(word in FUZZY_SKIP_WORDS for word in words[start:start + width]):
+                        continue
+                    distance = bounded_edit_distance(" ".join(words[start:start + width]), key, max_distance)
+                    if distance <= max_distance:
+                        hits.append((distance, start, start + width, self._names[key]))
+        hits.sort(key=lambda hit: (hit[0], hit[1] - hit[2], hit[1]))
+        taken, matches = set(), []
+        for _, start, end, name in hits:
+            if taken.isdisjoint(range(start, end)):
+                taken.update(range(start, end))
+                matches.append((name, start, end))
+        return sorted(matches, key=lambda match: match[1])
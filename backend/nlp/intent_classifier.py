@@ -1,10 +1,6 @@
 # backend/nlp/intent_classifier.py
-from .utils import (
-    preprocess_text, tokenize_and_lemmatize,
-    GREETING_KEYWORDS, ORDER_KEYWORDS, MENU_KEYWORDS,
-    STATUS_KEYWORDS, BILL_KEYWORDS, CANCEL_KEYWORDS,
-    CUSTOMIZE_KEYWORDS, AFFIRMATIVE_KEYWORDS, NEGATIVE_KEYWORDS
-)
+from .utils import preprocess_text, tokenize_and_lemmatize, surface_words, KEYWORD_TABLES
+from .keyword_matcher import KeywordAutomaton
 
 # Define your intents
 INTENT_GREET = "greet"
@@ -25,54 +21,75 @@ INTENT_PROVIDE_INFO = "provideInfo" # e.g., user gives table number or address
 
 # More specific intents can be added later, e.g., askRestaurantHours, askDeliveryTime
 
+# Compiled once at import: finds single-word and multi-word keywords ("where is my",
+# "change my mind") of every table in one pass over the utterance.
+KEYWORD_AUTOMATON = KeywordAutomaton(KEYWORD_TABLES)
+
 def classify_intent(query: str, previous_intent: str = None, dialog_context: dict = None) -> str:
     """
     Classifies the intent of a user query.
     Can use previous_intent and dialog_context for more complex dialog management later.
+    Thin wrapper that parses the query itself; nlp.pipeline.analyze() shares one parse
+    between intent classification and entity extraction instead.
     """
     processed_query = preprocess_text(query)
-    tokens = set(tokenize_and_lemmatize(processed_query)) # Use set for faster "in" checks
+    lemmas = tokenize_and_lemmatize(processed_query)
+    return classify_intent_from_lemmas(query, processed_query, lemmas, previous_intent, dialog_context)
+
+
+def classify_intent_from_lemmas(query: str, processed_query: str, lemmas: list, previous_intent: str = None,
+                                dialog_context: dict = None) -> str:
+    """
+    Rule cascade behind classify_intent, working on an already preprocessed query and
+    its lemma sequence (in text order) so the caller controls how (and how often) the
+    text is parsed.
+    """
+    dialog_context = dialog_context or {}
+    tokens = set(lemmas) # Use set for faster "in" checks
+    # Every keyword hit of every table, from the lemmas ("orders" -> "order") and the
+    # surface words ("don't", "options"), in one automaton pass each.
+    hits = KEYWORD_AUTOMATON.match_labels(lemmas, surface_words(processed_query))
 
     # 1. Check for simple, direct intents first
-    if any(keyword in tokens for keyword in GREETING_KEYWORDS):
+    if "greeting" in hits:
         return INTENT_GREET
 
-    if any(keyword in tokens for keyword in AFFIRMATIVE_KEYWORDS) and \
-       not any(keyword in tokens for keyword in ORDER_KEYWORDS + MENU_KEYWORDS): # Avoid "yes i want pizza" being just affirmative
+    if "affirmative" in hits and \
+       not ("order" in hits or "menu" in hits): # Avoid "yes i want pizza" being just affirmative
         # Context is important here: "yes" to what?
         if previous_intent == INTENT_ADD_TO_CART: # e.g., AI asked "Add to cart?"
              return INTENT_AFFIRMATIVE # Or directly INTENT_CONFIRM_ADD_TO_CART
         return INTENT_AFFIRMATIVE
 
 
-    if any(keyword in tokens for keyword in NEGATIVE_KEYWORDS) and \
-       not any(keyword in tokens for keyword in ORDER_KEYWORDS + MENU_KEYWORDS):
+    if "negative" in hits and \
+       not ("order" in hits or "menu" in hits):
         # Context is important: "no" to what?
         if previous_intent == INTENT_ADD_TO_CART:
             return INTENT_NEGATIVE # Or directly INTENT_REJECT_ADD_TO_CART
         return INTENT_NEGATIVE
 
     # More specific intents (order matters - more specific first)
-    if any(keyword in tokens for keyword in STATUS_KEYWORDS) and "order" in tokens:
+    if "status" in hits and "order" in tokens:
         return INTENT_GET_ORDER_STATUS
 
-    if any(keyword in tokens for keyword in BILL_KEYWORDS) or "check please" in processed_query:
+    if "bill" in hits: # "check please" is covered by the "check" keyword
         return INTENT_REQUEST_BILL
 
-    if any(keyword in tokens for keyword in CANCEL_KEYWORDS) and ("order" in tokens or previous_intent in [INTENT_ORDER_FOOD, INTENT_ADD_TO_CART]):
+    if "cancel" in hits and ("order" in tokens or previous_intent in [INTENT_ORDER_FOOD, INTENT_ADD_TO_CART]):
         return INTENT_CANCEL_ORDER
 
-    if any(keyword in tokens for keyword in MENU_KEYWORDS):
+    if "menu" in hits:
         return INTENT_VIEW_MENU
 
-    if any(keyword in tokens for keyword in CUSTOMIZE_KEYWORDS):
+    if "customize" in hits:
         # This might also be part of an orderFood intent if entities are extracted well.
         # If it's a follow-up, it's more clearly customizeItem.
         if previous_intent in [INTENT_ORDER_FOOD, INTENT_SEARCH_FOOD, INTENT_CUSTOMIZE_ITEM] or dialog_context.get("currentItemToCustomize"):
             return INTENT_CUSTOMIZE_ITEM
         # Otherwise, it might be a general query about customization, which could be searchFood too.
 
-    if any(keyword in tokens for keyword in ORDER_KEYWORDS):
+    if "order" in hits:
         return INTENT_ORDER_FOOD # Or INTENT_SEARCH_FOOD, entity extraction will clarify
 
     # Fallback to search if common food words are present but no strong order verb
@@ -84,10 +101,10 @@ def classify_intent(query: str, previous_intent: str = None, dialog_context: dic
 
 
     # Check for providing information based on context (e.g., after AI asks for table number)
-    if dialog_context and dialog_context.get("expecting") == "table_number":
+    if dialog_context.get("expecting") == "table_number":
         if any(token.isdigit() for token in query.split()): # Simple check for numbers
             return INTENT_PROVIDE_INFO
-    if dialog_context and dialog_context.get("expecting") == "address":
+    if dialog_context.get("expecting") == "address":
         # More complex address parsing needed, for now, assume any text is the address
         if len(query.split()) > 2: # Very basic check
              return INTENT_PROVIDE_INFO
@@ -0,0 +1,75 @@
+# backend/nlp/keyword_matcher.py
+from collections import deque
+
+
+class KeywordAutomaton:
+    """
+    Word-level Aho-Corasick automaton over labelled keyword tables.
+
+    Built once from {label: [keyword, ...]}; keywords may be single words ("menu") or
+    phrases ("where is my"). find_all() reports every keyword of every label in a single
+    left-to-right pass over a word sequence, so matching cost depends on the length of
+    the text (plus the number of hits), not on how many keywords the tables hold.
+    """
+
+    def __init__(self, keyword_tables: dict):
+        self._goto = [{}]      # node -> {word: child node}
+        self._fail = [0]       # node -> longest proper suffix node
+        self._outputs = [[]]   # node -> [(label, keyword), ...] ending at this node
+        for label, keywords in keyword_tables.items():
+            for keyword in keywords:
+                self._add(label, keyword)
+        self._build_failure_links()
+
+    def _add(self, label, keyword: str):
+        words = keyword.lower().split()
+        if not words:
+            return
+        node = 0
+        for word in words:
+            child = self._goto[node].get(word)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][word] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = child
+        self._outputs[node].append((label, keyword))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                # Inherit the matches of the suffix node so each step reports everything ending here
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def find_all(self, words):
+        """
+        Yields (label, keyword, start, end) for every keyword occurrence in the word
+        sequence, where words[start:end] is the matched phrase.
+        """
+        node = 0
+        for position, word in enumerate(words):
+            while node and word not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(word, 0)
+            for label, keyword in self._outputs[node]:
+                yield label, keyword, position - len(keyword.split()) + 1, position + 1
+
+    def match_labels(self, *word_sequences) -> dict:
+        """
+        Returns {label: {matched keywords}} over one or more word sequences (e.g. the
+        lemmas and the surface words of the same utterance).
+        """
+        hits = {}
+        for words in word_sequences:
+            for label, keyword, _, _ in self.find_all(words):
+                hits.setdefault(label, set()).add(keyword)
+        return hits
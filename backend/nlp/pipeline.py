@@ -0,0 +1,202 @@
+# backend/nlp/pipeline.py
+import time
+from dataclasses import dataclass, field
+
+from .utils import preprocess_text, get_spacy_doc, get_nlp, lemmas_from_doc, INTENT_COMPONENTS, ENTITY_COMPONENTS
+from .intent_classifier import classify_intent_from_lemmas
+from .scoring_classifier import DEFAULT_MIN_INTENT_CONFIDENCE
+from .cache import nlu_result_cache
+from .entity_extractor import extract_entities_from_doc
+
+# Keys understood in the `context` dict passed to analyze():
+#   previous_intent          - intent of the previous turn (str)
+#   dialog_context           - dialog state dict, e.g. {"expecting": "table_number"}
+#   restaurant_id            - selects the restaurant's compiled menu matchers
+#   menu_version             - menu version those matchers were compiled for
+#   menu_items_master_list   - menu item names (compiled on a registry miss)
+#   ingredients_master_list  - ingredient names (compiled on a registry miss)
+#   intent_scorer            - optional ScoringIntentClassifier; the rule cascade is the
+#                              fallback when it is absent or not confident enough
+#   min_intent_confidence    - scorer confidence needed to skip the rules
+#                              (default DEFAULT_MIN_INTENT_CONFIDENCE)
+#   use_cache                - False bypasses nlu_result_cache (default True)
+
+# Both stages read the same Doc, so it is parsed with the union of their pipes.
+PIPELINE_COMPONENTS = tuple(dict.fromkeys(INTENT_COMPONENTS + ENTITY_COMPONENTS))
+
+DEFAULT_BATCH_SIZE = 256
+
+
+@dataclass
+class NLUResult:
+    """
+    Outcome of one analyze() call.
+    timings_ms holds per-stage wall time: preprocess, parse, intent, entities and total.
+    intent_confidence / ranked_intents are only set when an intent scorer was used;
+    intent_confidence stays None when the rule cascade decided the intent.
+    fallback_reason is set (e.g. "timeout") when nlp.worker_pool could not run the
+    analysis and answered INTENT_UNKNOWN instead.
+    """
+    query: str
+    processed_query: str
+    intent: str
+    entities: dict = field(default_factory=dict)
+    timings_ms: dict = field(default_factory=dict)
+    intent_confidence: float = None
+    ranked_intents: list = field(default_factory=list) # [(intent, confidence), ...] best first
+    cache_hit: bool = False
+    fallback_reason: str = None
+
+    def to_log_fields(self) -> dict:
+        """Field values for an ai_engine.models.NLULog row."""
+        return {
+            "user_query_raw": self.query,
+            "user_query_processed": self.processed_query,
+            "detected_intent": self.intent,
+            "intent_confidence": self.intent_confidence,
+            "detected_entities": self.entities,
+            "processing_time_ms": int(round(self.timings_ms.get("total", 0))),
+        }
+
+
+def analyze(query: str, context: dict = None) -> NLUResult:
+    """
+    Runs intent classification and entity extraction over a single spaCy parse.
+    The query is preprocessed once, parsed once, and the same Doc / lemma set is handed
+    to both stages (classify_intent + extract_entities would parse it twice).
+    """
+    context = context or {}
+    timings = {}
+    started = time.perf_counter()
+
+    processed_query = preprocess_text(query)
+    after_preprocess = time.perf_counter()
+    timings["preprocess"] = (after_preprocess - started) * 1000
+
+    use_cache = context.get("use_cache", True)
+    if use_cache:
+        cache_key = nlu_result_cache.make_key(processed_query, context)
+        cached = nlu_result_cache.get(cache_key)
+        if cached is not None:
+            cached.query = query
+            cached.timings_ms = {"preprocess": timings["preprocess"], "total": (time.perf_counter() - started) * 1000}
+            return cached
+
+    doc = get_spacy_doc(processed_query, PIPELINE_COMPONENTS)
+    after_parse = time.perf_counter()
+    timings["parse"] = (after_parse - after_preprocess) * 1000
+
+    intent, confidence, ranked, entities = _classify_and_extract(query, processed_query, doc, context, timings)
+    timings["total"] = (time.perf_counter() - started) * 1000
+
+    result = NLUResult(
+        query=query,
+        processed_query=processed_query,
+        intent=intent,
+        entities=entities,
+        timings_ms=timings,
+        intent_confidence=confidence,
+        ranked_intents=ranked,
+    )
+    if use_cache:
+        nlu_result_cache.put(cache_key, result)
+    return result
+
+
+def _classify_and_extract(query: str, processed_query: str, doc, context: dict, timings: dict):
+    """
+    Runs both NLU stages on a parsed Doc, recording their wall time in timings.
+    Returns (intent, intent_confidence, ranked_intents, entities).
+    """
+    started = time.perf_counter()
+    lemmas = lemmas_from_doc(doc)
+    intent, confidence, ranked = None, None, []
+    scorer = context.get("intent_scorer")
+    if scorer is not None:
+        ranked = scorer.rank(lemmas, top_k=3)
+        if ranked and ranked[0][1] >= context.get("min_intent_confidence", DEFAULT_MIN_INTENT_CONFIDENCE):
+            intent, confidence = ranked[0]
+    if intent is None: # No scorer, or not confident enough: rule cascade
+        intent = classify_intent_from_lemmas(
+            query, processed_query, lemmas,
+            previous_intent=context.get("previous_intent"),
+            dialog_context=context.get("dialog_context"),
+        )
+    after_intent = time.perf_counter()
+    entities = extract_entities_from_doc(
+        doc, intent,
+        menu_items_master_list=context.get("menu_items_master_list"),
+        ingredients_master_list=context.get("ingredients_master_list"),
+        restaurant_id=context.get("restaurant_id"),
+        menu_version=context.get("menu_version"),
+    )
+    timings["intent"] = (after_intent - started) * 1000
+    timings["entities"] = (time.perf_counter() - after_intent) * 1000
+    return intent, confidence, ranked, entities
+
+
+def analyze_batch(queries, contexts=None, batch_size: int = DEFAULT_BATCH_SIZE, n_process: int = 1) -> list:
+    """
+    Batch version of analyze(): streams every query through nlp.pipe() and returns one
+    NLUResult per query, in input order.
+    contexts: a single context dict shared by all queries, or a list with one per query.
+    n_process > 1 parses in spaCy worker processes (each loads its own copy of the model,
+    so only worth it for large offline batches); intent and entity rules always run here.
+    timings_ms["parse"] is the batch parse time divided evenly over the parsed queries;
+    cache hits (see nlp.cache) are not parsed at all.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    if contexts is None or isinstance(contexts, dict):
+        contexts = [contexts or {}] * len(queries)
+    elif len(contexts) != len(queries):
+        raise ValueError("contexts must be a dict or a list with one entry per query.")
+
+    started = time.perf_counter()
+    processed_queries = [preprocess_text(query) for query in queries]
+    after_preprocess = time.perf_counter()
+    preprocess_ms = (after_preprocess - started) * 1000 / len(queries)
+
+    # Cached utterances skip the parse; only the misses go through nlp.pipe()
+    results = [None] * len(queries)
+    cache_keys = [None] * len(queries)
+    misses = []
+    for i, (query, processed_query, context) in enumerate(zip(queries, processed_queries, contexts)):
+        context = context or {}
+        if context.get("use_cache", True):
+            cache_keys[i] = nlu_result_cache.make_key(processed_query, context)
+            cached = nlu_result_cache.get(cache_keys[i])
+            if cached is not None:
+                cached.query = query
+                cached.timings_ms = {"preprocess": preprocess_ms, "total": preprocess_ms}
+                results[i] = cached
+                continue
+        misses.append(i)
+    if not misses:
+        return results
+
+    # The loaded pipeline only holds the pipes excluded-at-load left over (see
+    # nlp.utils.EXCLUDED_COMPONENTS), so nlp.pipe() runs exactly what the stages need.
+    docs = get_nlp().pipe((processed_queries[i] for i in misses), batch_size=batch_size, n_process=n_process)
+    docs = list(docs)
+    parse_ms = (time.perf_counter() - after_preprocess) * 1000 / len(misses)
+
+    for i, doc in zip(misses, docs):
+        timings = {"preprocess": preprocess_ms, "parse": parse_ms}
+        intent, confidence, ranked, entities = _classify_and_extract(
+            queries[i], processed_queries[i], doc, contexts[i] or {}, timings
+        )
+        timings["total"] = preprocess_ms + parse_ms + timings["intent"] + timings["entities"]
+        results[i] = NLUResult(
+            query=queries[i],
+            processed_query=processed_queries[i],
+            intent=intent,
+            entities=entities,
+            timings_ms=timings,
+            intent_confidence=confidence,
+            ranked_intents=ranked,
+        )
+        if cache_keys[i] is not None:
+            nlu_result_cache.put(cache_keys[i], results[i])
+    return results
@@ -0,0 +1,120 @@
+# backend/nlp/scoring_classifier.py
+import hashlib
+import zlib
+from functools import cached_property
+
+import numpy as np
+
+# Size of the hashed feature space. Weights are stored as a dense
+# (n_features x n_intents) float32 matrix: 2**16 features x 15 intents is ~4 MB.
+DEFAULT_N_FEATURES = 2 ** 16
+# Below this top-intent confidence callers should fall back to the rule cascade.
+DEFAULT_MIN_INTENT_CONFIDENCE = 0.5
+
+
+def hash_features(lemmas, n_features: int = DEFAULT_N_FEATURES, max_ngram: int = 2):
+    """
+    Turns a lemma sequence into a sparse hashed bag of n-grams (unigrams up to max_ngram).
+    Returns (indices, counts) as NumPy arrays. crc32 is used instead of hash() so feature
+    ids are stable across processes and Python runs (PYTHONHASHSEED).
+    """
+    lemmas = [lemma.lower() for lemma in lemmas]
+    features = []
+    for n in range(1, max_ngram + 1):
+        for start in range(len(lemmas) - n + 1):
+            features.append(f"{n}:" + " ".join(lemmas[start:start + n]))
+    if not features:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    hashed = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.int64, count=len(features))
+    indices, counts = np.unique(hashed % n_features, return_counts=True)
+    return indices, counts.astype(np.float32)
+
+
+class ScoringIntentClassifier:
+    """
+    Linear intent scorer over hashed lemma n-grams.
+    Every intent is scored in one gather + matrix-vector product over only the query's
+    non-zero features, then normalised with a softmax into confidences.
+    """
+
+    def __init__(self, intents, weights, bias=None, max_ngram: int = 2):
+        self.intents = list(intents)
+        # (n_features, n_intents): the rows of a query's features are contiguous to gather
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = np.zeros(len(self.intents), dtype=np.float32) if bias is None else np.asarray(bias, dtype=np.float32)
+        self.max_ngram = max_ngram
+        if self.weights.ndim != 2 or self.weights.shape[1] != len(self.intents):
+            raise ValueError("weights must have shape (n_features, n_intents).")
+        if self.bias.shape != (len(self.intents),):
+            raise ValueError("bias must have one entry per intent.")
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    @cached_property
+    def version(self) -> str:
+        """Digest of the model's parameters: equal for the same artifact, whichever object holds it."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\x1f".join(self.intents).encode("utf-8"))
+        digest.update(str(self.max_ngram).encode("ascii"))
+        digest.update(self.weights.tobytes())
+        digest.update(self.bias.tobytes())
+        return digest.hexdigest()
+
+    def rank(self, lemmas, top_k: int = None) -> list:
+        """
+        Returns [(intent, confidence), ...] sorted by confidence, best first.
+        top_k limits the list; confidences are over all intents and sum to 1.
+        """
+        indices, counts = hash_features(lemmas, self.n_features, self.max_ngram)
+        scores = self.bias + counts @ self.weights[indices] if indices.size else self.bias.copy()
+        scores = scores - scores.max()
+        confidences = np.exp(scores)
+        confidences /= confidences.sum()
+        order = np.argsort(-confidences)
+        if top_k is not None:
+            order = order[:top_k]
+        return [(self.intents[i], float(confidences[i])) for i in order]
+
+    # --- Persistence (AIModelVersion.artifact_uri points at one of these .npz files) ---
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path, intents=np.array(self.intents), weights=self.weights,
+            bias=self.bias, max_ngram=np.array(self.max_ngram)
+        )
+
+    @classmethod
+    def from_artifact(cls, path: str) -> "ScoringIntentClassifier":
+        with np.load(path, allow_pickle=False) as artifact:
+            return cls(
+                intents=[str(intent) for intent in artifact["intents"]],
+                weights=artifact["weights"],
+                bias=artifact["bias"],
+                max_ngram=int(artifact["max_ngram"]),
+            )
+
+    @classmethod
+    def fit(cls, samples, n_features: int = DEFAULT_N_FEATURES, max_ngram: int = 2,
+            alpha: float = 1.0) -> "ScoringIntentClassifier":
+        """
+        Trains a multinomial naive Bayes model from (lemmas, intent) pairs, e.g. NLULog
+        rows or a labelled corpus. Weights are log P(feature | intent), bias log P(intent);
+        alpha is the additive (Laplace) smoothing.
+        """
+        samples = list(samples)
+        intents = sorted({intent for _, intent in samples})
+        if not intents:
+            raise ValueError("At least one labelled sample is required.")
+        column = {intent: i for i, intent in enumerate(intents)}
+        counts = np.zeros((n_features, len(intents)), dtype=np.float64)
+        priors = np.zeros(len(intents), dtype=np.float64)
+        for lemmas, intent in samples:
+            indices, values = hash_features(lemmas, n_features, max_ngram)
+            counts[indices, column[intent]] += values
+            priors[column[intent]] += 1
+        smoothed = counts + alpha
+        weights = np.log(smoothed) - np.log(smoothed.sum(axis=0, keepdims=True))
+        bias = np.log(priors / priors.sum())
+        return cls(intents, weights, bias, max_ngram=max_ngram)
@@ -1,15 +1,78 @@
 # backend/nlp/utils.py
+import os
 import re
+import threading
 import spacy
 
-# Load spaCy model once. Consider lazy loading or loading at app startup.
-# Using a try-except block for environments where it might not be pre-downloaded.
-try:
-    nlp_spacy = spacy.load("en_core_web_sm")
-except OSError:
-    print("Downloading spaCy model 'en_core_web_sm'...")
-    spacy.cli.download("en_core_web_sm")
-    nlp_spacy = spacy.load("en_core_web_sm")
+SPACY_MODEL_NAME = os.environ.get("NLP_SPACY_MODEL", "en_core_web_sm")
+
+# Pipes no NLU stage uses. They are excluded at load time, so they are never
+# initialised and cost neither startup time nor memory. Override with a
+# comma-separated NLP_SPACY_EXCLUDE (empty string keeps every pipe).
+EXCLUDED_COMPONENTS = tuple(
+    name.strip() for name in os.environ.get("NLP_SPACY_EXCLUDE", "parser,ner").split(",") if name.strip()
+)
+
+# Pipes each stage needs. The lemmatizer of en_core_web_sm is rule-based and relies on
+# the POS tags from tagger + attribute_ruler, which in turn listen to tok2vec.
+INTENT_COMPONENTS = ("tok2vec", "tagger", "attribute_ruler", "lemmatizer")
+ENTITY_COMPONENTS = ("tok2vec", "tagger", "attribute_ruler", "lemmatizer") # lemma_, pos_ and like_num
+
+_nlp_spacy = None
+_nlp_spacy_lock = threading.Lock()
+
+
+def get_nlp() -> spacy.language.Language:
+    """
+    Returns the shared spaCy pipeline, loading it on first use (thread-safe).
+    The model is never downloaded here: it must be installed with the other
+    requirements (see requirements.txt), otherwise a RuntimeError is raised.
+    """
+    global _nlp_spacy
+    if _nlp_spacy is None:
+        with _nlp_spacy_lock:
+            if _nlp_spacy is None:
+                try:
+                    _nlp_spacy = spacy.load(SPACY_MODEL_NAME, exclude=list(EXCLUDED_COMPONENTS))
+                except OSError as exc:
+                    raise RuntimeError(
+                        f"spaCy model '{SPACY_MODEL_NAME}' is not installed. Install it at build time "
+                        f"(pip install -r requirements.txt or python -m spacy download {SPACY_MODEL_NAME})."
+                    ) from exc
+    return _nlp_spacy
+
+
+def warm_up() -> None:
+    """
+    Loads the model and runs one throwaway parse so the first real request does not pay
+    for it. Call it from the server master before forking (e.g. gunicorn --preload with
+    NLP_WARM_UP_ON_STARTUP=True, see restoapi/wsgi.py) so workers share the loaded
+    model pages copy-on-write.
+    """
+    get_nlp()("warm up")
+
+
+def __getattr__(name):
+    # Backwards compatibility for `from nlp.utils import nlp_spacy`; loads lazily.
+    if name == "nlp_spacy":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def run_components(text: str, components=None) -> spacy.tokens.Doc:
+    """
+    Parses text running only the listed pipeline components (in pipeline order);
+    components=None runs every loaded pipe. Unlike nlp.select_pipes() this leaves the
+    shared pipeline untouched, so it is safe to call from concurrent threads.
+    """
+    nlp = get_nlp()
+    if components is None:
+        return nlp(text)
+    doc = nlp.make_doc(text)
+    for name, proc in nlp.pipeline:
+        if name in components:
+            doc = proc(doc)
+    return doc
 
 
 def preprocess_text(text: str) -> str:
@@ -31,16 +94,28 @@ def tokenize_and_lemmatize(text: str) -> list[str]:
     """
     if not text:
         return []
-    doc = nlp_spacy(text)
+    return lemmas_from_doc(run_components(text, INTENT_COMPONENTS))
+
+def surface_words(text: str) -> list[str]:
+    """
+    Splits preprocessed text into words, keeping in-word apostrophes ("don't") and
+    dropping punctuation. Used for keyword matching alongside the lemma sequence.
+    """
+    return re.findall(r"[\w']+", text)
+
+def lemmas_from_doc(doc: spacy.tokens.Doc) -> list[str]:
+    """
+    Returns the lemma strings of an already parsed Doc (punctuation and whitespace dropped).
+    Lets callers that already hold a Doc skip a second pipeline run.
+    """
     return [token.lemma_ for token in doc if not token.is_punct and not token.is_space]
 
-def get_spacy_doc(text: str) -> spacy.tokens.Doc:
+def get_spacy_doc(text: str, components=None) -> spacy.tokens.Doc:
     """
     Returns a spaCy Doc object for more advanced processing.
+    components: pipes to run (see INTENT_COMPONENTS / ENTITY_COMPONENTS); None runs all loaded pipes.
     """
-    if not text:
-        return nlp_spacy("") # Return empty doc for empty string
-    return nlp_spacy(text)
+    return run_components(text or "", components) # Empty doc for empty string
 
 # --- Keywords for simple matching ---
 # These would ideally be managed more dynamically or come from your menu data
@@ -55,6 +130,20 @@ CUSTOMIZE_KEYWORDS = ["add", "remove", "extra", "no", "without", "with", "less",
 AFFIRMATIVE_KEYWORDS = ["yes", "yeah", "yep", "ok", "okay", "sure", "alright", "confirm"]
 NEGATIVE_KEYWORDS = ["no", "nope", "nah", "don't", "do not", "cancel that"]
 
+# Label -> keyword list, compiled into one KeywordAutomaton by the intent classifier.
+# Adding a table here (or keywords to a table) needs no classifier changes for matching.
+KEYWORD_TABLES = {
+    "greeting": GREETING_KEYWORDS,
+    "order": ORDER_KEYWORDS,
+    "menu": MENU_KEYWORDS,
+    "status": STATUS_KEYWORDS,
+    "bill": BILL_KEYWORDS,
+    "cancel": CANCEL_KEYWORDS,
+    "customize": CUSTOMIZE_KEYWORDS,
+    "affirmative": AFFIRMATIVE_KEYWORDS,
+    "negative": NEGATIVE_KEYWORDS,
+}
+
 # You might have categories of food items for broader matching
 FOOD_CATEGORIES_KEYWORDS = {
     "pizza": ["pizza", "pizzas"],
@@ -0,0 +1,155 @@
+# backend/nlp/worker_pool.py
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from .intent_classifier import INTENT_UNKNOWN
+from .pipeline import NLUResult, analyze
+from .utils import preprocess_text
+
+logger = logging.getLogger(__name__)
+
+NLP_WORKER_PROCESSES = int(os.environ.get("NLP_WORKER_PROCESSES", "2"))
+# Requests queued or running per worker before new ones are shed (backpressure).
+NLP_WORKER_QUEUE_PER_PROCESS = int(os.environ.get("NLP_WORKER_QUEUE_PER_PROCESS", "8"))
+NLP_WORKER_TIMEOUT_SECONDS = float(os.environ.get("NLP_WORKER_TIMEOUT_SECONDS", "2.0"))
+# "spawn" keeps the workers free of the parent's threads, sockets and DB connections.
+NLP_WORKER_START_METHOD = os.environ.get("NLP_WORKER_START_METHOD", "spawn")
+
+FALLBACK_TIMEOUT = "timeout"
+FALLBACK_OVERLOADED = "overloaded"
+FALLBACK_WORKER_ERROR = "worker_error"
+
+
+# --- Worker process side ---
+
+_worker_scorers = {} # artifact URI -> ScoringIntentClassifier, loaded once per worker
+
+
+def _init_worker():
+    from .utils import warm_up
+    warm_up()
+
+
+def _analyze_in_worker(query: str, context: dict) -> NLUResult:
+    """
+    Runs nlp.pipeline.analyze() in a worker. The intent scorer travels as its artifact
+    URI (context["intent_scorer_uri"]) rather than as pickled weights.
+    """
+    uri = context.pop("intent_scorer_uri", None)
+    if uri:
+        if uri not in _worker_scorers:
+            from .scoring_classifier import ScoringIntentClassifier
+            _worker_scorers.clear() # Only the active model is ever needed
+            _worker_scorers[uri] = ScoringIntentClassifier.from_artifact(uri)
+        context["intent_scorer"] = _worker_scorers[uri]
+    return analyze(query, context)
+
+
+# --- Client side ---
+
+def fallback_result(query: str, reason: str) -> NLUResult:
+    """NLUResult returned when the pool cannot answer in time: intent unknown, no entities."""
+    return NLUResult(
+        query=query, processed_query=preprocess_text(query), intent=INTENT_UNKNOWN, fallback_reason=reason,
+    )
+
+
+class NLUWorkerPool:
+    """
+    Process pool that runs the NLU pipeline away from the web workers' threads.
+
+    Every worker loads the spaCy model once at start (warm_up), so request handlers only
+    pay for pickling a short string and an NLUResult. At most max_pending requests are
+    queued or running; beyond that, and when a result takes longer than timeout, callers
+    immediately get fallback_result() (intent INTENT_UNKNOWN, fallback_reason set) instead
+    of waiting, so a chat burst cannot tie up the threads serving carts and orders.
+    Context dicts must be picklable: pass intent_scorer_uri instead of intent_scorer.
+    """
+
+    def __init__(self, processes: int = NLP_WORKER_PROCESSES,
+                 max_pending: int = None, timeout: float = NLP_WORKER_TIMEOUT_SECONDS,
+                 start_method: str = NLP_WORKER_START_METHOD):
+        self.processes = processes
+        self.max_pending = max_pending or processes * NLP_WORKER_QUEUE_PER_PROCESS
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context(start_method), initializer=_init_worker,
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.shed = self.timeouts = self.errors = 0
+
+    def submit(self, query: str, context: dict = None):
+        """
+        Queues one analysis and returns its concurrent.futures.Future, or None when
+        max_pending requests are already in flight.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.shed += 1
+            return None
+        with self._lock:
+            self.pending += 1
+        try:
+            future = self._executor.submit(_analyze_in_worker, query, dict(context or {}))
+        except Exception:
+            self._release()
+            raise
+        # The slot is held until the worker is done, even if the caller gave up waiting
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+        self._slots.release()
+
+    def _fallback(self, query: str, reason: str, exc: Exception = None) -> NLUResult:
+        with self._lock:
+            if reason == FALLBACK_TIMEOUT:
+                self.timeouts += 1
+            elif reason == FALLBACK_WORKER_ERROR:
+                self.errors += 1
+        if exc is not None:
+            logger.error("NLU worker failed for %r: %s", query, exc)
+        return fallback_result(query, reason)
+
+    def analyze(self, query: str, context: dict = None, timeout: float = None) -> NLUResult:
+        """Blocking client for WSGI code paths; never raises for pool-side problems."""
+        future = self.submit(query, context)
+        if future is None:
+            return fallback_result(query, FALLBACK_OVERLOADED)
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            future.cancel() # Still queued -> never runs; already running -> finishes and is dropped
+            return self._fallback(query, FALLBACK_TIMEOUT)
+        except Exception as exc:
+            return self._fallback(query, FALLBACK_WORKER_ERROR, exc)
+
+    async def analyze_async(self, query: str, context: dict = None, timeout: float = None) -> NLUResult:
+        """Awaitable client for ASGI views: the event loop is free while a worker parses."""
+        future = self.submit(query, context)
+        if future is None:
+            return fallback_result(query, FALLBACK_OVERLOADED)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout or self.timeout)
+        except asyncio.TimeoutError:
+            return self._fallback(query, FALLBACK_TIMEOUT)
+        except Exception as exc:
+            return self._fallback(query, FALLBACK_WORKER_ERROR, exc)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "processes": self.processes, "max_pending": self.max_pending, "pending": self.pending,
+                "shed": self.shed, "timeouts": self.timeouts, "errors": self.errors,
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
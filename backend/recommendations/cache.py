@@ -0,0 +1,83 @@
+# backend/recommendations/cache.py
+import os
+import threading
+from collections import OrderedDict
+
+# Upper bound on the number of restaurants whose prebuilt structures are kept in memory
+# per worker. Least recently used restaurants are evicted first.
+RECOMMENDER_CACHE_SIZE = int(os.environ.get("RECOMMENDER_CACHE_SIZE", "256"))
+
+
+class VersionedRegistry:
+    """
+    LRU registry of per-restaurant structures built from a menu (MenuIndex, similarity
+    matrices, compiled NLP matchers, ...), keyed by restaurant and remembering the menu
+    version each entry was built for. A lookup with a different version is a miss, so a
+    menu edit makes the old entry unreachable without any cross-process coordination.
+    Only the latest version per restaurant is kept.
+    keep_invalidated: invalidate(restaurant_key) retires the entry instead of forgetting
+    it, so previous() can still hand it to a builder that updates it incrementally.
+    """
+
+    def __init__(self, max_entries: int = RECOMMENDER_CACHE_SIZE, keep_invalidated: bool = False):
+        self.max_entries = max_entries
+        self.keep_invalidated = keep_invalidated
+        self._entries = OrderedDict()  # {restaurant_key: (menu_version, value)}
+        self._retired = {}  # {restaurant_key: value} invalidated, kept as a base for the rebuild
+        self._lock = threading.Lock()
+
+    def get(self, restaurant_key, menu_version):
+        with self._lock:
+            entry = self._entries.get(restaurant_key)
+            if entry is None or entry[0] != menu_version:
+                return None
+            self._entries.move_to_end(restaurant_key)
+            return entry[1]
+
+    def get_latest(self, restaurant_key):
+        """Returns the entry for restaurant_key whatever version it was built for."""
+        with self._lock:
+            entry = self._entries.get(restaurant_key)
+            return entry[1] if entry else None
+
+    def previous(self, restaurant_key):
+        """The most recent entry built for restaurant_key, current or retired (see keep_invalidated)."""
+        with self._lock:
+            entry = self._entries.get(restaurant_key)
+            return entry[1] if entry else self._retired.get(restaurant_key)
+
+    def put(self, restaurant_key, menu_version, value):
+        with self._lock:
+            self._retired.pop(restaurant_key, None)
+            self._entries[restaurant_key] = (menu_version, value)
+            self._entries.move_to_end(restaurant_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_build(self, restaurant_key, menu_version, builder):
+        """
+        Returns the entry for (restaurant_key, menu_version), calling builder() on a miss.
+        Building runs outside the lock; two threads racing on the same miss both build
+        and the last one wins, which is harmless.
+        """
+        value = self.get(restaurant_key, menu_version)
+        if value is None:
+            value = builder()
+            self.put(restaurant_key, menu_version, value)
+        return value
+
+    def invalidate(self, restaurant_key=None):
+        """Drops one restaurant's entry, or all of them (retired ones included) if restaurant_key is None."""
+        with self._lock:
+            if restaurant_key is None:
+                self._entries.clear()
+                self._retired.clear()
+                return
+            entry = self._entries.pop(restaurant_key, None)
+            if entry is not None and self.keep_invalidated:
+                self._retired[restaurant_key] = entry[1]
+                while len(self._retired) > self.max_entries:
+                    del self._retired[next(iter(self._retired))]
+
+    def __len__(self):
+        return len(self._entries)
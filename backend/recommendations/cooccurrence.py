@@ -0,0 +1,150 @@
+# backend/recommendations/cooccurrence.py
+import os
+from collections import Counter
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .cache import VersionedRegistry
+
+# Pairs seen in fewer orders than this are pruned once they go stale (see
+# ai_engine.cooccurrence), which keeps the pair table bounded.
+COOCCURRENCE_MIN_PAIR_SUPPORT = int(os.environ.get("RECOMMENDER_COOCCURRENCE_MIN_SUPPORT", "3"))
+# Hard cap on partners kept per item (the strongest ones by co-occurrence count).
+COOCCURRENCE_MAX_PAIRS_PER_ITEM = int(os.environ.get("RECOMMENDER_COOCCURRENCE_MAX_PAIRS", "100"))
+ADD_ON_METRICS = ("lift", "confidence", "count")
+
+
+def basket_pair_counts(baskets: Iterable[Sequence[Any]]) -> Counter:
+    """
+    Counts, over a batch of orders, how many orders contain each item pair.
+    Keys are (a, b) with a <= b by str(); (a, a) counts the orders containing a
+    (its support). Quantities are ignored: three cokes in one order count once.
+    """
+    counts = Counter()
+    for basket in baskets:
+        items = sorted(set(basket), key=str)
+        for item_id in items:
+            counts[(item_id, item_id)] += 1
+        counts.update(combinations(items, 2))
+    return counts
+
+
+class CooccurrenceModel:
+    """
+    Read-only market-basket statistics of one restaurant: a symmetric sparse item x item
+    matrix of "orders containing both" counts, with item support on the diagonal.
+    top_add_ons() scores every candidate for a whole cart with one sparse row sum,
+    so a five-item cart costs the same single operation as a one-item cart.
+    """
+
+    def __init__(self, pair_counts: Iterable[Tuple[Any, Any, int]], n_orders: int):
+        pair_counts = list(pair_counts)
+        self.item_ids: List[Any] = sorted({a for a, _, _ in pair_counts} | {b for _, b, _ in pair_counts}, key=str)
+        self.position: Dict[Any, int] = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        self.n_orders = max(n_orders, 1)
+
+        size = len(self.item_ids)
+        self.support = np.zeros(size, dtype=np.float32)
+        rows, columns, values = [], [], []
+        for a, b, count in pair_counts:
+            i, j = self.position[a], self.position[b]
+            if i == j:
+                self.support[i] = count
+                continue
+            rows += [i, j] # Stored once per unordered pair, mirrored here
+            columns += [j, i]
+            values += [count, count]
+        self.matrix = sparse.csr_matrix((np.asarray(values, dtype=np.float32), (rows, columns)), shape=(size, size))
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def scores(self, cart_item_ids: Sequence[Any], metric: str = "lift") -> np.ndarray:
+        """
+        Add-on score of every item for the cart, summed over the cart's items:
+        count      - orders containing both
+        confidence - P(candidate | cart item) = count / support(cart item)
+        lift       - confidence / P(candidate); > 1 means bought together more than chance
+        """
+        if metric not in ADD_ON_METRICS:
+            raise ValueError(f"metric must be one of {ADD_ON_METRICS}.")
+        positions = np.array([self.position[i] for i in set(cart_item_ids) if i in self.position], dtype=np.int64)
+        if positions.size == 0 or not self.item_ids:
+            return np.zeros(len(self.item_ids), dtype=np.float32)
+        if metric == "count":
+            weights = np.ones(positions.size, dtype=np.float32)
+        else:
+            weights = 1.0 / np.maximum(self.support[positions], 1.0)
+        combined = self.matrix[positions].T @ weights # Weighted sum of the cart items' rows
+        if metric == "lift":
+            combined = combined * self.n_orders / np.maximum(self.support, 1.0)
+        return combined
+
+    def top_add_ons(self, cart_item_ids: Sequence[Any], k: int = 3, metric: str = "lift",
+                    exclude=()) -> List[Tuple[Any, float]]:
+        """[(item_id, score), ...] best first, never the cart items or ids in exclude."""
+        return self.top_add_ons_batch([cart_item_ids], k, metric, exclude)[0]
+
+    def top_add_ons_batch(self, carts: Sequence[Sequence[Any]], k: int = 3, metric: str = "lift",
+                          exclude=()) -> List[List[Tuple[Any, float]]]:
+        """
+        top_add_ons() for many carts with one sparse (carts x items) @ (items x items)
+        product; per cart only the items that co-occur with it are ranked.
+        Ties go to the item with the smaller id.
+        """
+        if metric not in ADD_ON_METRICS:
+            raise ValueError(f"metric must be one of {ADD_ON_METRICS}.")
+        if k <= 0 or not self.item_ids:
+            return [[] for _ in carts]
+        rows, columns, cart_positions = [], [], []
+        for row, cart in enumerate(carts):
+            positions = sorted({self.position[i] for i in cart if i in self.position})
+            rows += [row] * len(positions)
+            columns += positions
+            cart_positions.append(positions)
+        columns = np.asarray(columns, dtype=np.int64)
+        if metric == "count":
+            weights = np.ones(columns.size, dtype=np.float32)
+        else:
+            weights = 1.0 / np.maximum(self.support[columns], 1.0)
+        carts_matrix = sparse.csr_matrix((weights, (rows, columns)), shape=(len(carts), len(self.item_ids)))
+        combined = (carts_matrix @ self.matrix).tocsr() # Weighted sum of each cart's item rows
+        if metric == "lift":
+            combined = combined.multiply(self.n_orders / np.maximum(self.support, 1.0)[None, :]).tocsr()
+
+        excluded = {self.position[item_id] for item_id in exclude if item_id in self.position}
+        results = []
+        for row, positions in enumerate(cart_positions):
+            start, end = combined.indptr[row], combined.indptr[row + 1]
+            indices, values = combined.indices[start:end], combined.data[start:end]
+            skip = excluded.union(positions)
+            keep = (values > 0) & np.fromiter((i not in skip for i in indices), dtype=bool, count=indices.size)
+            indices, values = indices[keep], values[keep]
+            order = np.lexsort((indices, -values))[:k]
+            results.append([(self.item_ids[indices[i]], float(values[i])) for i in order])
+        return results
+
+
+def prune_pairs(pair_counts: Dict[Tuple[Any, Any], int], max_pairs_per_item: int = COOCCURRENCE_MAX_PAIRS_PER_ITEM) -> set:
+    """
+    Returns the off-diagonal pairs to drop so no item keeps more than max_pairs_per_item
+    partners: a pair survives if it is among the strongest of either of its items.
+    """
+    partners: Dict[Any, List[Tuple[int, Tuple[Any, Any]]]] = {}
+    for pair, count in pair_counts.items():
+        a, b = pair
+        if a != b:
+            partners.setdefault(a, []).append((count, pair))
+            partners.setdefault(b, []).append((count, pair))
+    keep = set()
+    for entries in partners.values():
+        entries.sort(key=lambda entry: -entry[0])
+        keep.update(pair for _, pair in entries[:max_pairs_per_item])
+    return {pair for pair in pair_counts if pair[0] != pair[1] and pair not in keep}
+
+
+# Served models per restaurant, keyed by the build state version of the last update job.
+cooccurrence_registry = VersionedRegistry()
@@ -0,0 +1,146 @@
+# backend/recommendations/dayparts.py
+import heapq
+import math
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Clock dayparts as (name, start minute, end minute) of the local day; the last one wraps
+# past midnight. Every minute belongs to exactly one daypart.
+DAYPARTS: Tuple[Tuple[str, int, int], ...] = (
+    ("breakfast", 5 * 60, 11 * 60),
+    ("lunch", 11 * 60, 15 * 60),
+    ("afternoon", 15 * 60, 17 * 60),
+    ("dinner", 17 * 60, 22 * 60),
+    ("late_night", 22 * 60, 5 * 60),
+)
+DAYPART_NAMES = tuple(name for name, _, _ in DAYPARTS)
+# Items kept in a served slate, and items scored per daypart (the rest are forgotten,
+# lowest score first, so the stored counters stay bounded).
+DAYPART_SLATE_SIZE = int(os.environ.get("RECOMMENDER_DAYPART_SLATE_SIZE", "20"))
+DAYPART_MAX_ITEMS = int(os.environ.get("RECOMMENDER_DAYPART_MAX_ITEMS", "200"))
+
+MINUTES_PER_DAY = 24 * 60
+SLOT_MINUTES = 15 # Resolution of the schedule lookup table (7 * 96 slots)
+SLOTS_PER_DAY = MINUTES_PER_DAY // SLOT_MINUTES
+
+
+def _in_range(minute: int, start: int, end: int) -> bool:
+    return start <= minute < end if start < end else minute >= start or minute < end
+
+
+def daypart_of_minute(minute: int, dayparts: Sequence[Tuple[str, int, int]] = DAYPARTS) -> str:
+    """Clock daypart of a minute of the local day (0..1439)."""
+    for name, start, end in dayparts:
+        if _in_range(minute % MINUTES_PER_DAY, start, end):
+            return name
+    raise ValueError(f"Dayparts do not cover minute {minute}.")
+
+
+class DaypartSchedule:
+    """
+    Which slate to serve at any local (weekday, minute) for one restaurant, from its
+    weekly opening windows (OperatingHoursRule rows as (weekday 0=Monday, open minute,
+    close minute), a close <= open running past midnight).
+
+    While the restaurant is open, or closed in the middle of a daypart it is open in
+    that day, this is the clock daypart. When it is closed, it is the daypart of its
+    next opening, so browsing before breakfast opens shows the breakfast slate. A
+    restaurant without any windows is treated as always open. Everything is
+    precomputed into a 7 x 96 quarter-hour table, so lookups are O(1).
+    """
+
+    def __init__(self, windows: Iterable[Tuple[int, int, int]] = (),
+                 dayparts: Sequence[Tuple[str, int, int]] = DAYPARTS):
+        self.dayparts = tuple(dayparts)
+        week_slots = 7 * SLOTS_PER_DAY
+        open_slots = [False] * week_slots
+        windows = list(windows)
+        for weekday, open_minute, close_minute in windows:
+            length = (close_minute - open_minute) % MINUTES_PER_DAY or MINUTES_PER_DAY
+            first = weekday * SLOTS_PER_DAY + open_minute // SLOT_MINUTES
+            for offset in range(-(-length // SLOT_MINUTES)): # Partially open slots count as open
+                open_slots[(first + offset) % week_slots] = True
+        if not windows:
+            open_slots = [True] * week_slots
+
+        clock = [daypart_of_minute((slot % SLOTS_PER_DAY) * SLOT_MINUTES, self.dayparts) for slot in range(week_slots)]
+        # (service day, daypart) pairs with at least one open slot: a mid-daypart break keeps the
+        # daypart. Service days start with the first daypart, so 01:00 belongs to the night before.
+        day_start = self.dayparts[0][1] // SLOT_MINUTES
+        service_part = [((slot - day_start) // SLOTS_PER_DAY % 7, clock[slot]) for slot in range(week_slots)]
+        open_dayparts = {service_part[slot] for slot in range(week_slots) if open_slots[slot]}
+        self.active_dayparts = tuple(name for name, _, _ in self.dayparts if any(part == name for _, part in open_dayparts))
+
+        self._table: List[Optional[str]] = [None] * week_slots
+        if any(open_slots):
+            # Walk the week backwards twice so closed slots inherit the next opening's daypart
+            upcoming = None
+            for slot in reversed(range(2 * week_slots)):
+                slot %= week_slots
+                if open_slots[slot]:
+                    upcoming = clock[slot]
+                self._table[slot] = clock[slot] if service_part[slot] in open_dayparts else upcoming
+
+    def encode(self) -> str:
+        """The lookup table as one character per slot (daypart index, '-' if never open), for storage."""
+        codes = {name: str(i) for i, (name, _, _) in enumerate(self.dayparts)}
+        return ''.join(codes[name] if name else '-' for name in self._table)
+
+    @classmethod
+    def decode(cls, encoded: str, dayparts: Sequence[Tuple[str, int, int]] = DAYPARTS) -> "DaypartSchedule":
+        """Inverse of encode(); a schedule stored with different dayparts must be rebuilt instead."""
+        schedule = cls.__new__(cls)
+        schedule.dayparts = tuple(dayparts)
+        schedule._table = [None if code == '-' else schedule.dayparts[int(code)][0] for code in encoded]
+        schedule.active_dayparts = tuple(name for name, _, _ in schedule.dayparts if name in schedule._table)
+        return schedule
+
+    def daypart_at(self, weekday: int, minute: int) -> Optional[str]:
+        """Daypart slate to serve at local weekday (0=Monday) and minute of the day; None if never open."""
+        return self._table[weekday * SLOTS_PER_DAY + (minute % MINUTES_PER_DAY) // SLOT_MINUTES]
+
+
+class DaypartScores:
+    """
+    Forward-decayed order counts per (daypart, item) of one restaurant (log scores of
+    recommendations.popularity, so stored values rank like decayed ones), with
+    the ranked slate of each daypart. Orders are added incrementally; only the dayparts
+    an update touched need their slate recomputed.
+    """
+
+    def __init__(self, scores: Optional[Dict[str, Dict[Any, float]]] = None, max_items: int = DAYPART_MAX_ITEMS):
+        self.scores: Dict[str, Dict[Any, float]] = {daypart: dict(items) for daypart, items in (scores or {}).items()}
+        self.max_items = max_items
+
+    def add_order(self, daypart: str, item_quantities: Iterable[Tuple[Any, int]], log_weight: float) -> None:
+        """Counts one order's (item_id, quantity) pairs in the daypart, at a unit's forward-decay log weight."""
+        from .popularity import POPULARITY_EMPTY_LOG_SCORE, log2_add
+
+        items = self.scores.setdefault(daypart, {})
+        for item_id, quantity in item_quantities:
+            if quantity > 0:
+                items[item_id] = log2_add(items.get(item_id, POPULARITY_EMPTY_LOG_SCORE), log_weight + math.log2(quantity))
+        if len(items) > self.max_items:
+            for item_id in heapq.nsmallest(len(items) - self.max_items, items, key=items.get):
+                del items[item_id]
+
+    def slate(self, daypart: str, size: int = DAYPART_SLATE_SIZE) -> List[Any]:
+        """The daypart's item ids, highest score first (ties: first counted)."""
+        items = self.scores.get(daypart, {})
+        return heapq.nlargest(size, items, key=items.get)
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """JSON-serialisable form; item ids are stored as strings."""
+        return {daypart: {str(item_id): score for item_id, score in items.items()} for daypart, items in self.scores.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, float]], parse_id=str, **kwargs) -> "DaypartScores":
+        return cls({daypart: {parse_id(item_id): score for item_id, score in items.items()}
+                    for daypart, items in (data or {}).items()}, **kwargs)
+
+
+def encoded_daypart_at(encoded: str, weekday: int, minute: int,
+                       dayparts: Sequence[Tuple[str, int, int]] = DAYPARTS) -> Optional[str]:
+    """DaypartSchedule.daypart_at() read straight from its encode() string, without decoding it."""
+    code = encoded[weekday * SLOTS_PER_DAY + (minute % MINUTES_PER_DAY) // SLOT_MINUTES]
+    return None if code == '-' else dayparts[int(code)][0]
@@ -0,0 +1,160 @@
+# backend/recommendations/evaluation.py
+import statistics
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Name of the pseudo-strategy that replays what was actually shown, as the baseline.
+LOGGED_STRATEGY = "logged"
+
+
+@dataclass
+class ReplayEvent:
+    """
+    One logged recommendation request and what the user did with it, as replayed by
+    evaluate(). shown_item_ids is the list that was displayed; clicked / added hold the
+    items of CLICK / ADD_TO_CART interactions (which need not be among the shown ones).
+    """
+    log_id: Any
+    restaurant_id: Any
+    trigger_type: str
+    timestamp: Any = None
+    user_id: Any = None
+    trigger_item_id: Any = None
+    context_item_ids: List[Any] = field(default_factory=list) # Cart items for CART_VIEW
+    shown_item_ids: List[Any] = field(default_factory=list)
+    clicked_item_ids: set = field(default_factory=set)
+    added_item_ids: set = field(default_factory=set)
+
+
+class StrategyStats:
+    """
+    Offline metrics of one strategy over replayed events, for the top k recommendations:
+    click / add-to-cart hit rates (share of events with a click / add whose item the
+    strategy recommended: the CTR and add-to-cart proxies), precision@k against the
+    clicked-or-added items, coverage (events with any recommendation) and per-call latency.
+    """
+
+    def __init__(self, name: str, k: int):
+        self.name, self.k = name, k
+        self.events = self.covered = self.errors = 0
+        self.click_events = self.click_hits = 0
+        self.add_events = self.add_hits = 0
+        self.relevant_recommended = self.recommended = 0
+        self.latencies_ms: List[float] = []
+        self.by_trigger: Dict[str, List[int]] = {} # trigger_type -> [events, click hits, add hits]
+        self.peak_memory_kb: Optional[float] = None
+
+    def record(self, event: ReplayEvent, recommended: List[Any], seconds: float) -> None:
+        top = list(dict.fromkeys(recommended))[:self.k]
+        top_set = set(top)
+        self.events += 1
+        self.covered += bool(top)
+        self.latencies_ms.append(seconds * 1000)
+        trigger = self.by_trigger.setdefault(event.trigger_type, [0, 0, 0])
+        trigger[0] += 1
+        if event.clicked_item_ids:
+            self.click_events += 1
+            hit = bool(top_set & event.clicked_item_ids)
+            self.click_hits += hit
+            trigger[1] += hit
+        if event.added_item_ids:
+            self.add_events += 1
+            hit = bool(top_set & event.added_item_ids)
+            self.add_hits += hit
+            trigger[2] += hit
+        self.recommended += len(top)
+        self.relevant_recommended += len(top_set & (event.clicked_item_ids | event.added_item_ids))
+
+    def report(self) -> dict:
+        latency = {}
+        if len(self.latencies_ms) >= 2:
+            cuts = statistics.quantiles(self.latencies_ms, n=100, method="inclusive")
+            latency = {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "mean": statistics.fmean(self.latencies_ms)}
+        elif self.latencies_ms:
+            latency = {"p50": self.latencies_ms[0], "p95": self.latencies_ms[0], "p99": self.latencies_ms[0],
+                       "mean": self.latencies_ms[0]}
+        return {
+            "events": self.events,
+            "errors": self.errors,
+            "coverage": self.covered / self.events if self.events else None,
+            "ctr_proxy": self.click_hits / self.click_events if self.click_events else None,
+            "add_to_cart_proxy": self.add_hits / self.add_events if self.add_events else None,
+            f"precision_at_{self.k}": self.relevant_recommended / self.recommended if self.recommended else None,
+            "latency_ms": latency,
+            "peak_memory_kb": self.peak_memory_kb,
+            "by_trigger": {
+                trigger: {
+                    "events": events,
+                    "click_hits": click_hits,
+                    "add_hits": add_hits,
+                }
+                for trigger, (events, click_hits, add_hits) in sorted(self.by_trigger.items())
+            },
+        }
+
+
+def evaluate(events: Iterable[ReplayEvent], strategies: Dict[str, Callable[[ReplayEvent], List[Any]]],
+             k: int = 3, memory_sample: int = 200, include_logged: bool = True,
+             prepare: Optional[Callable[[ReplayEvent], Any]] = None,
+             cold_strategy: Optional[Callable[[str], Tuple[Callable, Optional[Callable]]]] = None) -> Dict[str, dict]:
+    """
+    Replays events (any iterable, consumed once, so chunked database streams work)
+    through every strategy: strategy(event) -> recommended item ids, best first.
+    prepare(event), if given, loads inputs the strategies share (menus, learned models)
+    before the event's timed calls, so whichever strategy runs first does not pay for them.
+    Latency is measured per call; peak memory per strategy is traced in a separate,
+    untimed pass over the first memory_sample events (tracemalloc slows allocation).
+    With cold_strategy(name) -> (strategy, prepare or None), that pass runs a fresh copy
+    of each strategy and traces its prepare too, so the peak includes building its inputs.
+    A strategy raising on an event counts as an error with no recommendations.
+    Returns {strategy name: StrategyStats.report()}, plus the "logged" baseline.
+    """
+    stats = {name: StrategyStats(name, k) for name in strategies}
+    if include_logged:
+        stats[LOGGED_STRATEGY] = StrategyStats(LOGGED_STRATEGY, k)
+    sample: List[ReplayEvent] = []
+
+    for event in events:
+        if len(sample) < memory_sample:
+            sample.append(event)
+        if prepare is not None:
+            try:
+                prepare(event)
+            except Exception:
+                pass # The strategies hit the same failure and count it as an error
+        for name, strategy in strategies.items():
+            started = time.perf_counter()
+            try:
+                recommended = strategy(event)
+            except Exception:
+                stats[name].errors += 1
+                recommended = []
+            stats[name].record(event, recommended, time.perf_counter() - started)
+        if include_logged:
+            stats[LOGGED_STRATEGY].record(event, event.shown_item_ids, 0.0)
+
+    for name, strategy in strategies.items():
+        if cold_strategy is not None:
+            stats[name].peak_memory_kb = _traced_peak_kb(*cold_strategy(name), sample)
+        else:
+            stats[name].peak_memory_kb = _traced_peak_kb(strategy, None, sample)
+    return {name: strategy_stats.report() for name, strategy_stats in stats.items()}
+
+
+def _traced_peak_kb(strategy, prepare, events) -> Optional[float]:
+    if not events:
+        return None
+    tracemalloc.start()
+    try:
+        for event in events:
+            try:
+                if prepare is not None:
+                    prepare(event)
+                strategy(event)
+            except Exception:
+                pass
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
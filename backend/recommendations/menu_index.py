@@ -0,0 +1,106 @@
+# backend/recommendations/menu_index.py
+import heapq
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+
+from .cache import VersionedRegistry
+from .snapshot import MenuSnapshot
+
+
+class MenuIndex:
+    """
+    Prebuilt lookup structure over one restaurant's menu_items_dict.
+
+    Items are numbered by their position in the dict, and category -> positions and
+    tag -> positions lists are kept in that order, so the rule functions can visit only
+    the items sharing a category or tag with the target while still returning the same
+    suggestions, in the same order, as a full scan of the dict would.
+    Availability is held as one flag per position; set_availability() flips a flag in
+    place (e.g. a POS stock update) without rebuilding the index.
+    """
+
+    def __init__(self, menu_items_dict: Dict[Any, Dict[str, Any]]):
+        self.items = menu_items_dict
+        if isinstance(menu_items_dict, MenuSnapshot):
+            self._init_from_snapshot(menu_items_dict)
+            return
+        self.item_ids: List[Any] = list(menu_items_dict)
+        self.position: Dict[Any, int] = {item_id: i for i, item_id in enumerate(self.item_ids)}
+        self.available: List[bool] = [bool(details.get('is_available', False)) for details in menu_items_dict.values()]
+        self.by_category: Dict[Any, List[int]] = {}
+        self.by_tag: Dict[Any, List[int]] = {}
+        for i, details in enumerate(menu_items_dict.values()):
+            self.by_category.setdefault(details.get('category'), []).append(i)
+            for tag in set(details.get('tags') or ()):
+                self.by_tag.setdefault(tag, []).append(i)
+
+    def _init_from_snapshot(self, snapshot: MenuSnapshot) -> None:
+        """Same structure from the snapshot's columns, without materialising item dicts."""
+        self.item_ids = snapshot.item_ids
+        self.position = snapshot.position
+        self.available = snapshot.available.tolist()
+        self.by_category = {}
+        for code, positions in enumerate(_group_rows(snapshot.category_codes, len(snapshot.categories))):
+            self.by_category[snapshot.categories[code]] = positions
+        uncategorised = [i for i, code in enumerate(snapshot.category_codes.tolist()) if code < 0]
+        if uncategorised:
+            self.by_category[None] = uncategorised
+        self.by_tag = {tag: snapshot.rows_with_tag(code).tolist() for code, tag in enumerate(snapshot.tags)}
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def set_availability(self, item_id, is_available: bool) -> None:
+        position = self.position.get(item_id)
+        if position is not None:
+            self.available[position] = is_available
+            if isinstance(self.items, MenuSnapshot):
+                self.items.set_availability(item_id, is_available)
+            else:
+                self.items[item_id]['is_available'] = is_available
+
+    def available_in_category(self, category, exclude=()) -> Iterator[Any]:
+        """Available item ids of a category in menu order, skipping ids in exclude."""
+        for i in self.by_category.get(category, ()):
+            if self.available[i] and self.item_ids[i] not in exclude:
+                yield self.item_ids[i]
+
+    def available_with_any_tag(self, tags, exclude=()) -> Iterator[Any]:
+        """
+        Available item ids sharing at least one of tags, in menu order, each once.
+        Merges the (already ordered) per-tag lists lazily, so a caller that stops after
+        a few suggestions never touches the rest of the candidates.
+        """
+        previous = None
+        for i in heapq.merge(*(self.by_tag.get(tag, ()) for tag in set(tags))):
+            if i == previous:
+                continue
+            previous = i
+            if self.available[i] and self.item_ids[i] not in exclude:
+                yield self.item_ids[i]
+
+
+def _group_rows(codes, n_codes: int) -> List[List[int]]:
+    """Rows of each code 0..n_codes-1, ascending (negative codes are skipped)."""
+    codes = np.asarray(codes)
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes[codes >= 0], minlength=n_codes)
+    start = int(np.count_nonzero(codes < 0)) # Negative codes sort first
+    groups = []
+    for count in counts.tolist():
+        groups.append(order[start:start + count].tolist())
+        start += count
+    return groups
+
+
+# Prebuilt indexes per restaurant menu version (see menu.versioning on the Django side).
+menu_index_registry = VersionedRegistry()
+
+
+def get_menu_index(restaurant_id, menu_version, load_menu_items) -> MenuIndex:
+    """
+    Returns the MenuIndex of a restaurant's menu version; load_menu_items() -> menu_items_dict
+    is only called (and the index only built) on a miss.
+    """
+    return menu_index_registry.get_or_build(restaurant_id, menu_version, lambda: MenuIndex(load_menu_items()))
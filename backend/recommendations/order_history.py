@@ -0,0 +1,99 @@
+# backend/recommendations/order_history.py
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Length of the recent-items ring buffer ("recent" strategy).
+HISTORY_RECENT_ITEMS = int(os.environ.get("RECOMMENDER_HISTORY_RECENT_ITEMS", "50"))
+# Distinct items counted per user and restaurant; beyond it the least ordered (then
+# longest unordered) item is forgotten, so the stored aggregate stays small.
+HISTORY_MAX_ITEMS = int(os.environ.get("RECOMMENDER_HISTORY_MAX_ITEMS", "500"))
+
+
+class OrderHistoryAggregate:
+    """
+    Compact order history of one user at one restaurant: per-item order counts, the
+    last time each item was ordered (epoch seconds) and a ring buffer of the most
+    recently ordered distinct items, newest first. Maintained one order at a time, so
+    suggest_from_past_orders never needs the full history. Orders are only ever added:
+    the aggregate cannot tell which order put an item in the recent list or set its
+    last-ordered time, so a cancelled order is dropped by rebuilding from the remaining
+    orders (from_orders, see ai_engine.order_history.forget_order_history).
+    Ties between equally frequent items go to the item ordered first, as with
+    Counter.most_common() over the flattened history.
+    """
+
+    def __init__(self, item_counts: Optional[Dict[Any, int]] = None, last_ordered: Optional[Dict[Any, float]] = None,
+                 recent: Optional[List[Any]] = None, order_count: int = 0,
+                 max_recent: int = HISTORY_RECENT_ITEMS, max_items: int = HISTORY_MAX_ITEMS):
+        self.item_counts: Dict[Any, int] = dict(item_counts or {})
+        self.last_ordered: Dict[Any, float] = dict(last_ordered or {})
+        self.recent: List[Any] = list(recent or [])[:max_recent]
+        self.order_count = order_count
+        self.max_recent = max_recent
+        self.max_items = max_items
+
+    def __len__(self):
+        return len(self.item_counts)
+
+    @classmethod
+    def from_orders(cls, orders: Iterable[Iterable[Any]], ordered_at: Optional[Iterable[float]] = None,
+                    **kwargs) -> "OrderHistoryAggregate":
+        """
+        Aggregate of a chronological list of orders (lists of item ids), oldest first;
+        ordered_at optionally gives each order's time (epoch seconds).
+        """
+        aggregate = cls(**kwargs)
+        times = iter(ordered_at) if ordered_at is not None else None
+        for order in orders:
+            aggregate.add_order(order, next(times) if times is not None else None)
+        return aggregate
+
+    def add_order(self, item_ids: Iterable[Any], ordered_at: Optional[float] = None) -> None:
+        """Counts a placed order; an item listed twice in it counts twice, like the flattened history."""
+        ordered_at = time.time() if ordered_at is None else ordered_at
+        item_ids = list(item_ids)
+        for item_id in item_ids:
+            self.item_counts[item_id] = self.item_counts.get(item_id, 0) + 1
+            self.last_ordered[item_id] = ordered_at
+        # The order's items go to the front in order, older entries keep theirs behind them
+        in_order = list(dict.fromkeys(item_ids))
+        seen = set(in_order)
+        self.recent = (in_order + [item_id for item_id in self.recent if item_id not in seen])[:self.max_recent]
+        self.order_count += 1
+        while len(self.item_counts) > self.max_items:
+            self._forget(min(self.item_counts, key=lambda i: (self.item_counts[i], self.last_ordered.get(i, 0.0))))
+
+    def _forget(self, item_id) -> None:
+        self.item_counts.pop(item_id, None)
+        self.last_ordered.pop(item_id, None)
+        if item_id in self.recent:
+            self.recent.remove(item_id)
+
+    def frequent_item_ids(self) -> List[Any]:
+        """Item ids, most ordered first."""
+        return sorted(self.item_counts, key=lambda item_id: -self.item_counts[item_id]) # Stable: first ordered wins ties
+
+    def recent_item_ids(self) -> List[Any]:
+        """Distinct item ids of the latest orders, newest first (at most max_recent)."""
+        return list(self.recent)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serialisable form; item ids are stored as strings."""
+        return {
+            "item_counts": {str(item_id): count for item_id, count in self.item_counts.items()},
+            "last_ordered": {str(item_id): at for item_id, at in self.last_ordered.items()},
+            "recent": [str(item_id) for item_id in self.recent],
+            "order_count": self.order_count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], parse_id: Callable[[str], Any] = str, **kwargs) -> "OrderHistoryAggregate":
+        """Inverse of to_dict(); parse_id turns stored ids back into menu_items_dict keys (e.g. uuid.UUID)."""
+        return cls(
+            item_counts={parse_id(item_id): count for item_id, count in data.get("item_counts", {}).items()},
+            last_ordered={parse_id(item_id): at for item_id, at in data.get("last_ordered", {}).items()},
+            recent=[parse_id(item_id) for item_id in data.get("recent", [])],
+            order_count=data.get("order_count", 0),
+            **kwargs
+        )
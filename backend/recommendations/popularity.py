@@ -0,0 +1,57 @@
+# backend/recommendations/popularity.py
+import math
+import os
+from datetime import datetime, timezone
+
+
+def _half_life_hours(value: str) -> float:
+    hours = float(value)
+    if not math.isfinite(hours) or hours <= 0:
+        raise ValueError(f"RECOMMENDER_POPULARITY_HALF_LIFE_HOURS must be a positive number of hours, got {value!r}.")
+    return hours
+
+
+# An order counts half as much after this many hours.
+POPULARITY_HALF_LIFE_HOURS = _half_life_hours(os.environ.get("RECOMMENDER_POPULARITY_HALF_LIFE_HOURS", "168"))
+# Fixed reference time of the forward-decay scores. A unit ordered at t weighs
+# 2 ** ((t - landmark) / half_life), so newer orders weigh more and stored scores never
+# need to be decayed in place: ranking items by the stored value is the same as ranking
+# them by their decayed popularity at any moment. The weights themselves overflow
+# float64 after ~1000 half-lives (weeks at a short half-life), so scores are stored as
+# their base-2 logarithm: the exponent grows linearly with time instead.
+POPULARITY_DECAY_LANDMARK = datetime(2025, 1, 1, tzinfo=timezone.utc)
+# Log score of no orders at all: finite, so every database column stores it, and far
+# below any real score (2 ** it is 0.0).
+POPULARITY_EMPTY_LOG_SCORE = -1e300
+
+
+def _half_lives_since_landmark(moment: datetime) -> float:
+    return (moment - POPULARITY_DECAY_LANDMARK).total_seconds() / (POPULARITY_HALF_LIFE_HOURS * 3600)
+
+
+def forward_decay_log_weight(ordered_at: datetime, quantity: float = 1) -> float:
+    """log2 of the forward-decay weight of quantity units ordered at ordered_at."""
+    if quantity <= 0:
+        return POPULARITY_EMPTY_LOG_SCORE
+    return _half_lives_since_landmark(ordered_at) + math.log2(quantity)
+
+
+def log2_add(log_a: float, log_b: float) -> float:
+    """log2(2 ** log_a + 2 ** log_b), without leaving log space: adds a weight to a log score."""
+    high, low = max(log_a, log_b), min(log_a, log_b)
+    return high + math.log2(1.0 + math.pow(2.0, low - high))
+
+
+def log2_subtract(log_a: float, log_b: float) -> float:
+    """log2(2 ** log_a - 2 ** log_b): removes a weight; POPULARITY_EMPTY_LOG_SCORE if nothing is left."""
+    if log_b >= log_a:
+        return POPULARITY_EMPTY_LOG_SCORE
+    return log_a + math.log2(-math.expm1((log_b - log_a) * math.log(2.0)))
+
+
+def decayed_popularity(log_score: float, now: datetime) -> float:
+    """
+    Converts a stored log score into "orders, exponentially decayed to now": an item
+    ordered 3 times one half-life ago and never since reports 1.5.
+    """
+    return math.pow(2.0, log_score - _half_lives_since_landmark(now))
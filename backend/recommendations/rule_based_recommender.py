@@ -1,12 +1,26 @@
 # backend/recommendations/rule_based_recommender.py
 
-from typing import List, Dict, Any, Optional, Set
+import heapq
+from typing import List, Dict, Any, Optional, Set, Union
+
+from .menu_index import MenuIndex
+from .similarity import ItemSimilarity, SIMILARITY_METRICS
+from .cooccurrence import CooccurrenceModel
+from .order_history import OrderHistoryAggregate
+from .snapshot import MenuSnapshot
+
+# Targets scored per similarity matrix product in the batch variants; bounds the dense
+# (targets x menu items) score block to SIMILARITY_BATCH_SIZE rows.
+SIMILARITY_BATCH_SIZE = 256
 
 # --- Rule 1: Suggest Alternatives for Out-of-Stock Items ---
 def suggest_alternatives_for_out_of_stock(
     out_of_stock_item_id: Any,
     menu_items_dict: Dict[Any, Dict[str, Any]],
-    num_suggestions: int = 3
+    num_suggestions: int = 3,
+    menu_index: Optional[MenuIndex] = None,
+    mode: str = "rules",
+    similarity: Optional[ItemSimilarity] = None
 ) -> List[Dict[str, Any]]:
     """
     Suggests alternative items if a selected item is out of stock.
@@ -18,38 +32,42 @@ def suggest_alternatives_for_out_of_stock(
                          item_details should include 'id', 'name', 'category', 'tags' (list),
                          'ingredients' (list of ingredient_ids), 'is_available' (bool).
         num_suggestions: Maximum number of alternatives to suggest.
+        menu_index: Prebuilt MenuIndex of menu_items_dict (see get_menu_index). Without it
+                    one is built for this call, which costs a full pass over the menu.
+        mode: "rules" (category first, then any shared tag) or a SIMILARITY_METRICS name
+              ("jaccard", "cosine") to rank available items by category/tag/ingredient overlap.
+        similarity: Prebuilt ItemSimilarity for the similarity modes (see get_item_similarity).
 
     Returns:
         A list of suggested item detail dictionaries.
     """
-    suggestions = []
     out_of_stock_item = menu_items_dict.get(out_of_stock_item_id)
 
     if not out_of_stock_item or out_of_stock_item.get('is_available', True):
         return [] # Item is available or not found, no need for alternatives
 
+    if mode in SIMILARITY_METRICS:
+        return _rank_by_similarity(out_of_stock_item_id, menu_items_dict, num_suggestions, mode, similarity)
+
+    menu_index = menu_index or MenuIndex(menu_items_dict)
+    suggested_ids = [] # Insertion order = suggestion order
+    excluded = {out_of_stock_item_id}
+
     # 1. Prioritize same category
-    for item_id, item_details in menu_items_dict.items():
-        if len(suggestions) >= num_suggestions:
+    for item_id in menu_index.available_in_category(out_of_stock_item.get('category'), exclude=excluded):
+        if len(suggested_ids) >= num_suggestions:
             break
-        if item_id != out_of_stock_item_id and \
-           item_details.get('category') == out_of_stock_item.get('category') and \
-           item_details.get('is_available', False):
-            suggestions.append(item_details)
+        suggested_ids.append(item_id)
+        excluded.add(item_id)
 
     # 2. If not enough, look for items with overlapping tags (if tags exist)
-    if len(suggestions) < num_suggestions and 'tags' in out_of_stock_item:
-        oos_tags = set(out_of_stock_item.get('tags', []))
-        if oos_tags:
-            for item_id, item_details in menu_items_dict.items():
-                if len(suggestions) >= num_suggestions:
-                    break
-                if item_id != out_of_stock_item_id and \
-                   item_details.get('is_available', False) and \
-                   item_id not in [s['id'] for s in suggestions]: # Avoid duplicates
-                    item_tags = set(item_details.get('tags', []))
-                    if oos_tags.intersection(item_tags): # Check for any common tag
-                        suggestions.append(item_details)
+    if len(suggested_ids) < num_suggestions and 'tags' in out_of_stock_item:
+        oos_tags = out_of_stock_item.get('tags', [])
+        for item_id in menu_index.available_with_any_tag(oos_tags, exclude=excluded):
+            if len(suggested_ids) >= num_suggestions:
+                break
+            suggested_ids.append(item_id)
+            excluded.add(item_id) # Avoid duplicates
 
     # 3. If still not enough, look for items with overlapping key ingredients (simplistic)
     # This requires more complex ingredient similarity logic for better results.
@@ -58,15 +76,17 @@ def suggest_alternatives_for_out_of_stock(
     #     oos_ingredients = set(out_of_stock_item.get('ingredients', []))
     #     # ... logic to find items with common ingredients ...
 
-    return suggestions[:num_suggestions]
+    return [menu_items_dict[item_id] for item_id in suggested_ids[:num_suggestions]]
 
 
 # --- Rule 2: Suggest Add-ons or Complementary Items ---
 def suggest_add_ons(
     current_cart_item_ids: List[Any],
     menu_items_dict: Dict[Any, Dict[str, Any]],
-    complementary_rules: Dict[Any, List[Any]], # {item_id_A: [complement_id_B, complement_id_C]}
-    num_suggestions: int = 3
+    complementary_rules: Optional[Dict[Any, List[Any]]] = None, # {item_id_A: [complement_id_B, complement_id_C]}
+    num_suggestions: int = 3,
+    cooccurrence: Optional[CooccurrenceModel] = None,
+    metric: str = "lift"
 ) -> List[Dict[str, Any]]:
     """
     Suggests add-ons or complementary items based on what's already in the cart.
@@ -76,6 +96,10 @@ def suggest_add_ons(
         menu_items_dict: Dict of all menu items.
         complementary_rules: Predefined rules, e.g., {'burger_id': ['fries_id', 'coke_id']}.
         num_suggestions: Maximum number of suggestions.
+        cooccurrence: The restaurant's CooccurrenceModel (learned from past orders, see
+                      ai_engine.cooccurrence). Its ranking comes first; complementary_rules,
+                      if any, only fill the remaining slots.
+        metric: Co-occurrence ranking, one of ADD_ON_METRICS ("lift", "confidence", "count").
 
     Returns:
         A list of suggested item detail dictionaries.
@@ -83,20 +107,36 @@ def suggest_add_ons(
     if not current_cart_item_ids:
         return []
 
+    ranked = []
+    if cooccurrence is not None:
+        # Over-fetch a little: some of the best partners may be unavailable right now
+        ranked = cooccurrence.top_add_ons(current_cart_item_ids, k=num_suggestions * 3, metric=metric)
+    return _fill_add_ons(current_cart_item_ids, menu_items_dict, complementary_rules, num_suggestions, ranked)
+
+
+def _fill_add_ons(current_cart_item_ids, menu_items_dict, complementary_rules, num_suggestions, ranked):
+    """Available co-occurrence picks (ranked [(item_id, score)]) first, then complementary_rules."""
+    final_suggestions = []
+    for item_id, _ in ranked:
+        if len(final_suggestions) >= num_suggestions:
+            return final_suggestions
+        if _is_available(menu_items_dict, item_id):
+            final_suggestions.append(menu_items_dict[item_id])
+
     potential_suggestions: Set[Any] = set()
     for cart_item_id in current_cart_item_ids:
-        if cart_item_id in complementary_rules:
+        if cart_item_id in (complementary_rules or {}):
             for suggested_id in complementary_rules[cart_item_id]:
                 potential_suggestions.add(suggested_id)
 
     # Filter out items already in cart and unavailable items
-    final_suggestions = []
+    already_suggested = {s['id'] for s in final_suggestions}
     for item_id in list(potential_suggestions): # Iterate over a copy
-        if item_id not in current_cart_item_ids and \
-           menu_items_dict.get(item_id, {}).get('is_available', False):
+        if len(final_suggestions) >= num_suggestions:
+            break
+        if item_id not in current_cart_item_ids and item_id not in already_suggested and \
+           _is_available(menu_items_dict, item_id):
             final_suggestions.append(menu_items_dict[item_id])
-            if len(final_suggestions) >= num_suggestions:
-                break
                 
     return final_suggestions
 
@@ -114,7 +154,8 @@ def suggest_popular_items(
     Args:
         menu_items_dict: Dict of all menu items.
         popularity_scores: Dict where keys are item_ids and values are their popularity scores
-                           (e.g., number of times ordered in the last week).
+                           (e.g., number of times ordered in the last week, or the decayed
+                           scores of ai_engine.popularity.get_popularity_scores).
         num_suggestions: Maximum number of suggestions.
         category_filter: Optional category name to filter popular items.
 
@@ -124,15 +165,18 @@ def suggest_popular_items(
     if not popularity_scores:
         return []
 
-    # Sort items by popularity score in descending order
-    sorted_popular_ids = sorted(popularity_scores.keys(), key=lambda k: popularity_scores[k], reverse=True)
+    # Heapify is O(n); only as many items as get inspected are popped (O(log n) each),
+    # instead of sorting every scored item when a handful are needed.
+    heap = [(-score, position, item_id) for position, (item_id, score) in enumerate(popularity_scores.items())]
+    heapq.heapify(heap)
 
     suggestions = []
-    for item_id in sorted_popular_ids:
+    while heap:
         if len(suggestions) >= num_suggestions:
             break
-        item_details = menu_items_dict.get(item_id)
-        if item_details and item_details.get('is_available', False):
+        item_id = heapq.heappop(heap)[2]
+        if _is_available(menu_items_dict, item_id):
+            item_details = menu_items_dict[item_id]
             if category_filter and item_details.get('category') != category_filter:
                 continue
             suggestions.append(item_details)
@@ -144,7 +188,10 @@ def suggest_popular_items(
 def suggest_similar_items(
     target_item_id: Any,
     menu_items_dict: Dict[Any, Dict[str, Any]],
-    num_suggestions: int = 3
+    num_suggestions: int = 3,
+    menu_index: Optional[MenuIndex] = None,
+    mode: str = "rules",
+    similarity: Optional[ItemSimilarity] = None
 ) -> List[Dict[str, Any]]:
     """
     Suggests items similar to a target item (e.g., when viewing an item's details).
@@ -154,48 +201,61 @@ def suggest_similar_items(
         target_item_id: The ID of the item for which to find similar items.
         menu_items_dict: Dict of all menu items.
         num_suggestions: Maximum number of suggestions.
+        menu_index: Prebuilt MenuIndex of menu_items_dict (see get_menu_index).
+        mode: "rules" or "jaccard" / "cosine" (see suggest_alternatives_for_out_of_stock).
+        similarity: Prebuilt ItemSimilarity for the similarity modes.
 
     Returns:
         A list of suggested item detail dictionaries.
     """
-    suggestions = []
     target_item = menu_items_dict.get(target_item_id)
 
     if not target_item:
         return []
 
+    if mode in SIMILARITY_METRICS:
+        return _rank_by_similarity(target_item_id, menu_items_dict, num_suggestions, mode, similarity)
+
+    menu_index = menu_index or MenuIndex(menu_items_dict)
+    suggested_ids = []
+    excluded = {target_item_id}
+
     # 1. Same category (excluding self)
-    for item_id, item_details in menu_items_dict.items():
-        if len(suggestions) >= num_suggestions:
+    for item_id in menu_index.available_in_category(target_item.get('category'), exclude=excluded):
+        if len(suggested_ids) >= num_suggestions:
             break
-        if item_id != target_item_id and \
-           item_details.get('category') == target_item.get('category') and \
-           item_details.get('is_available', False):
-            suggestions.append(item_details)
+        suggested_ids.append(item_id)
+        excluded.add(item_id)
 
     # 2. If not enough, items with overlapping tags (excluding self and already suggested)
-    if len(suggestions) < num_suggestions and 'tags' in target_item:
-        target_tags = set(target_item.get('tags', []))
-        if target_tags:
-            current_suggestion_ids = {s['id'] for s in suggestions}
-            for item_id, item_details in menu_items_dict.items():
-                if len(suggestions) >= num_suggestions:
-                    break
-                if item_id != target_item_id and \
-                   item_id not in current_suggestion_ids and \
-                   item_details.get('is_available', False):
-                    item_tags = set(item_details.get('tags', []))
-                    # Prioritize higher overlap if possible, or just any overlap
-                    if target_tags.intersection(item_tags):
-                        suggestions.append(item_details)
-                        current_suggestion_ids.add(item_id) # Add to avoid re-suggesting
-
-    return suggestions[:num_suggestions]
+    if len(suggested_ids) < num_suggestions and 'tags' in target_item:
+        # Prioritize higher overlap if possible, or just any overlap
+        for item_id in menu_index.available_with_any_tag(target_item.get('tags', []), exclude=excluded):
+            if len(suggested_ids) >= num_suggestions:
+                break
+            suggested_ids.append(item_id)
+            excluded.add(item_id) # Add to avoid re-suggesting
+
+    return [menu_items_dict[item_id] for item_id in suggested_ids[:num_suggestions]]
+
+
+def _rank_by_similarity(target_item_id, menu_items_dict, num_suggestions, metric, similarity=None):
+    """Available items ranked by feature overlap with the target (ties in menu order)."""
+    similarity = similarity or ItemSimilarity(menu_items_dict)
+    ranked = similarity.top_k([target_item_id], k=num_suggestions, metric=metric)[0]
+    return [menu_items_dict[item_id] for item_id, _ in ranked]
+
+
+def _is_available(menu_items_dict, item_id) -> bool:
+    """menu_items_dict.get(item_id, {}).get('is_available', False), one flag read on a MenuSnapshot."""
+    if isinstance(menu_items_dict, MenuSnapshot):
+        return menu_items_dict.is_available(item_id)
+    return menu_items_dict.get(item_id, {}).get('is_available', False)
 
 
 # --- Rule 5: Based on User's Past Order History (Simple Reorder or Frequently Ordered) ---
 def suggest_from_past_orders(
-    user_order_history: List[List[Any]], # List of orders, where each order is a list of item_ids
+    user_order_history: Union[List[List[Any]], OrderHistoryAggregate], # Orders (lists of item_ids), or their aggregate
     menu_items_dict: Dict[Any, Dict[str, Any]],
     num_suggestions: int = 5,
     strategy: str = "frequent" # or "recent"
@@ -204,7 +264,9 @@ def suggest_from_past_orders(
     Suggests items based on a user's past order history.
 
     Args:
-        user_order_history: A list of lists, e.g., [[item1_id, item2_id], [item1_id, item3_id]].
+        user_order_history: A list of lists, e.g., [[item1_id, item2_id], [item1_id, item3_id]],
+                            oldest order first, or the user's OrderHistoryAggregate
+                            (read directly, no history is flattened).
         menu_items_dict: Dict of all menu items.
         num_suggestions: Max suggestions.
         strategy: "frequent" (most ordered items) or "recent" (items from most recent orders).
@@ -215,40 +277,138 @@ def suggest_from_past_orders(
     if not user_order_history:
         return []
 
-    candidate_item_ids = []
-    if strategy == "frequent":
-        from collections import Counter
-        all_ordered_items = [item_id for order in user_order_history for item_id in order]
-        item_counts = Counter(all_ordered_items)
-        # Get items sorted by frequency
-        candidate_item_ids = [item_id for item_id, count in item_counts.most_common()]
+    if isinstance(user_order_history, OrderHistoryAggregate):
+        if strategy == "recent":
+            candidate_item_ids = user_order_history.recent_item_ids()
+        else: # "frequent", and the default
+            candidate_item_ids = user_order_history.frequent_item_ids()
     elif strategy == "recent":
         # Get unique items from recent orders, maintaining some order
+        candidate_item_ids = []
         seen_ids = set()
         for order in reversed(user_order_history): # Start from most recent order
             for item_id in order:
                 if item_id not in seen_ids:
                     candidate_item_ids.append(item_id)
                     seen_ids.add(item_id)
-    else: # Default to frequent
-        from collections import Counter
-        all_ordered_items = [item_id for order in user_order_history for item_id in order]
-        item_counts = Counter(all_ordered_items)
-        candidate_item_ids = [item_id for item_id, count in item_counts.most_common()]
-
+    else: # "frequent", and the default
+        candidate_item_ids = OrderHistoryAggregate.from_orders(user_order_history).frequent_item_ids()
 
     suggestions = []
     for item_id in candidate_item_ids:
         if len(suggestions) >= num_suggestions:
             break
-        item_details = menu_items_dict.get(item_id)
-        if item_details and item_details.get('is_available', False):
-            suggestions.append(item_details)
+        if _is_available(menu_items_dict, item_id):
+            suggestions.append(menu_items_dict[item_id])
             
     return suggestions
 
+
+# --- Rule 6: Time-of-Day ("breakfast items in the morning") ---
+def suggest_for_daypart(
+    slate_item_ids: List[Any], # Precomputed daypart slate, best first (see recommendations.dayparts)
+    menu_items_dict: Dict[Any, Dict[str, Any]],
+    num_suggestions: int = 5
+) -> List[Dict[str, Any]]:
+    """
+    Suggests what is usually ordered at this time of day. The slate is ranked offline
+    from order timestamps, so this only skips items that are unavailable right now:
+    no menu scan per request.
+
+    Args:
+        slate_item_ids: Item ids of the current daypart's slate, best first.
+        menu_items_dict: Dict of all menu items.
+        num_suggestions: Max suggestions.
+
+    Returns:
+        A list of suggested item detail dictionaries.
+    """
+    suggestions = []
+    for item_id in slate_item_ids:
+        if len(suggestions) >= num_suggestions:
+            break
+        if _is_available(menu_items_dict, item_id):
+            suggestions.append(menu_items_dict[item_id])
+    return suggestions
+
+# --- Batch variants (kitchen-display upsells, campaigns): many targets, one shared index ---
+def suggest_similar_items_batch(
+    target_item_ids: List[Any],
+    menu_items_dict: Dict[Any, Dict[str, Any]],
+    num_suggestions: int = 3,
+    menu_index: Optional[MenuIndex] = None,
+    mode: str = "rules",
+    similarity: Optional[ItemSimilarity] = None
+) -> List[List[Dict[str, Any]]]:
+    """
+    suggest_similar_items() for every target, results in input order. The MenuIndex
+    (rules) or ItemSimilarity (similarity modes) is built at most once for the batch, and
+    similarity modes score SIMILARITY_BATCH_SIZE targets per sparse matrix product.
+    """
+    if mode in SIMILARITY_METRICS:
+        known = [target_id if target_id in menu_items_dict else None for target_id in target_item_ids]
+        return _rank_by_similarity_batch(known, menu_items_dict, num_suggestions, mode, similarity)
+    menu_index = menu_index or MenuIndex(menu_items_dict)
+    return [
+        suggest_similar_items(target_id, menu_items_dict, num_suggestions, menu_index=menu_index)
+        for target_id in target_item_ids
+    ]
+
+
+def suggest_alternatives_for_out_of_stock_batch(
+    out_of_stock_item_ids: List[Any],
+    menu_items_dict: Dict[Any, Dict[str, Any]],
+    num_suggestions: int = 3,
+    menu_index: Optional[MenuIndex] = None,
+    mode: str = "rules",
+    similarity: Optional[ItemSimilarity] = None
+) -> List[List[Dict[str, Any]]]:
+    """suggest_alternatives_for_out_of_stock() for every item, sharing the index like suggest_similar_items_batch."""
+    if mode in SIMILARITY_METRICS:
+        # Items that are available (or unknown) need no alternatives
+        unavailable = [
+            item_id if not menu_items_dict.get(item_id, {}).get('is_available', True) else None
+            for item_id in out_of_stock_item_ids
+        ]
+        return _rank_by_similarity_batch(unavailable, menu_items_dict, num_suggestions, mode, similarity)
+    menu_index = menu_index or MenuIndex(menu_items_dict)
+    return [
+        suggest_alternatives_for_out_of_stock(item_id, menu_items_dict, num_suggestions, menu_index=menu_index)
+        for item_id in out_of_stock_item_ids
+    ]
+
+
+def suggest_add_ons_batch(
+    carts: List[List[Any]],
+    menu_items_dict: Dict[Any, Dict[str, Any]],
+    complementary_rules: Optional[Dict[Any, List[Any]]] = None,
+    num_suggestions: int = 3,
+    cooccurrence: Optional[CooccurrenceModel] = None,
+    metric: str = "lift"
+) -> List[List[Dict[str, Any]]]:
+    """suggest_add_ons() for every cart; all carts are scored with one co-occurrence matrix product."""
+    ranked = [[] for _ in carts]
+    if cooccurrence is not None:
+        ranked = cooccurrence.top_add_ons_batch(carts, k=num_suggestions * 3, metric=metric)
+    return [
+        _fill_add_ons(cart, menu_items_dict, complementary_rules, num_suggestions, cart_ranked) if cart else []
+        for cart, cart_ranked in zip(carts, ranked)
+    ]
+
+
+def _rank_by_similarity_batch(target_item_ids, menu_items_dict, num_suggestions, metric, similarity=None):
+    """_rank_by_similarity() for many targets (None = no suggestions), in chunks of SIMILARITY_BATCH_SIZE."""
+    similarity = similarity or ItemSimilarity(menu_items_dict)
+    targets = [target_id for target_id in target_item_ids if target_id is not None]
+    ranked = {}
+    for start in range(0, len(targets), SIMILARITY_BATCH_SIZE):
+        chunk = targets[start:start + SIMILARITY_BATCH_SIZE]
+        for target_id, row in zip(chunk, similarity.top_k(chunk, k=num_suggestions, metric=metric)):
+            ranked[target_id] = [menu_items_dict[item_id] for item_id, _ in row]
+    return [ranked[target_id] if target_id is not None else [] for target_id in target_item_ids]
+
+
 # You could add more rules:
 # - Special offers / promotions
 # - New items on the menu
-# - Time-based recommendations (breakfast items in the morning)
 # - Weather-based recommendations (hot drinks on a cold day)
\ No newline at end of file
@@ -0,0 +1,152 @@
+# backend/recommendations/similarity.py
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .cache import VersionedRegistry
+from .snapshot import MenuSnapshot, NO_CATEGORY
+
+SIMILARITY_METRICS = ("jaccard", "cosine")
+# Item attributes turned into binary features, all weighted equally: sharing the target's
+# category counts as much as sharing one tag or ingredient. Unlike the rule version, items
+# of the same category are therefore not guaranteed to rank first.
+DEFAULT_FEATURE_FIELDS = ("category", "tags", "ingredients")
+
+
+class ItemSimilarity:
+    """
+    Sparse binary item x feature matrix (category, tags, ingredients) over one
+    restaurant's menu_items_dict, for ranked "similar items" lookups.
+    top_k() scores one or many target items against the whole menu with a single sparse
+    matrix product, so asking for 50 targets costs about as much as asking for one.
+    Ties are broken by menu order; items sharing no feature are never returned.
+    """
+
+    def __init__(self, menu_items_dict: Dict[Any, Dict[str, Any]], feature_fields: Sequence[str] = DEFAULT_FEATURE_FIELDS):
+        if isinstance(menu_items_dict, MenuSnapshot):
+            self.item_ids, self.position = menu_items_dict.item_ids, menu_items_dict.position
+            self.available = np.array(menu_items_dict.available, dtype=bool) # Own copy: set_availability writes
+            rows, columns, self.n_features = _snapshot_features(menu_items_dict, feature_fields)
+        else:
+            self.item_ids: List[Any] = list(menu_items_dict)
+            self.position: Dict[Any, int] = {item_id: i for i, item_id in enumerate(self.item_ids)}
+            self.available = np.fromiter(
+                (bool(details.get('is_available', False)) for details in menu_items_dict.values()),
+                dtype=bool, count=len(self.item_ids)
+            )
+            feature_column: Dict[Tuple[str, Any], int] = {}
+            rows, columns = [], []
+            for i, details in enumerate(menu_items_dict.values()):
+                for field in feature_fields:
+                    values = details.get(field)
+                    if values is None:
+                        continue
+                    for value in (set(values) if isinstance(values, (list, tuple, set)) else (values,)):
+                        rows.append(i)
+                        columns.append(feature_column.setdefault((field, value), len(feature_column)))
+            self.n_features = len(feature_column)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(len(self.item_ids), max(self.n_features, 1))
+        )
+        self._matrix_t = self.matrix.T.tocsr()
+        self.feature_counts = np.asarray(self.matrix.sum(axis=1), dtype=np.float32).ravel()
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def set_availability(self, item_id, is_available: bool) -> None:
+        position = self.position.get(item_id)
+        if position is not None:
+            self.available[position] = is_available
+
+    def scores(self, target_ids: Sequence[Any], metric: str = "jaccard") -> np.ndarray:
+        """(len(target_ids), n_items) similarity matrix; unknown targets get a row of zeros."""
+        if metric not in SIMILARITY_METRICS:
+            raise ValueError(f"metric must be one of {SIMILARITY_METRICS}.")
+        positions = [self.position.get(target_id, -1) for target_id in target_ids]
+        known = np.array([p for p in positions if p >= 0], dtype=np.int64)
+        result = np.zeros((len(positions), len(self.item_ids)), dtype=np.float32)
+        if known.size == 0:
+            return result
+        overlap = (self.matrix[known] @ self._matrix_t).toarray() # |A n B| for every pair
+        target_counts = self.feature_counts[known][:, None]
+        if metric == "jaccard":
+            denominator = target_counts + self.feature_counts[None, :] - overlap
+        else:
+            denominator = np.sqrt(target_counts * self.feature_counts[None, :])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            known_scores = np.where(denominator > 0, overlap / denominator, 0.0)
+        result[[i for i, p in enumerate(positions) if p >= 0]] = known_scores
+        return result
+
+    def top_k(self, target_ids: Sequence[Any], k: int = 3, metric: str = "jaccard",
+              available_only: bool = True, exclude=()) -> List[List[Tuple[Any, float]]]:
+        """
+        For each target, the k most similar other items as [(item_id, score), ...], best
+        first. exclude: item ids never returned (e.g. already in the cart).
+        """
+        scores = self.scores(target_ids, metric)
+        mask = np.zeros(len(self.item_ids), dtype=bool)
+        if available_only:
+            mask |= ~self.available
+        for item_id in exclude:
+            if item_id in self.position:
+                mask[self.position[item_id]] = True
+        scores[:, mask] = 0.0
+        for row, target_id in enumerate(target_ids):
+            if target_id in self.position:
+                scores[row, self.position[target_id]] = 0.0
+
+        results = []
+        k = min(k, len(self.item_ids))
+        for row in scores:
+            if k <= 0:
+                results.append([])
+                continue
+            if k < row.size:
+                # O(n) selection of the k-th best score; ties on it go to the earliest items
+                kth = np.partition(row, row.size - k)[row.size - k]
+                above = np.flatnonzero(row > kth)
+                candidates = np.concatenate([above, np.flatnonzero(row == kth)[:k - above.size]])
+            else:
+                candidates = np.arange(row.size)
+            candidates = candidates[row[candidates] > 0]
+            order = sorted(candidates.tolist(), key=lambda i: (-row[i], i))
+            results.append([(self.item_ids[i], float(row[i])) for i in order])
+        return results
+
+
+def _snapshot_features(snapshot: MenuSnapshot, feature_fields: Sequence[str]):
+    """(rows, columns, n_features) of the binary feature matrix, straight from the snapshot columns."""
+    rows, columns, n_features = [], [], 0
+    for field in feature_fields:
+        if field == "category":
+            codes = np.asarray(snapshot.category_codes)
+            present = np.flatnonzero(codes != NO_CATEGORY)
+            rows.append(present)
+            columns.append(codes[present] + n_features)
+            n_features += len(snapshot.categories)
+        elif field in ("tags", "ingredients"):
+            offsets = np.asarray(getattr(snapshot, f"item_{field[:-1]}_offsets"))
+            rows.append(np.repeat(np.arange(len(snapshot), dtype=np.int64), np.diff(offsets)))
+            columns.append(np.asarray(getattr(snapshot, f"item_{field[:-1]}_codes"), dtype=np.int64) + n_features)
+            n_features += len(getattr(snapshot, field))
+        else:
+            raise ValueError(f"MenuSnapshot has no feature field {field!r}.")
+    if not rows:
+        return [], [], 0
+    return np.concatenate(rows), np.concatenate(columns), n_features
+
+
+# Item x feature matrices per restaurant menu version (see menu.versioning on the Django side).
+similarity_registry = VersionedRegistry()
+
+
+def get_item_similarity(restaurant_id, menu_version, load_menu_items) -> ItemSimilarity:
+    """
+    Returns the ItemSimilarity of a restaurant's menu version; load_menu_items() ->
+    menu_items_dict is only called (and the matrix only built) on a miss.
+    """
+    return similarity_registry.get_or_build(restaurant_id, menu_version, lambda: ItemSimilarity(load_menu_items()))
@@ -0,0 +1,242 @@
+# backend/recommendations/snapshot.py
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import VersionedRegistry
+
+SNAPSHOT_FORMAT_VERSION = 1
+# Columns saved as one .npy file each, so load(mmap=True) maps them straight from disk
+# and every worker process shares the same physical pages.
+ARRAY_COLUMNS = (
+    "category_codes", "available", "prices",
+    "item_tag_offsets", "item_tag_codes", "item_ingredient_offsets", "item_ingredient_codes",
+    "tag_offsets", "tag_rows",
+)
+NO_CATEGORY = -1
+# Item details dicts kept per snapshot for repeatedly recommended items; the cache is
+# simply emptied when full, which keeps it bounded without LRU bookkeeping.
+DETAILS_CACHE_SIZE = 2048
+
+
+def _postings(offsets: np.ndarray, codes: np.ndarray, vocabulary_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Transposes item -> codes CSR lists into code -> rows lists (rows ascending = menu order)."""
+    rows = np.repeat(np.arange(offsets.size - 1, dtype=np.int32), np.diff(offsets))
+    order = np.argsort(codes, kind="stable")
+    posting_offsets = np.zeros(vocabulary_size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=vocabulary_size), out=posting_offsets[1:])
+    return posting_offsets, rows[order]
+
+
+def _encode_ids(values: Sequence[Any]) -> Tuple[str, list]:
+    """JSON-safe ids plus the kind needed to restore them (UUIDs from the Django models)."""
+    if values and all(isinstance(value, uuid.UUID) for value in values):
+        return "uuid", [str(value) for value in values]
+    if values and all(isinstance(value, int) for value in values):
+        return "int", list(values)
+    return "str", [None if value is None else str(value) for value in values]
+
+
+def _decode_ids(kind: str, values: list) -> list:
+    if kind == "uuid":
+        return [uuid.UUID(value) for value in values]
+    return list(values)
+
+
+class MenuSnapshot(Mapping):
+    """
+    Columnar, read-only view of one restaurant's menu: row -> id, category codes,
+    availability flags, prices and tag / ingredient lists as numpy arrays, with O(1)
+    id -> row lookup.
+
+    It is a Mapping of item_id -> item details, so it can be passed anywhere a
+    menu_items_dict is expected (the recommendation rules, MenuIndex, ItemSimilarity);
+    the details dict of an item is only materialised when it is looked up. MenuIndex
+    and ItemSimilarity build straight from the arrays, and the hot "is this item
+    available" checks read one flag instead of a dict.
+    """
+
+    def __init__(self, item_ids: List[Any], names: List[str], categories: List[Any], category_codes: np.ndarray,
+                 available: np.ndarray, prices: np.ndarray, tags: List[Any], item_tag_offsets: np.ndarray,
+                 item_tag_codes: np.ndarray, ingredients: List[Any], item_ingredient_offsets: np.ndarray,
+                 item_ingredient_codes: np.ndarray, category_names: Optional[List[str]] = None,
+                 tag_offsets: Optional[np.ndarray] = None, tag_rows: Optional[np.ndarray] = None):
+        self.item_ids = item_ids
+        self.position: Dict[Any, int] = {item_id: row for row, item_id in enumerate(item_ids)}
+        self.names = names
+        self.categories = categories
+        self.category_names = category_names
+        self.category_codes = category_codes
+        self.available = available
+        self.prices = prices
+        self.tags = tags
+        self.item_tag_offsets, self.item_tag_codes = item_tag_offsets, item_tag_codes
+        self.ingredients = ingredients
+        self.item_ingredient_offsets, self.item_ingredient_codes = item_ingredient_offsets, item_ingredient_codes
+        if tag_offsets is None or tag_rows is None:
+            tag_offsets, tag_rows = _postings(item_tag_offsets, item_tag_codes, len(tags))
+        self.tag_offsets, self.tag_rows = tag_offsets, tag_rows
+        self._details: Dict[int, Dict[str, Any]] = {}
+
+    # --- Mapping interface (menu_items_dict compatible) ---
+    def __getitem__(self, item_id) -> Dict[str, Any]:
+        row = self.position[item_id]
+        details = self._details.get(row)
+        if details is None:
+            if len(self._details) >= DETAILS_CACHE_SIZE:
+                self._details.clear()
+            details = self._details[row] = self.row_details(row)
+        return details
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.item_ids)
+
+    def __len__(self):
+        return len(self.item_ids)
+
+    def __contains__(self, item_id):
+        return item_id in self.position
+
+    def row_details(self, row: int) -> Dict[str, Any]:
+        """The item details dict of a row, in the same shape as a menu_items_dict entry."""
+        code = self.category_codes.item(row) # .item(): plain Python scalars, no numpy boxing
+        details = {
+            'id': self.item_ids[row],
+            'name': self.names[row],
+            'category': self.categories[code] if code != NO_CATEGORY else None,
+            'tags': self.item_tags(row),
+            'ingredients': self.item_ingredients(row),
+            'price': self.prices.item(row),
+            'is_available': self.available.item(row),
+        }
+        if self.category_names is not None:
+            details['category_name'] = self.category_names[code] if code != NO_CATEGORY else None
+        return details
+
+    def item_tags(self, row: int) -> list:
+        start, end = self.item_tag_offsets[row:row + 2].tolist()
+        return [self.tags[code] for code in self.item_tag_codes[start:end].tolist()]
+
+    def item_ingredients(self, row: int) -> list:
+        start, end = self.item_ingredient_offsets[row:row + 2].tolist()
+        return [self.ingredients[code] for code in self.item_ingredient_codes[start:end].tolist()]
+
+    def is_available(self, item_id) -> bool:
+        """False for unknown ids, like menu_items_dict.get(item_id, {}).get('is_available', False)."""
+        row = self.position.get(item_id)
+        return row is not None and self.available.item(row)
+
+    def rows_with_tag(self, tag_code: int) -> np.ndarray:
+        return self.tag_rows[self.tag_offsets[tag_code]:self.tag_offsets[tag_code + 1]]
+
+    def set_availability(self, item_id, is_available: bool) -> None:
+        """Flips one flag; a memory-mapped (read-only) column is first copied into this process."""
+        row = self.position.get(item_id)
+        if row is not None:
+            if not self.available.flags.writeable:
+                self.available = np.array(self.available)
+            self.available[row] = is_available
+            self._details.pop(row, None)
+
+    # --- Building ---
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[Any, str, Any, float, bool, Sequence[Any], Sequence[Any]]],
+                  category_names: Optional[Dict[Any, str]] = None) -> "MenuSnapshot":
+        """
+        Builds a snapshot from (id, name, category, price, is_available, tags, ingredients)
+        tuples in menu order, e.g. straight from a values_list() query.
+        category_names: optional {category: display name}, exposed as 'category_name'.
+        """
+        item_ids, names, category_codes, prices, available = [], [], [], [], []
+        categories: Dict[Any, int] = {}
+        vocabularies = ({}, {}) # tag -> code, ingredient -> code
+        postings = (([0], []), ([0], [])) # (offsets, codes) per item, for tags and ingredients
+        for item_id, name, category, price, is_available, tags, ingredients in rows:
+            item_ids.append(item_id)
+            names.append(name)
+            category_codes.append(NO_CATEGORY if category is None else categories.setdefault(category, len(categories)))
+            prices.append(price or 0.0)
+            available.append(bool(is_available))
+            for values, vocabulary, (offsets, codes) in zip((tags, ingredients), vocabularies, postings):
+                codes.extend(vocabulary.setdefault(value, len(vocabulary)) for value in dict.fromkeys(values or ()))
+                offsets.append(len(codes))
+        category_list = list(categories)
+        return cls(
+            item_ids, names, category_list, np.asarray(category_codes, dtype=np.int32),
+            np.asarray(available, dtype=bool), np.asarray(prices, dtype=np.float64),
+            list(vocabularies[0]), np.asarray(postings[0][0], dtype=np.int64), np.asarray(postings[0][1], dtype=np.int32),
+            list(vocabularies[1]), np.asarray(postings[1][0], dtype=np.int64), np.asarray(postings[1][1], dtype=np.int32),
+            category_names=[category_names.get(category) for category in category_list] if category_names else None,
+        )
+
+    @classmethod
+    def from_menu_items_dict(cls, menu_items_dict: Dict[Any, Dict[str, Any]]) -> "MenuSnapshot":
+        """Snapshot of an existing menu_items_dict (same rows, same order)."""
+        category_names = {
+            details.get('category'): details['category_name']
+            for details in menu_items_dict.values() if 'category_name' in details
+        }
+        return cls.from_rows(
+            ((item_id, details.get('name'), details.get('category'), details.get('price'),
+              details.get('is_available', False), details.get('tags'), details.get('ingredients'))
+             for item_id, details in menu_items_dict.items()),
+            category_names=category_names or None,
+        )
+
+    # --- Sharing across processes ---
+    def save(self, path: str) -> None:
+        """
+        Writes the snapshot as a directory of .npy columns plus meta.json. The directory
+        appears atomically (written next to path, then renamed), so a concurrent load()
+        never sees a half-written snapshot; if path already exists it is left alone.
+        """
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        staging = tempfile.mkdtemp(dir=parent, prefix=".snapshot-")
+        try:
+            for column in ARRAY_COLUMNS:
+                np.save(os.path.join(staging, f"{column}.npy"), getattr(self, column))
+            id_kind, item_ids = _encode_ids(self.item_ids)
+            category_kind, categories = _encode_ids(self.categories)
+            with open(os.path.join(staging, "meta.json"), "w", encoding="utf-8") as meta_file:
+                json.dump({
+                    "format": SNAPSHOT_FORMAT_VERSION,
+                    "id_kind": id_kind, "item_ids": item_ids, "names": self.names,
+                    "category_kind": category_kind, "categories": categories, "category_names": self.category_names,
+                    "tags": self.tags, "ingredients": self.ingredients,
+                }, meta_file)
+            os.rename(staging, path)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(path): # Lost the race to another writer: fine, theirs is identical
+                raise
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "MenuSnapshot":
+        """Loads a saved snapshot; with mmap the columns are read-only views of the files."""
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        if meta.get("format") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported menu snapshot format: {meta.get('format')}")
+        arrays = {
+            column: np.load(os.path.join(path, f"{column}.npy"), mmap_mode="r" if mmap else None)
+            for column in ARRAY_COLUMNS
+        }
+        return cls(
+            _decode_ids(meta["id_kind"], meta["item_ids"]), meta["names"],
+            _decode_ids(meta["category_kind"], meta["categories"]), arrays["category_codes"],
+            arrays["available"], arrays["prices"],
+            meta["tags"], arrays["item_tag_offsets"], arrays["item_tag_codes"],
+            meta["ingredients"], arrays["item_ingredient_offsets"], arrays["item_ingredient_codes"],
+            category_names=meta["category_names"], tag_offsets=arrays["tag_offsets"], tag_rows=arrays["tag_rows"],
+        )
+
+
+# Snapshots per restaurant menu version held by this process (see menu.versioning on the Django side).
+snapshot_registry = VersionedRegistry()
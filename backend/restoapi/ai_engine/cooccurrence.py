@@ -0,0 +1,134 @@
+# backend/ai_engine/cooccurrence.py
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import ItemCooccurrence, CooccurrenceBuildState
+
+# Orders younger than this are left for the next run, so an order whose transaction
+# commits slightly after a later one is never skipped by the watermark.
+COOCCURRENCE_SETTLE_SECONDS = 60
+# Low-support pairs are only pruned once they have not been seen for this long.
+COOCCURRENCE_PRUNE_AFTER_DAYS = 30
+# Orders that were never fulfilled, so their baskets say nothing about what goes together
+EXCLUDED_ORDER_STATUSES = ('CANCELLED_BY_USER', 'CANCELLED_BY_RESTAURANT', 'SYSTEM_CANCELLED', 'FAILED_PAYMENT')
+
+
+def _order_baskets(restaurant_id, state, batch_size):
+    """Next batch of (order_id, created_at, [menu item ids]) after the state's watermark."""
+    from orders.models import Order, OrderItem
+
+    orders = Order.objects.filter(restaurant_id=restaurant_id, created_at__lt=timezone.now() - timedelta(seconds=COOCCURRENCE_SETTLE_SECONDS)) \
+        .exclude(status__in=EXCLUDED_ORDER_STATUSES)
+    if state.last_order_created_at is not None:
+        orders = orders.filter(
+            Q(created_at__gt=state.last_order_created_at) |
+            Q(created_at=state.last_order_created_at, id__gt=state.last_order_id)
+        )
+    batch = list(orders.order_by('created_at', 'id').values_list('id', 'created_at')[:batch_size])
+    items = defaultdict(list)
+    for order_id, menu_item_id in OrderItem.objects.filter(
+        order_id__in=[order_id for order_id, _ in batch], menu_item_original_id__isnull=False
+    ).values_list('order_id', 'menu_item_original_id'):
+        items[order_id].append(menu_item_id)
+    return [(order_id, created_at, items[order_id]) for order_id, created_at in batch]
+
+
+def _apply_pair_counts(restaurant_id, counts) -> None:
+    """Adds a batch's pair counts to the stored rows (read-modify-write under the state lock)."""
+    existing = {
+        (row.item_a, row.item_b): row for row in ItemCooccurrence.objects.filter(
+            restaurant_id=restaurant_id, item_a__in={a for a, _ in counts}, item_b__in={b for _, b in counts}
+        )
+    }
+    to_update, to_create = [], []
+    now = timezone.now()
+    for (a, b), count in counts.items():
+        row = existing.get((a, b))
+        if row is not None:
+            row.order_count += count
+            row.updated_at = now # bulk_update() does not apply auto_now; _prune() reads it as "last seen"
+            to_update.append(row)
+        else:
+            to_create.append(ItemCooccurrence(restaurant_id=restaurant_id, item_a=a, item_b=b, order_count=count))
+    ItemCooccurrence.objects.bulk_update(to_update, ['order_count', 'updated_at'], batch_size=1000)
+    ItemCooccurrence.objects.bulk_create(to_create, batch_size=1000)
+
+
+def _prune(restaurant_id) -> int:
+    """
+    Bounds the pair table: drops stale low-support pairs, then caps every item at
+    COOCCURRENCE_MAX_PAIRS_PER_ITEM partners. Item supports (diagonal rows) are kept.
+    """
+    from recommendations.cooccurrence import COOCCURRENCE_MIN_PAIR_SUPPORT, prune_pairs
+
+    pairs = ItemCooccurrence.objects.filter(restaurant_id=restaurant_id)
+    stale_cutoff = timezone.now() - timedelta(days=COOCCURRENCE_PRUNE_AFTER_DAYS)
+    deleted, _ = pairs.filter(order_count__lt=COOCCURRENCE_MIN_PAIR_SUPPORT, updated_at__lt=stale_cutoff) \
+        .exclude(item_a=F('item_b')).delete()
+    rows = {(a, b): (row_id, count) for row_id, a, b, count in pairs.values_list('id', 'item_a', 'item_b', 'order_count')}
+    over_cap = prune_pairs({pair: count for pair, (_, count) in rows.items()})
+    if over_cap:
+        deleted += ItemCooccurrence.objects.filter(id__in=[rows[pair][0] for pair in over_cap]).delete()[0]
+    return deleted
+
+
+def update_cooccurrence(restaurant_id, batch_size: int = 1000, max_batches: int = None, rebuild: bool = False) -> int:
+    """
+    Folds orders placed since the last run into the restaurant's pair counts, batch by
+    batch, then prunes. rebuild=True starts over from the first order.
+    Returns the number of orders counted. Safe to run concurrently: each batch holds
+    the restaurant's CooccurrenceBuildState row lock.
+    """
+    from recommendations.cooccurrence import basket_pair_counts
+
+    counted, batches = 0, 0
+    if rebuild:
+        with transaction.atomic():
+            ItemCooccurrence.objects.filter(restaurant_id=restaurant_id).delete()
+            CooccurrenceBuildState.objects.filter(restaurant_id=restaurant_id).delete()
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            state, _ = CooccurrenceBuildState.objects.select_for_update().get_or_create(restaurant_id=restaurant_id)
+            baskets = _order_baskets(restaurant_id, state, batch_size)
+            if not baskets:
+                break
+            # Pair keys ordered like basket_pair_counts orders them (by string form)
+            _apply_pair_counts(restaurant_id, basket_pair_counts(items for _, _, items in baskets))
+            state.orders_counted += len(baskets)
+            state.last_order_id, state.last_order_created_at = baskets[-1][0], baskets[-1][1]
+            state.version += 1
+            state.save()
+        counted += len(baskets)
+        batches += 1
+    if counted:
+        _prune(restaurant_id)
+    return counted
+
+
+def get_cooccurrence_version(restaurant_id):
+    """Version of the restaurant's co-occurrence counts (None before the first job run)."""
+    return CooccurrenceBuildState.objects.filter(restaurant_id=restaurant_id).values_list('version', flat=True).first()
+
+
+def get_cooccurrence_model(restaurant_id):
+    """
+    Returns the restaurant's CooccurrenceModel (None before the first job run), rebuilt
+    in this process only when the job has produced a new version.
+    """
+    from recommendations.cooccurrence import CooccurrenceModel, cooccurrence_registry
+
+    state = CooccurrenceBuildState.objects.filter(restaurant_id=restaurant_id).values_list('version', 'orders_counted').first()
+    if state is None:
+        return None
+    version, orders_counted = state
+    return cooccurrence_registry.get_or_build(
+        restaurant_id, version,
+        lambda: CooccurrenceModel(
+            ItemCooccurrence.objects.filter(restaurant_id=restaurant_id).values_list('item_a', 'item_b', 'order_count'),
+            orders_counted,
+        )
+    )
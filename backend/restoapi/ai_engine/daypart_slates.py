@@ -0,0 +1,124 @@
+# backend/ai_engine/daypart_slates.py
+"""
+Time-of-day recommendation slates (DaypartSlateSet): what a restaurant's customers order
+at breakfast, lunch, ... ranked by forward-decayed order counts per daypart, and which
+daypart to serve when, from the restaurant's OperatingHoursRules.
+
+Times are local to the project TIME_ZONE (restaurants have no time zone of their own).
+"""
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .cooccurrence import EXCLUDED_ORDER_STATUSES
+from .models import DaypartSlateSet
+
+# Orders younger than this are left for the next run (see ai_engine.cooccurrence).
+DAYPART_SETTLE_SECONDS = 60
+
+
+def build_daypart_schedule(restaurant_id):
+    """DaypartSchedule of the restaurant's weekly OperatingHoursRules."""
+    from recommendations.dayparts import DaypartSchedule
+    from restaurants.models import OperatingHoursRule
+
+    rules = OperatingHoursRule.objects.filter(restaurant_id=restaurant_id, is_closed_on_this_day_override=False) \
+        .values_list('day_of_week', 'open_time', 'close_time')
+    return DaypartSchedule(
+        (day, open_time.hour * 60 + open_time.minute, close_time.hour * 60 + close_time.minute)
+        for day, open_time, close_time in rules
+    )
+
+
+def refresh_daypart_schedule(restaurant_id) -> None:
+    """Re-derives the stored schedule after the restaurant's opening hours changed."""
+    DaypartSlateSet.objects.filter(restaurant_id=restaurant_id).update(
+        schedule=build_daypart_schedule(restaurant_id).encode()
+    )
+
+
+def _order_batch(restaurant_id, slate_set, batch_size):
+    """Next batch of (order_id, created_at, [(menu item id, quantity)]) after the watermark."""
+    from orders.models import Order, OrderItem
+
+    orders = Order.objects.filter(
+        restaurant_id=restaurant_id, created_at__lt=timezone.now() - timedelta(seconds=DAYPART_SETTLE_SECONDS)
+    ).exclude(status__in=EXCLUDED_ORDER_STATUSES)
+    if slate_set.last_order_created_at is not None:
+        orders = orders.filter(
+            Q(created_at__gt=slate_set.last_order_created_at) |
+            Q(created_at=slate_set.last_order_created_at, id__gt=slate_set.last_order_id)
+        )
+    batch = list(orders.order_by('created_at', 'id').values_list('id', 'created_at')[:batch_size])
+    items = defaultdict(list)
+    for order_id, menu_item_id, quantity in OrderItem.objects.filter(
+        order_id__in=[order_id for order_id, _ in batch], menu_item_original_id__isnull=False
+    ).values_list('order_id', 'menu_item_original_id', 'quantity'):
+        items[order_id].append((menu_item_id, quantity))
+    return [(order_id, created_at, items[order_id]) for order_id, created_at in batch]
+
+
+def update_daypart_slates(restaurant_id, batch_size: int = 1000, max_batches: int = None, rebuild: bool = False) -> int:
+    """
+    Folds orders placed since the last run into the restaurant's per-daypart scores,
+    batch by batch, re-ranks the slates of the dayparts those orders fell in and
+    refreshes the schedule. rebuild=True starts over from the first order.
+    Returns the number of orders counted. Each batch holds the DaypartSlateSet row lock.
+    """
+    from recommendations.dayparts import DaypartScores, daypart_of_minute
+    from recommendations.popularity import forward_decay_log_weight
+
+    schedule = build_daypart_schedule(restaurant_id).encode()
+    if rebuild:
+        DaypartSlateSet.objects.filter(restaurant_id=restaurant_id).delete()
+    counted, batches = 0, 0
+    while True:
+        with transaction.atomic():
+            slate_set, _ = DaypartSlateSet.objects.select_for_update().get_or_create(restaurant_id=restaurant_id)
+            orders = _order_batch(restaurant_id, slate_set, batch_size) \
+                if max_batches is None or batches < max_batches else []
+            if not orders and slate_set.schedule == schedule:
+                break
+            scores = DaypartScores.from_dict(slate_set.scores, parse_id=uuid.UUID)
+            touched = set()
+            for _, created_at, item_quantities in orders:
+                local = timezone.localtime(created_at)
+                daypart = daypart_of_minute(local.hour * 60 + local.minute)
+                scores.add_order(daypart, item_quantities, forward_decay_log_weight(created_at))
+                touched.add(daypart)
+            slate_set.scores = scores.to_dict()
+            slate_set.slates = {
+                **slate_set.slates, **{daypart: [str(item_id) for item_id in scores.slate(daypart)] for daypart in touched}
+            }
+            slate_set.schedule = schedule
+            if orders:
+                slate_set.orders_counted += len(orders)
+                slate_set.last_order_id, slate_set.last_order_created_at = orders[-1][0], orders[-1][1]
+            slate_set.version += 1
+            slate_set.save()
+        counted += len(orders)
+        batches += 1
+        if not orders:
+            break
+    return counted
+
+
+def get_daypart_slate(restaurant_id, now=None):
+    """
+    (daypart, [item ids, best first]) to serve now: one primary-key lookup, the daypart
+    from the stored schedule table. (None, []) before the first job run or for a
+    restaurant that is never open.
+    """
+    from recommendations.dayparts import encoded_daypart_at
+
+    row = DaypartSlateSet.objects.filter(restaurant_id=restaurant_id).values_list('schedule', 'slates').first()
+    if row is None or not row[0]:
+        return None, []
+    schedule, slates = row
+    local = timezone.localtime(now or timezone.now())
+    daypart = encoded_daypart_at(schedule, local.weekday(), local.hour * 60 + local.minute)
+    return daypart, [uuid.UUID(item_id) for item_id in slates.get(daypart, [])]
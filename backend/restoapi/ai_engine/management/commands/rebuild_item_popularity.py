@@ -0,0 +1,60 @@
+# backend/ai_engine/management/commands/rebuild_item_popularity.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ai_engine.cooccurrence import EXCLUDED_ORDER_STATUSES
+from ai_engine.models import MenuItemPopularity
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the time-decayed MenuItemPopularity counters from historical OrderItems "
+        "(e.g. after a first deploy or a half-life change), leaving out cancelled and failed orders. "
+        "New and cancelled orders keep them current."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', help="Only rebuild this restaurant ID.")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="OrderItem rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        from menu.models import MenuItem
+        from orders.models import OrderItem
+        from recommendations.popularity import POPULARITY_EMPTY_LOG_SCORE, forward_decay_log_weight, log2_add
+
+        items = MenuItem.objects.all()
+        if options['restaurant']:
+            items = items.filter(restaurant_id=options['restaurant'])
+        menu = {item_id: (restaurant_id, category_id)
+                for item_id, restaurant_id, category_id in items.values_list('id', 'restaurant_id', 'category_id')}
+
+        scores, counts, last_ordered = defaultdict(lambda: POPULARITY_EMPTY_LOG_SCORE), defaultdict(int), {}
+        order_items = OrderItem.objects.filter(menu_item_original_id__isnull=False) \
+            .exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+        if options['restaurant']:
+            order_items = order_items.filter(order__restaurant_id=options['restaurant'])
+        order_items = order_items.values_list('menu_item_original_id', 'quantity', 'order__created_at')
+        for item_id, quantity, ordered_at in order_items.iterator(chunk_size=options['chunk_size']):
+            if item_id not in menu: # Item deleted since
+                continue
+            scores[item_id] = log2_add(scores[item_id], forward_decay_log_weight(ordered_at, quantity))
+            counts[item_id] += quantity
+            if item_id not in last_ordered or ordered_at > last_ordered[item_id]:
+                last_ordered[item_id] = ordered_at
+
+        rows = [
+            MenuItemPopularity(
+                menu_item_id=item_id, restaurant_id=menu[item_id][0], category_id=menu[item_id][1],
+                decayed_score=score, order_count=counts[item_id], last_ordered_at=last_ordered[item_id],
+            )
+            for item_id, score in scores.items()
+        ]
+        with transaction.atomic():
+            stale = MenuItemPopularity.objects.all()
+            if options['restaurant']:
+                stale = stale.filter(restaurant_id=options['restaurant'])
+            stale.delete()
+            MenuItemPopularity.objects.bulk_create(rows, batch_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt popularity for {len(rows)} menu items."))
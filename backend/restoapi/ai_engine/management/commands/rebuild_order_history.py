@@ -0,0 +1,56 @@
+# backend/ai_engine/management/commands/rebuild_order_history.py
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ai_engine.cooccurrence import EXCLUDED_ORDER_STATUSES
+from ai_engine.models import UserOrderHistory
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-user UserOrderHistory aggregates from historical orders "
+        "(e.g. after a first deploy). New and cancelled orders keep them current."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', help="Only rebuild histories at this restaurant ID.")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="OrderItem rows fetched per round trip.")
+
+    def handle(self, *args, **options):
+        from orders.models import OrderItem
+        from recommendations.order_history import OrderHistoryAggregate
+
+        order_items = OrderItem.objects.filter(order__user__isnull=False, menu_item_original_id__isnull=False) \
+            .exclude(order__status__in=EXCLUDED_ORDER_STATUSES)
+        if options['restaurant']:
+            order_items = order_items.filter(order__restaurant_id=options['restaurant'])
+        order_items = order_items.order_by('order__created_at', 'order_id').values_list(
+            'order__user_id', 'order__restaurant_id', 'order_id', 'order__created_at', 'menu_item_original_id'
+        )
+
+        # Rows arrive grouped by order, oldest first; each order is folded in once complete
+        aggregates = defaultdict(OrderHistoryAggregate)
+        current_order, current_key, current_at, current_items = None, None, None, []
+        for user_id, restaurant_id, order_id, created_at, menu_item_id in order_items.iterator(chunk_size=options['chunk_size']):
+            if order_id != current_order:
+                if current_items:
+                    aggregates[current_key].add_order(current_items, current_at.timestamp())
+                current_order, current_key, current_at, current_items = order_id, (user_id, restaurant_id), created_at, []
+            current_items.append(menu_item_id)
+        if current_items:
+            aggregates[current_key].add_order(current_items, current_at.timestamp())
+
+        rows = [
+            UserOrderHistory(user_id=user_id, restaurant_id=restaurant_id,
+                             aggregate=aggregate.to_dict(), order_count=aggregate.order_count)
+            for (user_id, restaurant_id), aggregate in aggregates.items()
+        ]
+        with transaction.atomic():
+            stale = UserOrderHistory.objects.all()
+            if options['restaurant']:
+                stale = stale.filter(restaurant_id=options['restaurant'])
+            stale.delete()
+            UserOrderHistory.objects.bulk_create(rows, batch_size=1000)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt order history for {len(rows)} user/restaurant pairs."))
@@ -0,0 +1,85 @@
+# backend/ai_engine/management/commands/replay_recommendations.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ai_engine.recommendation_replay import (
+    REPLAY_STRATEGIES, build_cold_strategy, build_strategies, iter_replay_events, replay_queryset
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays logged recommendation requests (RecommendationLog with their clicks and "
+        "add-to-carts) through candidate strategies offline and reports CTR / add-to-cart "
+        "proxies, precision@k, coverage, latency percentiles and peak memory per strategy, "
+        "next to what was actually shown."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Only replay logs from this date on (YYYY-MM-DD).")
+        parser.add_argument('--until', help="Only replay logs up to this date, inclusive (YYYY-MM-DD).")
+        parser.add_argument('--restaurant', help="Only replay logs of this restaurant ID.")
+        parser.add_argument('--trigger', action='append', dest='triggers',
+                            help="Only replay this trigger type (repeatable), e.g. ITEM_VIEW.")
+        parser.add_argument('--strategies', default=','.join(REPLAY_STRATEGIES),
+                            help=f"Comma-separated strategies to compare, out of {', '.join(REPLAY_STRATEGIES)}.")
+        parser.add_argument('--k', type=int, default=3, help="Recommendations per request that count.")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Logs (and their interactions) fetched per round trip.")
+        parser.add_argument('--limit', type=int, help="Stop after this many logs.")
+        parser.add_argument('--memory-sample', type=int, default=200,
+                            help="Events re-run under tracemalloc to measure peak memory (0 disables).")
+        parser.add_argument('--output', help="Also write the full report as JSON to this file.")
+
+    def handle(self, *args, **options):
+        from recommendations.evaluation import evaluate
+
+        dates = {}
+        for option in ('since', 'until'):
+            if options[option]:
+                dates[option] = parse_date(options[option])
+                if dates[option] is None:
+                    raise CommandError(f"--{option} must be a date in YYYY-MM-DD format.")
+        if options['k'] <= 0:
+            raise CommandError("--k must be positive.")
+        names = [name.strip() for name in options['strategies'].split(',') if name.strip()]
+        try:
+            strategies, prepare = build_strategies(names, k=options['k'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        queryset = replay_queryset(
+            since=dates.get('since'), until=dates.get('until'),
+            restaurant_id=options['restaurant'], trigger_types=options['triggers']
+        )
+        events = iter_replay_events(queryset, chunk_size=options['chunk_size'], limit=options['limit'])
+        report = evaluate(
+            events, strategies, k=options['k'], memory_sample=options['memory_sample'], prepare=prepare,
+            cold_strategy=lambda name: build_cold_strategy(name, k=options['k'])
+        )
+
+        precision_key = f"precision_at_{options['k']}"
+        for name, stats in report.items():
+            latency = stats['latency_ms']
+            self.stdout.write(
+                f"{name:>8}: {stats['events']} events, {stats['errors']} errors, "
+                f"coverage {_fmt(stats['coverage'])}, CTR proxy {_fmt(stats['ctr_proxy'])}, "
+                f"add-to-cart proxy {_fmt(stats['add_to_cart_proxy'])}, "
+                f"precision@{options['k']} {_fmt(stats[precision_key])}, "
+                f"latency p50/p95/p99 {_fmt(latency.get('p50'), 'ms')}/{_fmt(latency.get('p95'), 'ms')}/"
+                f"{_fmt(latency.get('p99'), 'ms')}, peak memory {_fmt(stats['peak_memory_kb'], ' KB')}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"Replayed {next(iter(report.values()))['events'] if report else 0} recommendation logs "
+            f"through {len(strategies)} strategies."
+        ))
+
+
+def _fmt(value, unit=''):
+    return "n/a" if value is None else f"{value:.3f}{unit}"
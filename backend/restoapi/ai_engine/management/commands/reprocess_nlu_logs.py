@@ -0,0 +1,86 @@
+# backend/ai_engine/management/commands/reprocess_nlu_logs.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from ai_engine.models import NLULog
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-runs the NLU pipeline over historical NLULog.user_query_raw in batches "
+        "(spaCy nlp.pipe) and stores the new processed query, intent and entities."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Log rows fetched, analysed and written per round trip.")
+        parser.add_argument('--batch-size', type=int, default=256, help="spaCy nlp.pipe batch size.")
+        parser.add_argument('--n-process', type=int, default=1, help="spaCy worker processes for parsing.")
+        parser.add_argument('--since', help="Only reprocess logs from this date on (YYYY-MM-DD).")
+        parser.add_argument('--restaurant', help="Only reprocess logs of this restaurant ID.")
+        parser.add_argument('--limit', type=int, help="Stop after this many logs.")
+        parser.add_argument('--dry-run', action='store_true', help="Analyse and report without saving.")
+
+    def handle(self, *args, **options):
+        from nlp.pipeline import analyze_batch
+        from menu.services import load_restaurant_menu_for_nlp
+        from ai_engine.nlu_models import get_active_intent_scorer
+
+        queryset = NLULog.objects.order_by('timestamp').only('id', 'user_query_raw', 'restaurant_id', 'detected_intent')
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError("--since must be a date in YYYY-MM-DD format.")
+            queryset = queryset.filter(timestamp__date__gte=since)
+        if options['restaurant']:
+            queryset = queryset.filter(restaurant_id=options['restaurant'])
+        if options['limit']:
+            queryset = queryset[:options['limit']]
+
+        intent_scorer = get_active_intent_scorer()
+        menu_versions = {} # restaurant_id -> menu version, resolved once per run
+        processed = changed = 0
+
+        def flush(logs):
+            nonlocal processed, changed
+            contexts = []
+            for log in logs:
+                context = {"intent_scorer": intent_scorer}
+                if log.restaurant_id:
+                    if log.restaurant_id not in menu_versions:
+                        menu_versions[log.restaurant_id] = load_restaurant_menu_for_nlp(log.restaurant_id)
+                    context.update(restaurant_id=log.restaurant_id, menu_version=menu_versions[log.restaurant_id])
+                contexts.append(context)
+
+            results = analyze_batch(
+                [log.user_query_raw for log in logs], contexts=contexts,
+                batch_size=options['batch_size'], n_process=options['n_process']
+            )
+            for log, result in zip(logs, results):
+                if log.detected_intent != result.intent:
+                    changed += 1
+                log.user_query_processed = result.processed_query
+                log.detected_intent = result.intent
+                log.intent_confidence = result.intent_confidence
+                log.detected_entities = result.entities
+            if not options['dry_run']:
+                NLULog.objects.bulk_update(
+                    logs, ['user_query_processed', 'detected_intent', 'intent_confidence', 'detected_entities'],
+                    batch_size=options['chunk_size']
+                )
+            processed += len(logs)
+            self.stdout.write(f"Processed {processed} logs ({changed} intent changes so far)...")
+
+        chunk = []
+        for log in queryset.iterator(chunk_size=options['chunk_size']):
+            chunk.append(log)
+            if len(chunk) >= options['chunk_size']:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+        suffix = " (dry run, nothing saved)" if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"Reprocessed {processed} NLU logs; {changed} got a different intent{suffix}."
+        ))
@@ -0,0 +1,65 @@
+# backend/ai_engine/management/commands/train_intent_scorer.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ai_engine.models import AIModelFamily, AIModelVersion, NLULog
+
+
+class Command(BaseCommand):
+    help = (
+        "Trains the hashed n-gram intent scorer (nlp.scoring_classifier) from a labelled "
+        "JSONL corpus ({\"text\": ..., \"intent\": ...} per line) and/or NLULog intents, "
+        "writes the .npz artifact and optionally registers it as an AIModelVersion."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the .npz artifact to write.")
+        parser.add_argument('--corpus', help="Labelled JSONL corpus.")
+        parser.add_argument('--from-logs', action='store_true',
+                            help="Also train on NLULog rows that have a detected intent.")
+        parser.add_argument('--log-limit', type=int, default=100000, help="Maximum NLULog rows used.")
+        parser.add_argument('--family', help="AIModelFamily name to register the artifact under (type NLU).")
+        parser.add_argument('--version-tag', help="Version tag for the registered AIModelVersion.")
+
+    def handle(self, *args, **options):
+        from nlp.utils import preprocess_text, tokenize_and_lemmatize
+        from nlp.scoring_classifier import ScoringIntentClassifier
+
+        if options['family'] and not options['version_tag']:
+            raise CommandError("--version-tag is required with --family.")
+
+        labelled = []
+        if options['corpus']:
+            with open(options['corpus'], encoding='utf-8') as corpus:
+                for line in corpus:
+                    if line.strip():
+                        row = json.loads(line)
+                        labelled.append((row['text'], row['intent']))
+        if options['from_logs']:
+            logs = NLULog.objects.exclude(detected_intent__isnull=True).exclude(detected_intent='') \
+                .values_list('user_query_raw', 'detected_intent')[:options['log_limit']]
+            labelled.extend(logs)
+        if not labelled:
+            raise CommandError("No training data: pass --corpus and/or --from-logs.")
+
+        samples = [(tokenize_and_lemmatize(preprocess_text(text)), intent) for text, intent in labelled]
+        scorer = ScoringIntentClassifier.fit(samples)
+        scorer.save(options['output'])
+        self.stdout.write(f"Trained on {len(samples)} utterances, {len(scorer.intents)} intents -> {options['output']}")
+
+        if options['family']:
+            family, _ = AIModelFamily.objects.get_or_create(
+                name=options['family'], defaults={'model_type': 'NLU', 'technology_stack': 'spaCy + NumPy'}
+            )
+            version = AIModelVersion.objects.create(
+                model_family=family,
+                version_tag=options['version_tag'],
+                artifact_uri=options['output'],
+                description="Hashed n-gram naive Bayes intent scorer.",
+                training_parameters={'n_features': scorer.n_features, 'max_ngram': scorer.max_ngram,
+                                     'samples': len(samples), 'intents': scorer.intents},
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Registered {version}. Activate it with AIModelVersion.set_active_production()."
+            ))
@@ -0,0 +1,30 @@
+# backend/ai_engine/management/commands/update_daypart_slates.py
+from django.core.management.base import BaseCommand
+
+from ai_engine.daypart_slates import update_daypart_slates
+
+
+class Command(BaseCommand):
+    help = (
+        "Folds orders placed since the last run into the per-restaurant time-of-day "
+        "(daypart) recommendation slates and refreshes their opening-hours schedule. "
+        "Run periodically (cron / beat); --rebuild starts over."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', help="Only update this restaurant ID.")
+        parser.add_argument('--rebuild', action='store_true', help="Drop the scores and recount every order.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Orders counted per transaction.")
+
+    def handle(self, *args, **options):
+        from restaurants.models import Restaurant
+
+        restaurant_ids = [options['restaurant']] if options['restaurant'] else \
+            list(Restaurant.objects.values_list('id', flat=True))
+        total = 0
+        for restaurant_id in restaurant_ids:
+            counted = update_daypart_slates(restaurant_id, batch_size=options['batch_size'], rebuild=options['rebuild'])
+            if counted:
+                self.stdout.write(f"{restaurant_id}: {counted} new orders counted.")
+            total += counted
+        self.stdout.write(self.style.SUCCESS(f"Counted {total} orders across {len(restaurant_ids)} restaurants."))
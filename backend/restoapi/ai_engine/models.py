@@ -287,6 +287,11 @@ class RecommendationLog(AILogBase):
         null=True, blank=True,
         help_text=_("How many recommendations were shown")
     )
+    cache_hit = models.BooleanField(
+        _("cache hit"),
+        null=True, blank=True,
+        help_text=_("Served from the recommendation result cache (null: not cacheable / not recorded)")
+    )
 
     class Meta:
         verbose_name = _("recommendation log")
@@ -412,4 +417,190 @@ class AIFeedback(models.Model):
         ]
 
     def __str__(self):
-        return f"Feedback on {self.get_feedback_type_display()} ({self.rating or 'no rating'})"
\ No newline at end of file
+        return f"Feedback on {self.get_feedback_type_display()} ({self.rating or 'no rating'})"
+
+class MenuItemPopularity(models.Model):
+    """
+    Running, exponentially time-decayed order count of a menu item (see
+    recommendations.popularity). decayed_score is the log2 of a forward-decay score, so
+    it only ever grows with each new order and "top items of a restaurant / category"
+    is an index-ordered LIMIT query. Maintained by ai_engine.popularity.
+    """
+    menu_item = models.OneToOneField(
+        'menu.MenuItem',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity',
+        verbose_name=_("menu item")
+    )
+    restaurant = models.ForeignKey(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        related_name='item_popularity',
+        verbose_name=_("restaurant")
+    )
+    category = models.ForeignKey(
+        'menu.MenuCategory',
+        on_delete=models.SET_NULL,
+        null=True, blank=True,
+        related_name='item_popularity',
+        verbose_name=_("category")
+    )
+    decayed_score = models.FloatField(
+        _("decayed score"),
+        default=-1e300, # recommendations.popularity.POPULARITY_EMPTY_LOG_SCORE
+        help_text=_("log2 of the forward-decay score; convert with recommendations.popularity.decayed_popularity")
+    )
+    order_count = models.PositiveIntegerField(
+        _("order count"),
+        default=0,
+        help_text=_("Undecayed units ordered")
+    )
+    last_ordered_at = models.DateTimeField(
+        _("last ordered at"),
+        null=True, blank=True
+    )
+
+    class Meta:
+        verbose_name = _("menu item popularity")
+        verbose_name_plural = _("menu item popularity")
+        db_table = "ai_engine_menu_item_popularity"
+        indexes = [
+            models.Index(fields=['restaurant', '-decayed_score']),
+            models.Index(fields=['restaurant', 'category', '-decayed_score']),
+        ]
+
+    def __str__(self):
+        return f"Popularity of {self.menu_item_id}: {self.decayed_score:.3g}"
+
+
+class ItemCooccurrence(models.Model):
+    """
+    Number of orders of a restaurant that contained both menu items (market-basket pair
+    count). Each unordered pair is stored once with item_a <= item_b (as strings);
+    item_a == item_b rows hold the number of orders containing the item (its support).
+    Maintained in batches by ai_engine.cooccurrence.update_cooccurrence.
+    """
+    id = models.BigAutoField(primary_key=True)
+    restaurant = models.ForeignKey(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        related_name='item_cooccurrences',
+        verbose_name=_("restaurant")
+    )
+    item_a = models.UUIDField(_("item A"))
+    item_b = models.UUIDField(_("item B"))
+    order_count = models.PositiveIntegerField(_("orders containing both"), default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("item co-occurrence")
+        verbose_name_plural = _("item co-occurrences")
+        db_table = "ai_engine_item_cooccurrences"
+        unique_together = [['restaurant', 'item_a', 'item_b']]
+        indexes = [
+            models.Index(fields=['restaurant', 'order_count']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_a} + {self.item_b}: {self.order_count}"
+
+
+class CooccurrenceBuildState(models.Model):
+    """
+    Progress of the incremental co-occurrence job for one restaurant: the (created_at, id)
+    watermark of the last order counted, and a version bumped on every update so serving
+    processes know when to reload their CooccurrenceModel.
+    """
+    restaurant = models.OneToOneField(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='cooccurrence_state',
+        verbose_name=_("restaurant")
+    )
+    orders_counted = models.PositiveIntegerField(_("orders counted"), default=0)
+    last_order_created_at = models.DateTimeField(_("last order placed at"), null=True, blank=True)
+    last_order_id = models.UUIDField(_("last order ID"), null=True, blank=True)
+    version = models.PositiveIntegerField(_("version"), default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("co-occurrence build state")
+        verbose_name_plural = _("co-occurrence build states")
+        db_table = "ai_engine_cooccurrence_build_states"
+
+    def __str__(self):
+        return f"Co-occurrence of {self.restaurant_id}: {self.orders_counted} orders (v{self.version})"
+
+
+class UserOrderHistory(models.Model):
+    """
+    A user's order history at one restaurant as a recommendations.order_history
+    OrderHistoryAggregate (item counts, last-ordered times, recent-items ring buffer),
+    so "order again" suggestions are a single unique-key lookup instead of loading every
+    past order. Maintained on order placement and cancellation by ai_engine.order_history.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='order_history_aggregates',
+        verbose_name=_("user")
+    )
+    restaurant = models.ForeignKey(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        related_name='user_order_histories',
+        verbose_name=_("restaurant")
+    )
+    aggregate = models.JSONField(_("aggregate"), default=dict, help_text=_("OrderHistoryAggregate.to_dict()"))
+    order_count = models.PositiveIntegerField(_("order count"), default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("user order history")
+        verbose_name_plural = _("user order histories")
+        db_table = "ai_engine_user_order_histories"
+        unique_together = [['user', 'restaurant']]
+
+    def __str__(self):
+        return f"Order history of {self.user_id} at {self.restaurant_id} ({self.order_count} orders)"
+
+
+class DaypartSlateSet(models.Model):
+    """
+    Precomputed time-of-day recommendations of one restaurant: a ranked slate of item ids
+    per daypart (breakfast, lunch, ...; see recommendations.dayparts) and the encoded
+    weekly schedule saying which slate to serve when, derived from its
+    OperatingHoursRules. Serving is this one primary-key row. Slates are refreshed
+    incrementally from new orders by ai_engine.daypart_slates, which keeps the decayed
+    per-daypart item scores and its (created_at, id) order watermark here as well.
+    """
+    restaurant = models.OneToOneField(
+        'restaurants.Restaurant',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='daypart_slates',
+        verbose_name=_("restaurant")
+    )
+    schedule = models.CharField(
+        _("schedule"),
+        max_length=672, blank=True,
+        help_text=_("DaypartSchedule.encode(): one character per quarter hour of the week")
+    )
+    slates = models.JSONField(_("slates"), default=dict, help_text=_("{daypart: [item IDs, best first]}"))
+    scores = models.JSONField(_("scores"), default=dict, help_text=_("DaypartScores.to_dict()"))
+    orders_counted = models.PositiveIntegerField(_("orders counted"), default=0)
+    last_order_created_at = models.DateTimeField(_("last order placed at"), null=True, blank=True)
+    last_order_id = models.UUIDField(_("last order ID"), null=True, blank=True)
+    version = models.PositiveIntegerField(_("version"), default=0)
+    updated_at = models.DateTimeField(_("updated at"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("daypart slate set")
+        verbose_name_plural = _("daypart slate sets")
+        db_table = "ai_engine_daypart_slate_sets"
+
+    def __str__(self):
+        return f"Daypart slates of {self.restaurant_id}: {self.orders_counted} orders (v{self.version})"
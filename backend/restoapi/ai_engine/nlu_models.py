@@ -0,0 +1,64 @@
+# backend/ai_engine/nlu_models.py
+import logging
+import threading
+import time
+
+from .models import AIModelVersion
+
+logger = logging.getLogger(__name__)
+
+# How long a worker trusts its idea of the active NLU model before asking the DB again.
+ACTIVE_MODEL_RECHECK_SECONDS = 60
+
+_lock = threading.Lock()
+_active = {"checked_at": 0.0, "version_id": None, "artifact_uri": None, "scorer": None}
+
+
+def _refresh_active_version():
+    """Re-reads the PRODUCTION_ACTIVE NLU version at most every ACTIVE_MODEL_RECHECK_SECONDS."""
+    now = time.monotonic()
+    if now - _active["checked_at"] < ACTIVE_MODEL_RECHECK_SECONDS:
+        return
+    with _lock:
+        if now - _active["checked_at"] < ACTIVE_MODEL_RECHECK_SECONDS: # Another thread refreshed it
+            return
+        version = AIModelVersion.objects.filter(
+            model_family__model_type='NLU', status='PRODUCTION_ACTIVE', artifact_uri__isnull=False
+        ).exclude(artifact_uri='').order_by('-deployed_at').only('id', 'artifact_uri').first()
+
+        if version is None:
+            _active.update(version_id=None, artifact_uri=None, scorer=None)
+        elif version.id != _active["version_id"]:
+            _active.update(version_id=version.id, artifact_uri=version.artifact_uri, scorer=None)
+        _active["checked_at"] = now
+
+
+def get_active_intent_scorer_uri():
+    """
+    Returns the artifact URI of the PRODUCTION_ACTIVE NLU model version, or None.
+    Used where the scorer is loaded elsewhere (the NLU worker processes), so this
+    process does not hold the weights itself.
+    """
+    _refresh_active_version()
+    return _active["artifact_uri"]
+
+
+def get_active_intent_scorer():
+    """
+    Returns the ScoringIntentClassifier of the PRODUCTION_ACTIVE NLU model version, or None
+    when there is none (callers then use the rule-based classifier only).
+    The artifact (.npz written by ScoringIntentClassifier.save, see the train_intent_scorer
+    command) is loaded once per version and the active version is re-checked at most
+    every ACTIVE_MODEL_RECHECK_SECONDS.
+    """
+    from nlp.scoring_classifier import ScoringIntentClassifier
+
+    _refresh_active_version()
+    with _lock:
+        if _active["scorer"] is None and _active["artifact_uri"]:
+            try:
+                _active["scorer"] = ScoringIntentClassifier.from_artifact(_active["artifact_uri"])
+            except (OSError, KeyError, ValueError) as exc:
+                logger.error("Could not load NLU artifact %s: %s", _active["artifact_uri"], exc)
+                _active.update(version_id=None, artifact_uri=None)
+        return _active["scorer"]
@@ -0,0 +1,69 @@
+# backend/ai_engine/nlu_service.py
+import atexit
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_nlu_worker_pool():
+    """
+    Returns this web process's NLUWorkerPool, starting its worker processes on first use
+    (or at startup, see NLP_WORKER_POOL_ON_STARTUP in asgi.py).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from nlp.worker_pool import NLUWorkerPool
+                _pool = NLUWorkerPool(
+                    processes=settings.NLP_WORKER_PROCESSES,
+                    max_pending=settings.NLP_WORKER_MAX_PENDING or None,
+                    timeout=settings.NLP_WORKER_TIMEOUT_SECONDS,
+                )
+                atexit.register(_pool.shutdown, wait=False)
+    return _pool
+
+
+def get_worker_pool_stats():
+    """Counters of this process's pool, or None when it has not been started."""
+    return _pool.stats() if _pool is not None else None
+
+
+def build_worker_context(restaurant_id=None, previous_intent=None, dialog_context=None) -> dict:
+    """
+    Picklable analyze() context for the worker pool: the restaurant's menu names and
+    version travel with the request (workers compile matchers once per version), and
+    the active intent scorer travels as its artifact URI.
+    Touches the database / cache, so async callers go through sync_to_async.
+    """
+    from menu.services import get_nlp_menu_snapshot
+    from .nlu_models import get_active_intent_scorer_uri
+
+    context = {
+        "previous_intent": previous_intent,
+        "dialog_context": dialog_context or {},
+        "intent_scorer_uri": get_active_intent_scorer_uri(),
+    }
+    if restaurant_id:
+        menu_version, item_names, ingredient_names = get_nlp_menu_snapshot(restaurant_id)
+        context.update(
+            restaurant_id=restaurant_id, menu_version=menu_version,
+            menu_items_master_list=item_names, ingredients_master_list=ingredient_names,
+        )
+    return context
+
+
+def analyze_query(query: str, restaurant_id=None, previous_intent=None, dialog_context=None):
+    """Blocking analysis through the worker pool (falls back to INTENT_UNKNOWN on timeout)."""
+    context = build_worker_context(restaurant_id, previous_intent, dialog_context)
+    return get_nlu_worker_pool().analyze(query, context)
+
+
+async def analyze_query_async(query: str, restaurant_id=None, previous_intent=None, dialog_context=None):
+    """Async analysis for ASGI views; the event loop never runs spaCy itself."""
+    context = await sync_to_async(build_worker_context)(restaurant_id, previous_intent, dialog_context)
+    return await get_nlu_worker_pool().analyze_async(query, context)
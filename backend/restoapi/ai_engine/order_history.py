@@ -0,0 +1,84 @@
+# backend/ai_engine/order_history.py
+import uuid
+
+from django.db import transaction
+
+from .cooccurrence import EXCLUDED_ORDER_STATUSES
+from .models import UserOrderHistory
+
+
+def _remaining_orders(user_id, restaurant_id, exclude_order_id=None):
+    """([item ids], created_at) of the user's orders at the restaurant that still count, oldest first."""
+    from orders.models import OrderItem
+
+    rows = OrderItem.objects.filter(
+        order__user_id=user_id, order__restaurant_id=restaurant_id, menu_item_original_id__isnull=False
+    ).exclude(order__status__in=EXCLUDED_ORDER_STATUSES).exclude(order_id=exclude_order_id) \
+        .order_by('order__created_at', 'order_id').values_list('order_id', 'order__created_at', 'menu_item_original_id')
+    orders = {} # order id -> ([item ids], created_at); dicts keep the chronological order
+    for order_id, created_at, menu_item_id in rows:
+        orders.setdefault(order_id, ([], created_at))[0].append(menu_item_id)
+    return list(orders.values())
+
+
+def _update_history(user_id, restaurant_id, update) -> None:
+    """Applies update(aggregate) to the stored aggregate under its row lock; update may return a replacement."""
+    from recommendations.order_history import OrderHistoryAggregate
+
+    with transaction.atomic():
+        history, _ = UserOrderHistory.objects.select_for_update().get_or_create(user_id=user_id, restaurant_id=restaurant_id)
+        aggregate = OrderHistoryAggregate.from_dict(history.aggregate, parse_id=uuid.UUID)
+        aggregate = update(aggregate) or aggregate
+        history.aggregate = aggregate.to_dict()
+        history.order_count = aggregate.order_count
+        history.save(update_fields=['aggregate', 'order_count', 'updated_at'])
+
+
+def record_order_history(user_id, restaurant_id, item_ids, ordered_at) -> None:
+    """Adds a placed order (its menu item ids) to the user's history at the restaurant."""
+    if user_id is None: # Guest order
+        return
+    _update_history(user_id, restaurant_id, lambda aggregate: aggregate.add_order(item_ids, ordered_at.timestamp()))
+
+
+def forget_order_history(order) -> None:
+    """
+    Removes a cancelled order from its user's history. Uncounting alone would leave its
+    items in the recent list and their last-ordered times, and exact removal would mean
+    storing every order in the aggregate, so the aggregate is rebuilt from the user's
+    remaining orders at the restaurant instead: one indexed query over a single user's
+    orders, paid only on cancellation, which is rare next to placing orders.
+    """
+    from recommendations.order_history import OrderHistoryAggregate
+
+    if order.user_id is None:
+        return
+
+    def rebuild(_):
+        orders = _remaining_orders(order.user_id, order.restaurant_id, exclude_order_id=order.id)
+        return OrderHistoryAggregate.from_orders(
+            (item_ids for item_ids, _ in orders), ordered_at=(created_at.timestamp() for _, created_at in orders)
+        )
+
+    _update_history(order.user_id, order.restaurant_id, rebuild)
+
+
+def get_user_order_history(user_id, restaurant_id):
+    """
+    The user's OrderHistoryAggregate at the restaurant (empty if they never ordered
+    there), keyed by the same item ids as build_menu_items_dict().
+    """
+    from recommendations.order_history import OrderHistoryAggregate
+
+    data = UserOrderHistory.objects.filter(user_id=user_id, restaurant_id=restaurant_id) \
+        .values_list('aggregate', flat=True).first()
+    return OrderHistoryAggregate.from_dict(data or {}, parse_id=uuid.UUID)
+
+
+def get_user_order_histories(user_ids, restaurant_id) -> dict:
+    """{user_id: OrderHistoryAggregate} for many users at one restaurant, in one query."""
+    from recommendations.order_history import OrderHistoryAggregate
+
+    stored = dict(UserOrderHistory.objects.filter(user_id__in=set(user_ids), restaurant_id=restaurant_id)
+                  .values_list('user_id', 'aggregate'))
+    return {user_id: OrderHistoryAggregate.from_dict(stored.get(user_id) or {}, parse_id=uuid.UUID) for user_id in user_ids}
@@ -0,0 +1,111 @@
+# backend/ai_engine/popularity.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MenuItemPopularity
+
+
+def record_ordered_items(restaurant_id, ordered_items, ordered_at=None) -> None:
+    """
+    Adds one order's items to the popularity counters.
+    ordered_items: iterable of (menu_item_id, category_id, quantity).
+    Log scores cannot be added with F() arithmetic, so the items' rows are locked
+    (created empty on an item's first order), updated in Python and written back in
+    one bulk_update: concurrent orders still never lose increments.
+    """
+    from recommendations.popularity import forward_decay_log_weight, log2_add
+
+    ordered_at = ordered_at or timezone.now()
+    quantities, categories = defaultdict(int), {}
+    for menu_item_id, category_id, quantity in ordered_items:
+        if menu_item_id is not None:
+            quantities[menu_item_id] += quantity
+            categories[menu_item_id] = category_id
+    if not quantities:
+        return
+
+    def add(row, quantity):
+        row.decayed_score = log2_add(row.decayed_score, forward_decay_log_weight(ordered_at, quantity))
+        row.order_count += quantity
+        row.category_id = categories[row.menu_item_id] # Follows the item if it moved category
+        row.last_ordered_at = ordered_at
+
+    _update_counters(restaurant_id, quantities, add, create=categories)
+
+
+def _update_counters(restaurant_id, quantities, update, create=None) -> None:
+    """
+    Applies update(row, quantity) to the MenuItemPopularity rows of quantities' items
+    under their row locks (taken in primary-key order, so concurrent orders cannot
+    deadlock). create ({item_id: category_id}) first adds empty rows for new items.
+    """
+    from recommendations.popularity import POPULARITY_EMPTY_LOG_SCORE
+
+    with transaction.atomic():
+        if create:
+            MenuItemPopularity.objects.bulk_create(
+                [MenuItemPopularity(menu_item_id=item_id, restaurant_id=restaurant_id, category_id=category_id,
+                                    decayed_score=POPULARITY_EMPTY_LOG_SCORE)
+                 for item_id, category_id in create.items()],
+                ignore_conflicts=True
+            )
+        rows = list(MenuItemPopularity.objects.select_for_update().filter(menu_item_id__in=quantities).order_by('pk'))
+        for row in rows:
+            update(row, quantities[row.menu_item_id])
+        MenuItemPopularity.objects.bulk_update(rows, ['decayed_score', 'order_count', 'category_id', 'last_ordered_at'])
+
+
+def record_order(order) -> None:
+    """Counts a placed order's items (OrderItem rows still linked to a menu item)."""
+    from menu.models import MenuItem
+
+    quantities = defaultdict(int)
+    for menu_item_id, quantity in order.items.exclude(menu_item_original_id__isnull=True) \
+            .values_list('menu_item_original_id', 'quantity'):
+        quantities[menu_item_id] += quantity
+    categories = dict(MenuItem.objects.filter(id__in=quantities).values_list('id', 'category_id'))
+    record_ordered_items(
+        order.restaurant_id,
+        [(item_id, categories[item_id], quantity) for item_id, quantity in quantities.items() if item_id in categories],
+        ordered_at=order.created_at,
+    )
+
+
+def forget_order_popularity(order) -> None:
+    """
+    Uncounts a cancelled order: subtracts its items' weighted quantities (at the order's
+    time) from their counters. last_ordered_at is left alone, as only the latest order
+    is known.
+    """
+    from recommendations.popularity import forward_decay_log_weight, log2_subtract
+
+    quantities = defaultdict(int)
+    for menu_item_id, quantity in order.items.exclude(menu_item_original_id__isnull=True) \
+            .values_list('menu_item_original_id', 'quantity'):
+        quantities[menu_item_id] += quantity
+    if not quantities:
+        return
+
+    def subtract(row, quantity):
+        row.decayed_score = log2_subtract(row.decayed_score, forward_decay_log_weight(order.created_at, quantity))
+        row.order_count = max(row.order_count - quantity, 0)
+
+    _update_counters(order.restaurant_id, quantities, subtract)
+
+
+def get_popularity_scores(restaurant_id, category_id=None, limit: int = 50, now=None) -> dict:
+    """
+    {menu_item_id: popularity decayed to now} of the restaurant's (or one category's)
+    top `limit` items, best first: an ORDER BY on the (restaurant[, category], -score)
+    index, no sorting in Python. Feeds suggest_popular_items directly.
+    """
+    from recommendations.popularity import decayed_popularity
+
+    now = now or timezone.now()
+    queryset = MenuItemPopularity.objects.filter(restaurant_id=restaurant_id, order_count__gt=0)
+    if category_id is not None:
+        queryset = queryset.filter(category_id=category_id)
+    rows = queryset.order_by('-decayed_score').values_list('menu_item_id', 'decayed_score')[:limit]
+    return {item_id: decayed_popularity(score, now) for item_id, score in rows}
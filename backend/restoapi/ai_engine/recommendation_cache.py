@@ -0,0 +1,66 @@
+# backend/ai_engine/recommendation_cache.py
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+# The menu version is part of the key: a menu, item availability, customization option
+# availability or POS stock change bumps it (menu.signals), which makes every result
+# computed from the old menu unreachable at once without deleting anything.
+RECOMMENDATION_CACHE_KEY = "reco:{rule}:{restaurant_id}:{menu_version}:{digest}"
+
+
+class RecommendationCacheStats:
+    """Per-process hit/miss counters of the recommendation result cache, by rule."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {} # rule -> [hits, misses]
+
+    def record(self, rule: str, hit: bool) -> None:
+        with self._lock:
+            self._counts.setdefault(rule, [0, 0])[0 if hit else 1] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                rule: {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses)}
+                for rule, (hits, misses) in self._counts.items()
+            }
+
+
+recommendation_cache_stats = RecommendationCacheStats()
+
+
+def make_key(rule: str, restaurant_id, menu_version: str, trigger_item_ids, num_suggestions: int, params=None) -> str:
+    """
+    Cache key of one rule call. Trigger ids keep their order (the cart order decides
+    which rule-based add-ons come first); params holds everything else the result
+    depends on (mode, metric, co-occurrence version, ...).
+    """
+    raw = repr((
+        [str(item_id) for item_id in trigger_item_ids],
+        num_suggestions,
+        sorted((name, str(value)) for name, value in (params or {}).items()),
+    ))
+    return RECOMMENDATION_CACHE_KEY.format(
+        rule=rule, restaurant_id=restaurant_id, menu_version=menu_version,
+        digest=hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+    )
+
+
+def get_or_compute(rule: str, restaurant_id, menu_version: str, trigger_item_ids, num_suggestions: int,
+                   compute, params=None):
+    """
+    Returns (item_ids, cache_hit). compute() -> list of recommended item ids is only
+    called on a miss; only ids are stored, callers map them back to menu_items_dict.
+    """
+    key = make_key(rule, restaurant_id, menu_version, trigger_item_ids, num_suggestions, params)
+    item_ids = cache.get(key)
+    hit = item_ids is not None
+    if not hit:
+        item_ids = list(compute())
+        cache.set(key, item_ids, timeout=settings.RECOMMENDATION_CACHE_TTL_SECONDS)
+    recommendation_cache_stats.record(rule, hit)
+    return item_ids, hit
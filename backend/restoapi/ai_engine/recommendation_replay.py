@@ -0,0 +1,220 @@
+# backend/ai_engine/recommendation_replay.py
+"""
+Offline replay of logged recommendation requests (RecommendationLog and its
+RecommendationInteractions) through candidate strategies; the metrics themselves live
+in recommendations.evaluation. Driven by `manage.py replay_recommendations`.
+
+Known approximations:
+- Availability history is not recorded, so a request is replayed against the menu as of
+  the end of its day: items created later are left out, the others keep their current
+  availability (and OUT_OF_STOCK triggers are ranked like similar items).
+- Popularity, co-occurrence and order-history inputs are the current ones, which leaks
+  later orders into old requests; compare strategies using them over recent windows.
+"""
+import uuid
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import RecommendationLog, RecommendationInteraction
+
+# Logged trigger type -> the rule a strategy answers it with
+TRIGGER_RULES = {
+    'ITEM_VIEW': 'similar',
+    'OUT_OF_STOCK': 'similar',
+    'CART_VIEW': 'add_ons',
+    'POST_ORDER': 'add_ons',
+    'HOMEPAGE': 'popular',
+    'USER_PROFILE': 'order_again',
+}
+# "rules" / "jaccard" / "cosine": similar-item mode (with lift / confidence add-ons for
+# the latter two); "popular": the popularity ranking for every trigger.
+REPLAY_STRATEGIES = ('rules', 'jaccard', 'cosine', 'popular')
+
+
+def _parse_item_id(value):
+    """Menu item id of a logged value (UUID string, or a {"id"/"item_id": ...} dict); None if unusable."""
+    if isinstance(value, dict):
+        value = value.get('id') or value.get('item_id')
+    if value is None:
+        return None
+    try:
+        return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _item_ids(values) -> list:
+    if not isinstance(values, list):
+        return []
+    return [item_id for item_id in map(_parse_item_id, values) if item_id is not None]
+
+
+def replay_queryset(since=None, until=None, restaurant_id=None, trigger_types=None):
+    """Logs to replay: dates are inclusive, logs without a restaurant are skipped."""
+    queryset = RecommendationLog.objects.filter(restaurant__isnull=False)
+    if since:
+        queryset = queryset.filter(timestamp__date__gte=since)
+    if until:
+        queryset = queryset.filter(timestamp__date__lte=until)
+    if restaurant_id:
+        queryset = queryset.filter(restaurant_id=restaurant_id)
+    if trigger_types:
+        queryset = queryset.filter(trigger_type__in=trigger_types)
+    return queryset
+
+
+def iter_replay_events(queryset, chunk_size: int = 2000, limit: int = None):
+    """
+    Streams a ReplayEvent per log of queryset in (timestamp, id) order: logs are read
+    chunk_size at a time, with one interaction query per chunk.
+    """
+    queryset = queryset.order_by('timestamp', 'id').values_list(
+        'id', 'restaurant_id', 'user_id', 'trigger_type', 'trigger_item_id', 'timestamp',
+        'context_items', 'recommended_items'
+    )
+    if limit:
+        queryset = queryset[:limit]
+    chunk = []
+    for log in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(log)
+        if len(chunk) >= chunk_size:
+            yield from _chunk_events(chunk)
+            chunk = []
+    if chunk:
+        yield from _chunk_events(chunk)
+
+
+def _chunk_events(logs):
+    from recommendations.evaluation import ReplayEvent
+
+    clicked, added = {}, {}
+    interactions = RecommendationInteraction.objects.filter(
+        recommendation_log_id__in=[log[0] for log in logs], item__isnull=False,
+        interaction_type__in=['CLICK', 'ADD_TO_CART']
+    ).values_list('recommendation_log_id', 'item_id', 'interaction_type')
+    for log_id, item_id, interaction_type in interactions:
+        (clicked if interaction_type == 'CLICK' else added).setdefault(log_id, set()).add(item_id)
+
+    for log_id, restaurant_id, user_id, trigger_type, trigger_item_id, timestamp, context, shown in logs:
+        yield ReplayEvent(
+            log_id=log_id, restaurant_id=restaurant_id, trigger_type=trigger_type, timestamp=timestamp,
+            user_id=user_id, trigger_item_id=trigger_item_id,
+            context_item_ids=_item_ids(context),
+            shown_item_ids=_item_ids(shown),
+            clicked_item_ids=clicked.get(log_id, set()),
+            added_item_ids=added.get(log_id, set()),
+        )
+
+
+class ReplayMenus:
+    """
+    (MenuSnapshot, MenuIndex, ItemSimilarity or None) of a restaurant's menu as of the
+    end of a given day, built on first use. Events arrive in time order, so keeping the
+    latest day per restaurant builds each (restaurant, day) menu once.
+    """
+
+    def __init__(self, with_similarity: bool = True, max_entries: int = 64):
+        from recommendations.cache import VersionedRegistry
+
+        self.with_similarity = with_similarity
+        self._registry = VersionedRegistry(max_entries)
+
+    def get(self, restaurant_id, moment):
+        day = timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+        return self._registry.get_or_build(restaurant_id, day, lambda: self._build(restaurant_id, day))
+
+    def _build(self, restaurant_id, day):
+        from recommendations.menu_index import MenuIndex
+        from recommendations.similarity import ItemSimilarity
+        from .recommendation_service import build_menu_snapshot
+
+        end_of_day = datetime.combine(day + timedelta(days=1), dt_time.min)
+        if settings.USE_TZ:
+            end_of_day = timezone.make_aware(end_of_day)
+        snapshot = build_menu_snapshot(restaurant_id, created_before=end_of_day)
+        return snapshot, MenuIndex(snapshot), ItemSimilarity(snapshot) if self.with_similarity else None
+
+
+def build_strategies(names, k: int = 3):
+    """
+    ({name: strategy(event) -> recommended item ids}, prepare(event)) for names out of
+    REPLAY_STRATEGIES. The strategies share the replayed menus and learned inputs;
+    prepare loads the ones an event needs, so evaluate() can do it outside the timed calls.
+    """
+    from recommendations import rule_based_recommender as rules
+    from .cooccurrence import get_cooccurrence_model
+    from .order_history import get_user_order_history
+    from .popularity import get_popularity_scores
+
+    unknown = set(names) - set(REPLAY_STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown replay strategies: {', '.join(sorted(unknown))}.")
+
+    menus = ReplayMenus(with_similarity=bool({'jaccard', 'cosine'} & set(names)))
+    # Learned inputs, fetched once per restaurant (or user) for the whole run
+    popularity, cooccurrence, histories = {}, {}, {}
+
+    def popularity_scores(restaurant_id):
+        if restaurant_id not in popularity:
+            popularity[restaurant_id] = get_popularity_scores(restaurant_id, limit=max(k * 10, 50))
+        return popularity[restaurant_id]
+
+    def cooccurrence_model(restaurant_id):
+        if restaurant_id not in cooccurrence:
+            cooccurrence[restaurant_id] = get_cooccurrence_model(restaurant_id)
+        return cooccurrence[restaurant_id]
+
+    def order_history(user_id, restaurant_id):
+        key = (user_id, restaurant_id)
+        if key not in histories:
+            histories[key] = get_user_order_history(user_id, restaurant_id)
+        return histories[key]
+
+    by_trigger = bool(set(names) - {'popular'}) # Some strategy answers with the trigger's rule
+
+    def prepare(event):
+        menus.get(event.restaurant_id, event.timestamp)
+        rule = TRIGGER_RULES.get(event.trigger_type) if by_trigger else None
+        if rule == 'popular' or 'popular' in names:
+            popularity_scores(event.restaurant_id)
+        if rule == 'add_ons':
+            cooccurrence_model(event.restaurant_id)
+        if rule == 'order_again' and event.user_id:
+            order_history(event.user_id, event.restaurant_id)
+
+    def make_strategy(name):
+        mode = name if name in ('jaccard', 'cosine') else "rules"
+        metric = "confidence" if name == 'cosine' else "lift"
+
+        def strategy(event):
+            snapshot, menu_index, similarity = menus.get(event.restaurant_id, event.timestamp)
+            rule = 'popular' if name == 'popular' else TRIGGER_RULES.get(event.trigger_type)
+            if rule == 'similar':
+                if event.trigger_item_id is None:
+                    return []
+                items = rules.suggest_similar_items(
+                    event.trigger_item_id, snapshot, k, menu_index=menu_index, mode=mode, similarity=similarity
+                )
+            elif rule == 'add_ons':
+                items = rules.suggest_add_ons(
+                    event.context_item_ids, snapshot, num_suggestions=k,
+                    cooccurrence=cooccurrence_model(event.restaurant_id), metric=metric
+                )
+            elif rule == 'popular':
+                items = rules.suggest_popular_items(snapshot, popularity_scores(event.restaurant_id), k)
+            elif rule == 'order_again' and event.user_id:
+                items = rules.suggest_from_past_orders(order_history(event.user_id, event.restaurant_id), snapshot, k)
+            else:
+                items = []
+            return [item['id'] for item in items]
+        return strategy
+
+    return {name: make_strategy(name) for name in names}, prepare
+
+
+def build_cold_strategy(name, k: int = 3):
+    """(strategy, prepare) for one strategy with inputs of its own, for evaluate()'s memory pass."""
+    strategies, prepare = build_strategies([name], k=k)
+    return strategies[name], prepare
@@ -0,0 +1,307 @@
+# backend/ai_engine/recommendation_service.py
+import os
+import shutil
+
+from django.conf import settings
+
+from menu.models import MenuItem
+from menu.versioning import get_menu_version
+
+
+def _menu_rows(restaurant_id, created_before=None):
+    """
+    (id, name, category_id, price, is_available, tags, ingredients) per menu item, in
+    menu display order, plus {category_id: name}. Ingredients come from
+    ingredients_display_text (comma-separated). created_before: only items that
+    existed at that moment (for replaying old requests).
+    """
+    items = MenuItem.objects.filter(restaurant_id=restaurant_id)
+    if created_before is not None:
+        items = items.filter(created_at__lt=created_before)
+    items = items.select_related('category').only(
+        'id', 'name', 'category_id', 'category__name', 'category__is_active', 'base_price',
+        'ingredients_display_text', 'is_manually_hidden_by_admin'
+    ).order_by('category__display_order', 'display_order', 'name')
+    rows, category_names = [], {}
+    for item in items:
+        ingredients = [part.strip().lower() for part in (item.ingredients_display_text or '').split(',') if part.strip()]
+        category_names[item.category_id] = item.category.name
+        rows.append((
+            item.id, item.name, item.category_id, float(item.base_price),
+            item.category.is_active and item.effective_is_available,
+            [], # No tag model yet
+            ingredients,
+        ))
+    return rows, category_names
+
+
+def build_menu_items_dict(restaurant_id) -> dict:
+    """
+    Restaurant menu in the shape the recommendations package expects:
+    {item_id: {'id', 'name', 'category', 'category_name', 'tags', 'ingredients', 'price', 'is_available'}},
+    in menu display order.
+    """
+    rows, category_names = _menu_rows(restaurant_id)
+    return {
+        item_id: {
+            'id': item_id,
+            'name': name,
+            'category': category_id,
+            'category_name': category_names[category_id],
+            'tags': tags,
+            'ingredients': ingredients,
+            'price': price,
+            'is_available': is_available,
+        }
+        for item_id, name, category_id, price, is_available, tags, ingredients in rows
+    }
+
+
+def build_menu_snapshot(restaurant_id, created_before=None):
+    """The restaurant's menu as a columnar MenuSnapshot, built straight from the menu models."""
+    from recommendations.snapshot import MenuSnapshot
+
+    rows, category_names = _menu_rows(restaurant_id, created_before=created_before)
+    return MenuSnapshot.from_rows(rows, category_names=category_names)
+
+
+def get_restaurant_menu_snapshot(restaurant_id, menu_version=None):
+    """
+    Returns the MenuSnapshot of the restaurant's current menu version, held per process.
+    With settings.RECOMMENDER_SNAPSHOT_DIR set, the first process to need a version
+    saves it there and every process memory-maps the same files, so the arrays are
+    shared instead of rebuilt from the database by each worker.
+    """
+    from recommendations.snapshot import snapshot_registry
+
+    menu_version = menu_version or get_menu_version(restaurant_id)
+    return snapshot_registry.get_or_build(
+        restaurant_id, menu_version, lambda: _load_or_build_snapshot(restaurant_id, menu_version)
+    )
+
+
+def _load_or_build_snapshot(restaurant_id, menu_version):
+    from recommendations.snapshot import MenuSnapshot
+
+    snapshot_dir = settings.RECOMMENDER_SNAPSHOT_DIR
+    if not snapshot_dir:
+        return build_menu_snapshot(restaurant_id)
+    restaurant_dir = os.path.join(snapshot_dir, str(restaurant_id))
+    path = os.path.join(restaurant_dir, str(menu_version))
+    if not os.path.isdir(path):
+        build_menu_snapshot(restaurant_id).save(path)
+        _remove_older_snapshots(restaurant_dir, menu_version)
+    try:
+        return MenuSnapshot.load(path, mmap=True)
+    except FileNotFoundError:
+        # A process that already saw a newer menu version removed this one meanwhile
+        return build_menu_snapshot(restaurant_id)
+
+
+def _version_order(menu_version):
+    """(restaurant counter, global counter) of a menu version; None for anything else (e.g. staging dirs)."""
+    try:
+        return tuple(int(part) for part in str(menu_version).split('.'))
+    except ValueError:
+        return None
+
+
+def _remove_older_snapshots(restaurant_dir, menu_version) -> None:
+    """
+    Removes saved snapshots of versions older than menu_version (both counters only grow).
+    Newer ones are left alone: they belong to processes that saw a later menu edit than
+    this one. Processes still mapping a removed version keep their pages.
+    """
+    current = _version_order(menu_version)
+    if current is None:
+        return
+    for name in os.listdir(restaurant_dir):
+        order = _version_order(name)
+        if order is not None and order != current and len(order) == len(current) \
+                and all(saved <= now for saved, now in zip(order, current)):
+            shutil.rmtree(os.path.join(restaurant_dir, name), ignore_errors=True)
+
+
+def get_restaurant_menu_index(restaurant_id):
+    """
+    Returns the MenuIndex of the restaurant's current menu version; its .items is the
+    MenuSnapshot (a menu_items_dict-compatible mapping) to pass to the rule functions
+    alongside it. The database is only read on the first call after a menu change
+    (per process, or per host with RECOMMENDER_SNAPSHOT_DIR).
+    """
+    from recommendations.menu_index import get_menu_index
+
+    menu_version = get_menu_version(restaurant_id)
+    return get_menu_index(
+        restaurant_id, menu_version, lambda: get_restaurant_menu_snapshot(restaurant_id, menu_version)
+    )
+
+
+def get_restaurant_item_similarity(restaurant_id):
+    """
+    Returns the ItemSimilarity (sparse item x category/tag/ingredient matrix) of the
+    restaurant's current menu version, for the "jaccard" / "cosine" rule modes.
+    Built from the same cached MenuSnapshot as get_restaurant_menu_index().
+    """
+    from recommendations.similarity import get_item_similarity
+
+    return get_item_similarity(
+        restaurant_id, get_menu_version(restaurant_id), lambda: get_restaurant_menu_index(restaurant_id).items
+    )
+
+
+def _cached_rule(rule, restaurant_id, trigger_item_ids, num_suggestions, run_rule, params=None):
+    """
+    Runs run_rule(menu_index) -> [item details] through the recommendation result cache
+    (keyed by the current menu version). Returns (item details, cache_hit); hits only
+    map the stored ids back through the in-process menu index.
+    """
+    from .recommendation_cache import get_or_compute
+
+    menu_version = get_menu_version(restaurant_id)
+    menu_index = get_restaurant_menu_index(restaurant_id)
+    item_ids, cache_hit = get_or_compute(
+        rule, restaurant_id, menu_version, trigger_item_ids, num_suggestions,
+        lambda: [item['id'] for item in run_rule(menu_index)], params=params
+    )
+    return [menu_index.items[item_id] for item_id in item_ids if item_id in menu_index.items], cache_hit
+
+
+def recommend_similar_items(restaurant_id, item_id, num_suggestions: int = 3, mode: str = "rules"):
+    """(similar items, cache_hit) for an item page; mode as in suggest_similar_items."""
+    from recommendations.rule_based_recommender import suggest_similar_items
+
+    return _cached_rule(
+        'similar', restaurant_id, [item_id], num_suggestions,
+        lambda menu_index: suggest_similar_items(
+            item_id, menu_index.items, num_suggestions, menu_index=menu_index, mode=mode,
+            similarity=get_restaurant_item_similarity(restaurant_id) if mode != "rules" else None
+        ),
+        params={'mode': mode}
+    )
+
+
+def recommend_alternatives(restaurant_id, item_id, num_suggestions: int = 3, mode: str = "rules"):
+    """(available alternatives, cache_hit) for an out-of-stock item."""
+    from recommendations.rule_based_recommender import suggest_alternatives_for_out_of_stock
+
+    return _cached_rule(
+        'alternatives', restaurant_id, [item_id], num_suggestions,
+        lambda menu_index: suggest_alternatives_for_out_of_stock(
+            item_id, menu_index.items, num_suggestions, menu_index=menu_index, mode=mode,
+            similarity=get_restaurant_item_similarity(restaurant_id) if mode != "rules" else None
+        ),
+        params={'mode': mode}
+    )
+
+
+def suggest_cart_add_ons(restaurant_id, cart_item_ids, num_suggestions: int = 3, metric: str = "lift"):
+    """
+    (add-on items, cache_hit) for a cart, learned from the restaurant's order
+    co-occurrence (see ai_engine.cooccurrence); only available items of the current menu.
+    """
+    from recommendations.rule_based_recommender import suggest_add_ons
+    from .cooccurrence import get_cooccurrence_model, get_cooccurrence_version
+
+    return _cached_rule(
+        'add_ons', restaurant_id, cart_item_ids, num_suggestions,
+        lambda menu_index: suggest_add_ons(
+            cart_item_ids, menu_index.items, num_suggestions=num_suggestions,
+            cooccurrence=get_cooccurrence_model(restaurant_id), metric=metric
+        ),
+        params={'metric': metric, 'cooccurrence': get_cooccurrence_version(restaurant_id)}
+    )
+
+
+def log_recommendations(trigger_type, restaurant_id, items, cache_hit=None, user=None, tenant_id=None,
+                        session_id=None, trigger_item_id=None, context_item_ids=None, processing_time_ms=None):
+    """
+    Records a served recommendation list as a RecommendationLog row. cache_hit is the one
+    the cached functions above return (None for uncached rules), so hit ratios per
+    trigger type can be read next to the logs (RecommendationCacheStatsView).
+    """
+    from .models import RecommendationLog
+
+    return RecommendationLog.objects.create(
+        trigger_type=trigger_type,
+        restaurant_id=restaurant_id,
+        tenant_id=tenant_id,
+        user=user if user is not None and user.is_authenticated else None,
+        session_id=session_id,
+        trigger_item_id=trigger_item_id,
+        context_items=[str(item_id) for item_id in context_item_ids] if context_item_ids is not None else None,
+        recommended_items=[{'id': str(item['id']), 'name': item['name']} for item in items],
+        displayed_count=len(items),
+        cache_hit=cache_hit,
+        processing_time_ms=processing_time_ms,
+    )
+
+
+def suggest_order_again(user_id, restaurant_id, num_suggestions: int = 5, strategy: str = "frequent") -> list:
+    """
+    "Order again" items for a user at a restaurant ("frequent" or "recent"), read from
+    the stored UserOrderHistory aggregate; only available items of the current menu.
+    """
+    from recommendations.rule_based_recommender import suggest_from_past_orders
+    from .order_history import get_user_order_history
+
+    return suggest_from_past_orders(
+        get_user_order_history(user_id, restaurant_id), get_restaurant_menu_index(restaurant_id).items,
+        num_suggestions=num_suggestions, strategy=strategy
+    )
+
+
+def suggest_for_time_of_day(restaurant_id, num_suggestions: int = 5, now=None):
+    """
+    (daypart, items) of the restaurant's precomputed slate for the current time of day
+    (see ai_engine.daypart_slates), only available items of the current menu.
+    """
+    from recommendations.rule_based_recommender import suggest_for_daypart
+    from .daypart_slates import get_daypart_slate
+
+    daypart, slate_item_ids = get_daypart_slate(restaurant_id, now=now)
+    if not slate_item_ids:
+        return daypart, []
+    return daypart, suggest_for_daypart(slate_item_ids, get_restaurant_menu_index(restaurant_id).items, num_suggestions)
+
+
+BATCH_RULES = ('similar', 'alternatives', 'add_ons', 'order_again')
+
+
+def recommend_batch(rule: str, restaurant_id, targets, num_suggestions: int = 3, mode: str = "rules",
+                    metric: str = "lift", strategy: str = "frequent") -> list:
+    """
+    One rule for many targets at a restaurant, results (lists of item details) in input
+    order. targets are item ids ('similar', 'alternatives'), carts as lists of item ids
+    ('add_ons') or user ids ('order_again'). The menu index, similarity matrix and
+    co-occurrence model are loaded once and shared by the whole batch; the per-request
+    result cache is bypassed.
+    """
+    from recommendations import rule_based_recommender as rules
+
+    if rule not in BATCH_RULES:
+        raise ValueError(f"rule must be one of {BATCH_RULES}.")
+    menu_index = get_restaurant_menu_index(restaurant_id)
+    menu_items_dict = menu_index.items
+    similarity = get_restaurant_item_similarity(restaurant_id) if mode != "rules" else None
+
+    if rule == 'similar':
+        return rules.suggest_similar_items_batch(
+            targets, menu_items_dict, num_suggestions, menu_index=menu_index, mode=mode, similarity=similarity
+        )
+    if rule == 'alternatives':
+        return rules.suggest_alternatives_for_out_of_stock_batch(
+            targets, menu_items_dict, num_suggestions, menu_index=menu_index, mode=mode, similarity=similarity
+        )
+    if rule == 'add_ons':
+        from .cooccurrence import get_cooccurrence_model
+        return rules.suggest_add_ons_batch(
+            targets, menu_items_dict, num_suggestions=num_suggestions,
+            cooccurrence=get_cooccurrence_model(restaurant_id), metric=metric
+        )
+    from .order_history import get_user_order_histories
+    histories = get_user_order_histories(targets, restaurant_id)
+    return [
+        rules.suggest_from_past_orders(histories[user_id], menu_items_dict, num_suggestions, strategy=strategy)
+        for user_id in targets
+    ]
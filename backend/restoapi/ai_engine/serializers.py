@@ -112,7 +112,7 @@ class RecommendationLogSerializer(serializers.ModelSerializer):
             'ai_model_version', 'processing_time_ms',
             'trigger_type', 'trigger_type_display',
             'trigger_item', 'context_items',
-            'recommended_items', 'displayed_count',
+            'recommended_items', 'displayed_count', 'cache_hit',
             'request_payload', 'response_payload'
         ]
         read_only_fields = fields
@@ -174,4 +174,55 @@ class AIFeedbackCreateSerializer(serializers.ModelSerializer):
 class AIFeedbackUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = AIFeedback
-        fields = ['processed']
\ No newline at end of file
+        fields = ['processed']
+
+
+# --- Runtime NLU Serializers ---
+class NLUBatchAnalyzeRequestSerializer(serializers.Serializer):
+    queries = serializers.ListField(
+        child=serializers.CharField(allow_blank=True, max_length=1000),
+        allow_empty=False,
+        max_length=5000
+    )
+    restaurant_id = serializers.UUIDField(required=False, allow_null=True)
+    previous_intent = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    dialog_context = serializers.DictField(required=False, default=dict)
+
+class NLUAnalyzeRequestSerializer(serializers.Serializer):
+    query = serializers.CharField(allow_blank=True, max_length=1000)
+    restaurant_id = serializers.UUIDField(required=False, allow_null=True)
+    previous_intent = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    dialog_context = serializers.DictField(required=False, default=dict)
+
+class RecommendationBatchRequestSerializer(serializers.Serializer):
+    RULE_CHOICES = ['similar', 'alternatives', 'add_ons', 'order_again']
+
+    restaurant_id = serializers.UUIDField()
+    rule = serializers.ChoiceField(choices=RULE_CHOICES)
+    # Item / user ids, or carts (lists of item ids) for rule=add_ons
+    targets = serializers.ListField(allow_empty=False, max_length=5000)
+    num_suggestions = serializers.IntegerField(min_value=1, max_value=50, default=3)
+    mode = serializers.ChoiceField(choices=['rules', 'jaccard', 'cosine'], default='rules')
+    metric = serializers.ChoiceField(choices=['lift', 'confidence', 'count'], default='lift')
+    strategy = serializers.ChoiceField(choices=['frequent', 'recent'], default='frequent')
+
+    def validate(self, data):
+        id_field = serializers.UUIDField()
+        if data['rule'] == 'add_ons':
+            if not all(isinstance(cart, list) for cart in data['targets']):
+                raise serializers.ValidationError({"targets": "Each target must be a cart (list of item IDs)."})
+            data['targets'] = [[id_field.to_internal_value(item_id) for item_id in cart] for cart in data['targets']]
+        else: # Item ids, or user ids for rule=order_again
+            data['targets'] = [id_field.to_internal_value(item_id) for item_id in data['targets']]
+        return data
+
+class NLUResultSerializer(serializers.Serializer):
+    query = serializers.CharField()
+    processed_query = serializers.CharField(allow_blank=True)
+    intent = serializers.CharField()
+    intent_confidence = serializers.FloatField(allow_null=True)
+    ranked_intents = serializers.ListField(child=serializers.ListField()) # [[intent, confidence], ...]
+    entities = serializers.DictField()
+    timings_ms = serializers.DictField(child=serializers.FloatField())
+    cache_hit = serializers.BooleanField()
+    fallback_reason = serializers.CharField(allow_null=True)
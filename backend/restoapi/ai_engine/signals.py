@@ -0,0 +1,15 @@
+# backend/ai_engine/signals.py
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from restaurants.models import OperatingHoursRule
+
+
+@receiver([post_save, post_delete], sender=OperatingHoursRule)
+def operating_hours_changed(sender, instance, **kwargs):
+    """Opening hours decide which daypart slate is served when; refresh the stored schedule."""
+    from .daypart_slates import refresh_daypart_schedule
+
+    restaurant_id = instance.restaurant_id
+    transaction.on_commit(lambda: refresh_daypart_schedule(restaurant_id))
@@ -1,3 +1,382 @@
-from django.test import TestCase
+import math
+import os
+import random
+import tempfile
+import uuid
+from datetime import timedelta
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase
+
+from benchmarks.menus import synthetic_ingredients
+from nlp.cache import NLUResultCache
+from nlp.fuzzy_index import TrigramIndex, bounded_edit_distance
+from nlp.intent_classifier import (
+    INTENT_CANCEL_ORDER, INTENT_GET_ORDER_STATUS, INTENT_NEGATIVE, INTENT_VIEW_MENU, classify_intent_from_lemmas,
+)
+from nlp.keyword_matcher import KeywordAutomaton
+from nlp.pipeline import NLUResult, _classify_and_extract
+from nlp.scoring_classifier import ScoringIntentClassifier
+from recommendations.cache import VersionedRegistry
+from recommendations.cooccurrence import CooccurrenceModel, basket_pair_counts, prune_pairs
+from recommendations.dayparts import DaypartSchedule, DaypartScores, encoded_daypart_at
+from recommendations.popularity import (
+    POPULARITY_DECAY_LANDMARK, POPULARITY_EMPTY_LOG_SCORE, POPULARITY_HALF_LIFE_HOURS, _half_life_hours,
+    decayed_popularity, forward_decay_log_weight, log2_add, log2_subtract,
+)
+from recommendations.rule_based_recommender import (
+    suggest_add_ons, suggest_alternatives_for_out_of_stock, suggest_from_past_orders, suggest_popular_items,
+    suggest_similar_items,
+)
+from recommendations.snapshot import MenuSnapshot
+
+
+class TrigramIndexFindTests(SimpleTestCase):
+    def setUp(self):
+        self.index = TrigramIndex([
+            'Rice', 'Cola', 'Margherita Pizza', 'Margherita Pizza Large', 'Pepperoni Pizza', 'Sushi', 'Water',
+            'Pasta', 'Onion', 'Chicken Burger', 'Chicken Burger Deluxe',
+        ])
+
+    def test_ordinary_words_do_not_match_short_names(self):
+        self.assertEqual(self.index.find("nice to meet you".split()), [])
+        self.assertEqual(self.index.find("i want a cold drink".split()), [])
+        self.assertEqual(self.index.find("see you later".split()), [])
+        self.assertEqual(self.index.find("can you paste the link".split()), [])
+        self.assertEqual(self.index.find("any union".split()), [])
+
+    def test_short_names_match_exactly(self):
+        self.assertEqual(self.index.find("two cola and a water".split()), [('Cola', 1, 2), ('Water', 4, 5)])
+        self.assertEqual(self.index.find("sushy".split()), [])
+
+    def test_common_words_alone_are_not_matched(self):
+        self.assertEqual(self.index.find("where are you".split()), [])
+
+    def test_typos_in_longer_names_match(self):
+        self.assertEqual(self.index.find("one margarita piza please".split()), [('Margherita Pizza', 1, 3)])
+        self.assertEqual(self.index.find("pepperony pizza".split()), [('Pepperoni Pizza', 0, 2)])
+
+    def test_longest_phrase_wins_between_equal_distances(self):
+        self.assertEqual(self.index.find("one margerita pizza large".split()), [('Margherita Pizza Large', 1, 4)])
+        self.assertEqual(self.index.find("a chiken burger deluxe".split()), [('Chicken Burger Deluxe', 1, 4)])
+        self.assertEqual(self.index.find("a chiken burger".split()), [('Chicken Burger', 1, 3)])
+
+    def test_phrase_split_into_an_extra_word_matches(self):
+        self.assertEqual(self.index.find("pepper oni pizza".split()), [('Pepperoni Pizza', 0, 3)])
+
+    def test_bounded_edit_distance_stops_past_the_bound(self):
+        self.assertEqual(bounded_edit_distance("margarita", "margherita", 2), 2)
+        self.assertEqual(bounded_edit_distance("sushi", "pizza", 1), 2)
+
+
+class KeywordAutomatonTests(SimpleTestCase):
+    def test_overlapping_keywords_are_all_reported(self):
+        automaton = KeywordAutomaton({"status": ["where is my", "my"], "order": ["is my order", "order"]})
+        hits = sorted(automaton.find_all("where is my order".split()), key=lambda hit: (hit[2], hit[3]))
+        self.assertEqual(hits, [
+            ("status", "where is my", 0, 3), ("order", "is my order", 1, 4),
+            ("status", "my", 2, 3), ("order", "order", 3, 4),
+        ])
+
+    def test_a_failed_phrase_restarts_from_its_suffix(self):
+        automaton = KeywordAutomaton({"status": ["where is my"], "cancel": ["change my mind"]})
+        words = "where is where is my order i change my mind".split()
+        self.assertEqual(list(automaton.find_all(words)), [("status", "where is my", 2, 5), ("cancel", "change my mind", 7, 10)])
+        self.assertEqual(automaton.match_labels("is my".split(), "my mind".split()), {})
+
+    def test_keywords_match_the_lemmas_or_the_surface_words(self):
+        automaton = KeywordAutomaton({"negative": ["don't", "do not"], "order": ["order"]})
+        self.assertEqual(automaton.match_labels(["do", "not"], ["don't"]), {"negative": {"don't", "do not"}})
+        self.assertEqual(automaton.match_labels(["order"], ["orders"]), {"order": {"order"}})
+
+
+class KeywordIntentTests(SimpleTestCase):
+    """Lemmas are given as spaCy produces them, so these run without a model."""
+
+    def classify(self, query, lemmas, previous_intent=None):
+        return classify_intent_from_lemmas(query, query.lower(), lemmas, previous_intent)
+
+    def test_do_not_and_dont_are_negative(self):
+        self.assertEqual(self.classify("No, do not", ["no", ",", "do", "not"]), INTENT_NEGATIVE)
+        self.assertEqual(self.classify("don't", ["do", "not"]), INTENT_NEGATIVE)
+
+    def test_phrase_keywords_pick_their_intent(self):
+        self.assertEqual(self.classify("Where is my order?", ["where", "be", "my", "order"]), INTENT_GET_ORDER_STATUS)
+        self.assertEqual(self.classify("I changed my mind", ["I", "change", "my", "mind"], previous_intent="addToCart"),
+                         INTENT_CANCEL_ORDER)
+        # "have" alone is an order keyword; the menu phrase is checked first
+        self.assertEqual(self.classify("Can I see what you have", ["can", "I", "see", "what", "you", "have"]),
+                         INTENT_VIEW_MENU)
+
+
+class ScoringIntentClassifierTests(SimpleTestCase):
+    SAMPLES = [
+        (["where", "be", "my", "order"], "getOrderStatus"),
+        (["track", "my", "order"], "getOrderStatus"),
+        (["show", "me", "the", "menu"], "viewMenu"),
+        (["what", "be", "on", "the", "menu"], "viewMenu"),
+        (["i", "want", "a", "pizza"], "orderFood"),
+        (["get", "me", "two", "burger"], "orderFood"),
+    ]
+
+    def setUp(self):
+        self.scorer = ScoringIntentClassifier.fit(self.SAMPLES, n_features=2 ** 10)
+
+    def test_fit_ranks_the_trained_intent_first(self):
+        ranked = self.scorer.rank(["where", "be", "my", "pizza", "order"])
+        self.assertEqual(ranked[0][0], "getOrderStatus")
+        self.assertAlmostEqual(sum(confidence for _, confidence in ranked), 1.0, places=5)
+        self.assertEqual(self.scorer.rank(["show", "the", "menu"], top_k=1)[0][0], "viewMenu")
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scorer.npz")
+            self.scorer.save(path)
+            loaded = ScoringIntentClassifier.from_artifact(path)
+        self.assertEqual(loaded.intents, self.scorer.intents)
+        self.assertEqual(loaded.max_ngram, self.scorer.max_ngram)
+        self.assertEqual(loaded.version, self.scorer.version)
+        for lemmas, _ in self.SAMPLES:
+            self.assertEqual(loaded.rank(lemmas), self.scorer.rank(lemmas))
+
+    def test_low_confidence_falls_back_to_the_rules(self):
+        from spacy import blank
+        from spacy.tokens import Doc
+
+        # Unseen words score near the priors (1/3 each), below the default threshold
+        doc = Doc(blank("en").vocab, words=["yes", "please"], lemmas=["yes", "please"])
+        intent, confidence, ranked, _ = _classify_and_extract("yes please", "yes please", doc,
+                                                              {"intent_scorer": self.scorer}, {})
+        self.assertEqual((intent, confidence), ("affirmative", None))
+        self.assertLess(ranked[0][1], 0.5)
+        intent, confidence, _, _ = _classify_and_extract("yes please", "yes please", doc,
+                                                         {"intent_scorer": self.scorer, "min_intent_confidence": 0.0}, {})
+        self.assertEqual((intent, confidence), ranked[0])
+
+
+class NLUResultCacheTests(SimpleTestCase):
+    def test_keys_without_a_restaurant_depend_on_the_menu_names(self):
+        context = {"menu_items_master_list": ["Margherita Pizza", "Cola"]}
+        key = NLUResultCache.make_key("two cola", context)
+        self.assertEqual(key, NLUResultCache.make_key("two cola", {"menu_items_master_list": ["Margherita Pizza", "Cola"]}))
+        self.assertNotEqual(key, NLUResultCache.make_key("two cola", {"menu_items_master_list": ["Margherita Pizza"]}))
+
+    def test_put_stores_a_copy(self):
+        cache = NLUResultCache()
+        key = NLUResultCache.make_key("two cola", {"restaurant_id": 1, "menu_version": "3.7"})
+        result = NLUResult(query="two cola", processed_query="two cola", intent="ORDER_ITEM",
+                           entities={"items": [{"name": "Cola", "quantity": 2}]})
+        cache.put(key, result)
+        result.entities["items"][0]["quantity"] = 5
+        self.assertEqual(cache.get(key).entities, {"items": [{"name": "Cola", "quantity": 2}]})
+
+
+class VersionedRegistryTests(SimpleTestCase):
+    def test_a_new_menu_version_misses(self):
+        registry = VersionedRegistry(max_entries=2)
+        registry.put(1, "v1", "menu 1")
+        self.assertEqual(registry.get(1, "v1"), "menu 1")
+        self.assertIsNone(registry.get(1, "v2"))
+        self.assertEqual(registry.get_or_build(1, "v2", lambda: "menu 1 edited"), "menu 1 edited")
+        registry.put(2, "v1", "menu 2")
+        registry.put(3, "v1", "menu 3") # Evicts restaurant 1
+        self.assertIsNone(registry.get_latest(1))
+
+    def test_invalidated_entries_are_kept_for_the_rebuild_only_on_request(self):
+        for keep_invalidated in (False, True):
+            registry = VersionedRegistry(keep_invalidated=keep_invalidated)
+            registry.put(1, "v1", "menu 1")
+            registry.invalidate(1)
+            self.assertIsNone(registry.get(1, "v1"))
+            self.assertEqual(registry.previous(1), "menu 1" if keep_invalidated else None)
+            registry.put(1, "v2", "menu 1 edited")
+            self.assertEqual(registry.previous(1), "menu 1 edited")
+            registry.invalidate()
+            self.assertIsNone(registry.previous(1))
+
+
+class CooccurrenceModelTests(SimpleTestCase):
+    def setUp(self):
+        # Support: pizza 3, cola 3, salad 2, water 1 of 4 orders.
+        # Pairs: cola-pizza 2, pizza-salad 2, cola-salad 1, cola-water 1.
+        counts = basket_pair_counts([["pizza", "cola"], ["pizza", "cola", "salad"], ["salad", "pizza"], ["cola", "water"]])
+        self.model = CooccurrenceModel(((a, b, count) for (a, b), count in counts.items()), n_orders=4)
+
+    def assertAddOns(self, actual, expected):
+        self.assertEqual([item_id for item_id, _ in actual], [item_id for item_id, _ in expected])
+        for (_, score), (_, expected_score) in zip(actual, expected):
+            self.assertAlmostEqual(score, expected_score, places=5)
+
+    def test_single_item_cart(self):
+        # Equal counts and confidences: the smaller id wins the tie
+        self.assertAddOns(self.model.top_add_ons(["pizza"], metric="count"), [("cola", 2), ("salad", 2)])
+        self.assertAddOns(self.model.top_add_ons(["pizza"], metric="confidence"), [("cola", 2 / 3), ("salad", 2 / 3)])
+        # lift = confidence * n_orders / support(candidate)
+        self.assertAddOns(self.model.top_add_ons(["pizza"]), [("salad", 2 / 3 * 4 / 2), ("cola", 2 / 3 * 4 / 3)])
+
+    def test_cart_scores_sum_over_its_items_and_exclude_them(self):
+        carts = [["pizza", "cola"], ["cola", "pizza", "pizza"], ["unknown"], []]
+        for metric, expected in [
+            ("count", [("salad", 2 + 1), ("water", 1)]),
+            ("confidence", [("salad", 2 / 3 + 1 / 3), ("water", 1 / 3)]),
+            ("lift", [("salad", 1 * 4 / 2), ("water", 1 / 3 * 4 / 1)]),
+        ]:
+            with self.subTest(metric=metric):
+                first, repeated, unknown, empty = self.model.top_add_ons_batch(carts, k=5, metric=metric)
+                self.assertAddOns(first, expected)
+                self.assertAddOns(repeated, expected)
+                self.assertEqual((unknown, empty), ([], []))
+                self.assertAddOns(self.model.top_add_ons(["pizza", "cola"], k=1, metric=metric), expected[:1])
+        self.assertAddOns(self.model.top_add_ons(["pizza", "cola"], exclude=["salad"]), [("water", 4 / 3)])
+
+    def test_prune_keeps_the_strongest_partners_of_either_item(self):
+        pair_counts = {("a", "a"): 9, ("a", "b"): 5, ("a", "c"): 4, ("a", "d"): 1, ("b", "c"): 3, ("d", "d"): 1}
+        # ("a", "d") is outside a's top 1 but is d's strongest pair
+        self.assertEqual(prune_pairs(pair_counts, max_pairs_per_item=1), {("b", "c")})
+        self.assertEqual(prune_pairs(pair_counts, max_pairs_per_item=2), set())
+        self.assertEqual(prune_pairs({("a", "a"): 3}, max_pairs_per_item=0), set())
+
+
+class MenuSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        pizzas, drinks = uuid.UUID(int=1), uuid.UUID(int=2)
+        rows = [
+            ("Margherita", pizzas, 9.5, True, ["vegetarian", "classic"], ["tomato", "mozzarella", "basil"]),
+            ("Pepperoni", pizzas, 11.0, False, ["classic", "spicy"], ["tomato", "mozzarella", "pepperoni"]),
+            ("Diavola", pizzas, 12.0, True, ["spicy"], ["tomato", "salami", "chili"]),
+            ("Quattro Formaggi", pizzas, 12.5, True, ["vegetarian"], ["mozzarella", "gorgonzola"]),
+            ("Cola", drinks, 3.0, True, ["cold"], []),
+            ("Lemonade", drinks, 3.5, True, ["cold", "vegetarian"], ["lemon"]),
+            ("Side Salad", None, 4.0, True, [], ["lettuce", "tomato"]),
+        ]
+        self.menu_items_dict = {
+            uuid.UUID(int=100 + i): {
+                'id': uuid.UUID(int=100 + i), 'name': name, 'category': category, 'tags': tags,
+                'ingredients': ingredients, 'price': price, 'is_available': is_available,
+                'category_name': {pizzas: "Pizza", drinks: "Drinks"}.get(category),
+            }
+            for i, (name, category, price, is_available, tags, ingredients) in enumerate(rows)
+        }
+        self.ids = list(self.menu_items_dict)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        path = os.path.join(self.directory.name, "menu")
+        MenuSnapshot.from_menu_items_dict(self.menu_items_dict).save(path)
+        self.snapshot = MenuSnapshot.load(path, mmap=True)
+
+    def test_loaded_snapshot_maps_its_columns_and_matches_the_dict(self):
+        self.assertIsInstance(self.snapshot.prices, np.memmap)
+        self.assertFalse(self.snapshot.available.flags.writeable)
+        self.assertEqual(list(self.snapshot), self.ids)
+        self.assertEqual({item_id: self.snapshot[item_id] for item_id in self.snapshot}, self.menu_items_dict)
+
+    def test_rules_give_the_same_suggestions_as_with_the_dict(self):
+        margherita, pepperoni, _, _, cola, _, salad = self.ids
+        history = [[margherita, cola], [pepperoni, cola], [salad]]
+        popularity = {item_id: float(i % 3) for i, item_id in enumerate(self.ids)}
+        rules = [
+            lambda menu: suggest_alternatives_for_out_of_stock(pepperoni, menu),
+            lambda menu: suggest_alternatives_for_out_of_stock(pepperoni, menu, mode="jaccard"),
+            lambda menu: suggest_similar_items(margherita, menu, num_suggestions=4),
+            lambda menu: suggest_popular_items(menu, popularity, category_filter=uuid.UUID(int=1)),
+            lambda menu: suggest_add_ons([margherita], menu, complementary_rules={margherita: [pepperoni, cola, salad]}),
+            lambda menu: suggest_from_past_orders(history, menu, strategy="frequent"),
+            lambda menu: suggest_from_past_orders(history, menu, strategy="recent"),
+        ]
+        for i, rule in enumerate(rules):
+            with self.subTest(rule=i):
+                expected = rule(self.menu_items_dict)
+                self.assertTrue(expected)
+                self.assertEqual(rule(self.snapshot), expected)
+
+    def test_availability_change_copies_the_mapped_column(self):
+        pepperoni = self.ids[1]
+        self.snapshot.set_availability(pepperoni, True)
+        self.assertTrue(self.snapshot.is_available(pepperoni))
+        self.assertTrue(self.snapshot[pepperoni]['is_available'])
+        self.assertFalse(MenuSnapshot.load(os.path.join(self.directory.name, "menu")).is_available(pepperoni))
+
+
+class DaypartScheduleTests(SimpleTestCase):
+    MONDAY, TUESDAY, WEDNESDAY, SATURDAY, SUNDAY = 0, 1, 2, 5, 6
+
+    def assertDayparts(self, schedule, expected):
+        encoded = schedule.encode()
+        for (weekday, hour, minute), daypart in expected.items():
+            with self.subTest(weekday=weekday, hour=hour, minute=minute):
+                self.assertEqual(schedule.daypart_at(weekday, hour * 60 + minute), daypart)
+                self.assertEqual(DaypartSchedule.decode(encoded).daypart_at(weekday, hour * 60 + minute), daypart)
+                self.assertEqual(encoded_daypart_at(encoded, weekday, hour * 60 + minute), daypart)
+
+    def test_breakfast_only_restaurant_shows_breakfast_while_closed(self):
+        schedule = DaypartSchedule([(weekday, 7 * 60, 11 * 60) for weekday in range(5)]) # Weekdays 07:00-11:00
+        self.assertEqual(schedule.active_dayparts, ("breakfast",))
+        self.assertDayparts(schedule, {
+            (self.MONDAY, 8, 0): "breakfast",
+            (self.MONDAY, 10, 45): "breakfast",
+            (self.MONDAY, 12, 0): "breakfast", # Closed: Tuesday's breakfast is next
+            (self.MONDAY, 23, 0): "breakfast",
+            (self.TUESDAY, 3, 0): "breakfast",
+            (self.SATURDAY, 19, 0): "breakfast", # Weekend: Monday's breakfast is next
+        })
+
+    def test_overnight_bar_keeps_serving_the_night_past_midnight(self):
+        schedule = DaypartSchedule([(weekday, 20 * 60, 3 * 60) for weekday in range(1, 6)]) # Tue-Sat 20:00-03:00
+        self.assertEqual(schedule.active_dayparts, ("dinner", "late_night"))
+        self.assertDayparts(schedule, {
+            (self.TUESDAY, 21, 0): "dinner",
+            (self.TUESDAY, 23, 0): "late_night",
+            (self.WEDNESDAY, 1, 0): "late_night", # Tuesday's service day
+            (self.WEDNESDAY, 4, 0): "late_night", # Closed within a daypart it served that night
+            (self.WEDNESDAY, 6, 0): "dinner", # Closed: Wednesday 20:00 is next
+            (self.WEDNESDAY, 12, 0): "dinner",
+            (self.SUNDAY, 2, 30): "late_night", # Saturday night
+            (self.SUNDAY, 12, 0): "dinner", # Closed until Tuesday 20:00
+            (self.MONDAY, 4, 0): "dinner", # Sunday's night was not served
+        })
+
+    def test_no_windows_is_always_open(self):
+        schedule = DaypartSchedule()
+        self.assertEqual(schedule.daypart_at(self.SUNDAY, 16 * 60), "afternoon")
+        self.assertEqual(len(schedule.active_dayparts), 5)
+
+
+class SyntheticIngredientsTests(SimpleTestCase):
+    def test_more_names_than_style_ingredient_pairs(self):
+        names = synthetic_ingredients(1000, random.Random(3), anchor=["house special"])
+        self.assertEqual(len(set(names)), 1000)
+        self.assertIn("house special", names)
+
+
+class ForwardDecayTests(SimpleTestCase):
+    def half_lives(self, count):
+        return POPULARITY_DECAY_LANDMARK + timedelta(hours=POPULARITY_HALF_LIFE_HOURS * count)
+
+    def test_scores_stay_finite_past_the_float_range_of_the_weights(self):
+        now = self.half_lives(1100)
+        with self.assertRaises(OverflowError):
+            math.pow(2.0, 1100) # What a linear weight would be at that moment
+        score = log2_add(forward_decay_log_weight(now, 3), forward_decay_log_weight(self.half_lives(1099), 2))
+        self.assertTrue(math.isfinite(score))
+        self.assertAlmostEqual(decayed_popularity(score, now), 4.0)
+        self.assertAlmostEqual(decayed_popularity(score, self.half_lives(1101)), 2.0)
+
+    def test_removing_weights(self):
+        now = self.half_lives(1100)
+        score = log2_add(forward_decay_log_weight(now, 3), forward_decay_log_weight(now, 1))
+        self.assertAlmostEqual(decayed_popularity(log2_subtract(score, forward_decay_log_weight(now, 1)), now), 3.0)
+        only = forward_decay_log_weight(now, 2)
+        self.assertEqual(log2_subtract(only, only), POPULARITY_EMPTY_LOG_SCORE)
+        self.assertEqual(decayed_popularity(POPULARITY_EMPTY_LOG_SCORE, now), 0.0)
+
+    def test_daypart_scores_rank_by_decayed_count(self):
+        scores = DaypartScores()
+        scores.add_order("lunch", [("soup", 1), ("salad", 2)], forward_decay_log_weight(self.half_lives(1098)))
+        scores.add_order("lunch", [("soup", 1)], forward_decay_log_weight(self.half_lives(1100)))
+        self.assertEqual(scores.slate("lunch"), ["soup", "salad"]) # 1 + 1/4 against 2/4
+
+    def test_half_life_must_be_positive(self):
+        self.assertEqual(_half_life_hours("6"), 6.0)
+        for value in ("0", "-24", "nan", "inf"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                _half_life_hours(value)
@@ -15,6 +15,11 @@ router.register(r'logs/recommendation-requests', views.RecommendationRequestLogV
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('nlu/analyze-batch/', views.NLUBatchAnalyzeView.as_view(), name='nlu-analyze-batch'),
+    path('nlu/analyze/', views.nlu_analyze_async_view, name='nlu-analyze'),
+    path('nlu/cache-stats/', views.NLUCacheStatsView.as_view(), name='nlu-cache-stats'),
+    path('recommendations/batch/', views.RecommendationBatchView.as_view(), name='recommendation-batch'),
+    path('recommendations/cache-stats/', views.RecommendationCacheStatsView.as_view(), name='recommendation-cache-stats'),
     # Example of a specific utility endpoint not part of a ViewSet, though the action in AIModelVersionViewSet is better
     # path('model-versions    filter_backends = [DjangoFilterBackend]
     filterset_fields = {
@@ -1,15 +1,23 @@
 # backend/ai_engine/views.py
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import viewsets, status, generics
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, AllowAny # Import AllowAny
-from users.permissions import IsPlatformAdmin # Assuming you have this from users app
+from users.permissions import IsPlatformAdmin, IsTenantAdmin # Assuming you have this from users app
 
 from .models import AIModelFamily, AIModelVersion, AIFeedback, NLULog, RecommendationRequestLog
 from .serializers import (
     AIModelFamilySerializer, AIModelVersionSerializer,
     AIFeedbackCreateSerializer, AIFeedbackDetailSerializer,
-    NLULogSerializer, RecommendationRequestLogSerializer
+    NLULogSerializer, RecommendationRequestLogSerializer,
+    NLUBatchAnalyzeRequestSerializer, NLUAnalyzeRequestSerializer, NLUResultSerializer,
+    RecommendationBatchRequestSerializer
 )
 
 class AIModelFamilyViewSet(viewsets.ModelViewSet):
@@ -105,4 +113,221 @@ class EntityTypeDefinitionSerializer(serializers.ModelSerializer):
     class Meta:
         model = EntityTypeDefinition
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at']
\ No newline at end of file
+        read_only_fields = ['id', 'created_at', 'updated_at']
+
+
+# --- Runtime NLU Views ---
+def _accessible_restaurant(request, restaurant_id):
+    """
+    (restaurant, None) if request.user may query the restaurant: platform admins any,
+    tenant admins only their tenant's. Otherwise (None, (error message, HTTP status)).
+    """
+    from restaurants.models import Restaurant
+
+    restaurant = Restaurant.objects.filter(id=restaurant_id).only('id', 'tenant_id').first()
+    if restaurant is None:
+        return None, ("Restaurant not found.", status.HTTP_404_NOT_FOUND)
+    if not IsPlatformAdmin().has_permission(request, None) and restaurant.tenant_id != request.user.tenant_id:
+        return None, ("You do not manage this restaurant.", status.HTTP_403_FORBIDDEN)
+    return restaurant, None
+
+
+class NLUBatchAnalyzeView(generics.GenericAPIView):
+    """
+    Classifies intents and extracts entities for many utterances in one call.
+    POST /api/v1/platform-admin/ai-engine/nlu/analyze-batch/
+    Request: { "queries": ["hi", "two margherita pizzas"], "restaurant_id": "uuid" (optional),
+               "previous_intent": "greet" (optional), "dialog_context": {} (optional) }
+    Response: { "results": [ {query, processed_query, intent, intent_confidence, ranked_intents,
+                               entities, timings_ms, cache_hit}, ... ] } in input order.
+    Tenant admins may only pass their own restaurants.
+    """
+    serializer_class = NLUBatchAnalyzeRequestSerializer
+    permission_classes = [IsAuthenticated, IsPlatformAdmin | IsTenantAdmin]
+
+    def post(self, request, *args, **kwargs):
+        from nlp.pipeline import analyze_batch
+        from menu.services import load_restaurant_menu_for_nlp
+        from .nlu_models import get_active_intent_scorer
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        context = {
+            "previous_intent": data.get('previous_intent'),
+            "dialog_context": data.get('dialog_context') or {},
+            "intent_scorer": get_active_intent_scorer(), # None -> rule-based intents only
+        }
+        if data.get('restaurant_id'):
+            _, error = _accessible_restaurant(request, data['restaurant_id'])
+            if error:
+                return Response({"error": error[0]}, status=error[1])
+            context["restaurant_id"] = data['restaurant_id']
+            context["menu_version"] = load_restaurant_menu_for_nlp(data['restaurant_id'])
+
+        results = analyze_batch(data['queries'], contexts=context)
+        return Response({'results': NLUResultSerializer(results, many=True).data}, status=status.HTTP_200_OK)
+
+
+class NLUCacheStatsView(generics.GenericAPIView):
+    """
+    Hit/miss counters of this worker's in-process NLU caches.
+    GET /api/v1/platform-admin/ai-engine/nlu/cache-stats/
+    Response: { "result_cache": {size, hits, misses, evictions, expirations, hit_ratio, ...},
+                "menu_matchers": <compiled restaurant menus held>,
+                "worker_pool": {pending, shed, timeouts, ...} or null if not started }
+    """
+    permission_classes = [IsAuthenticated, IsPlatformAdmin]
+
+    def get(self, request, *args, **kwargs):
+        from nlp.cache import nlu_result_cache
+        from nlp.entity_extractor import menu_matcher_registry
+
+        from .nlu_service import get_worker_pool_stats
+
+        return Response({
+            'result_cache': nlu_result_cache.stats(),
+            'menu_matchers': len(menu_matcher_registry),
+            'worker_pool': get_worker_pool_stats(),
+        }, status=status.HTTP_200_OK)
+
+
+class RecommendationBatchView(generics.GenericAPIView):
+    """
+    Runs one recommendation rule for many targets of a restaurant in one call
+    (kitchen-display upsell screens, email campaigns).
+    POST /api/v1/platform-admin/ai-engine/recommendations/batch/
+    Request: { "restaurant_id": "uuid", "rule": "similar" | "alternatives" | "add_ons" | "order_again",
+               "targets": [item ids] | [[cart item ids], ...] (add_ons) | [user ids] (order_again),
+               "num_suggestions": 3, "mode": "rules", "metric": "lift", "strategy": "frequent" }
+    Response: { "results": [ {"target": ..., "items": [{id, name, category, price}, ...]}, ... ] } in input order.
+    Tenant admins may only query their own restaurants.
+    """
+    serializer_class = RecommendationBatchRequestSerializer
+    permission_classes = [IsAuthenticated, IsPlatformAdmin | IsTenantAdmin]
+
+    def post(self, request, *args, **kwargs):
+        from .recommendation_service import recommend_batch
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        restaurant, error = _accessible_restaurant(request, data['restaurant_id'])
+        if error:
+            return Response({"error": error[0]}, status=error[1])
+
+        results = recommend_batch(
+            data['rule'], restaurant.id, data['targets'], data['num_suggestions'],
+            mode=data['mode'], metric=data['metric'], strategy=data['strategy']
+        )
+        return Response({
+            'results': [
+                {
+                    'target': target,
+                    'items': [
+                        {'id': item['id'], 'name': item['name'], 'category': item['category'], 'price': item['price']}
+                        for item in items
+                    ],
+                }
+                for target, items in zip(data['targets'], results)
+            ]
+        }, status=status.HTTP_200_OK)
+
+
+class RecommendationCacheStatsView(generics.GenericAPIView):
+    """
+    Hit ratios of the recommendation result cache.
+    GET /api/v1/platform-admin/ai-engine/recommendations/cache-stats/?hours=24
+    Response: { "process": {rule: {hits, misses, hit_ratio}} for this worker,
+                "logged": {trigger_type: {requests, hits, hit_ratio}} from RecommendationLog
+                          rows of the last `hours` that recorded cache_hit }
+    """
+    permission_classes = [IsAuthenticated, IsPlatformAdmin]
+
+    def get(self, request, *args, **kwargs):
+        from datetime import timedelta
+        from django.db.models import Count, Q
+        from django.utils import timezone
+
+        from .models import RecommendationLog
+        from .recommendation_cache import recommendation_cache_stats
+
+        try:
+            hours = float(request.query_params.get('hours', 24))
+        except ValueError:
+            return Response({"error": "hours must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+        rows = RecommendationLog.objects.filter(
+            timestamp__gte=timezone.now() - timedelta(hours=hours), cache_hit__isnull=False
+        ).values('trigger_type').annotate(requests=Count('id'), hits=Count('id', filter=Q(cache_hit=True)))
+        return Response({
+            'process': recommendation_cache_stats.stats(),
+            'logged': {
+                row['trigger_type']: {
+                    'requests': row['requests'], 'hits': row['hits'], 'hit_ratio': row['hits'] / row['requests']
+                }
+                for row in rows
+            },
+        }, status=status.HTTP_200_OK)
+
+
+def _authenticate_api_request(request):
+    """
+    Runs the DRF authentication classes (JWT, session) on a plain Django request.
+    Returns the DRF Request, whose user is authenticated (and cached) on first access.
+    """
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    drf_request.user # Authenticate now, inside the worker thread
+    return drf_request
+
+
+@csrf_exempt
+@require_POST
+async def nlu_analyze_async_view(request):
+    """
+    Async (ASGI) NLU endpoint: the request coroutine awaits the NLU worker pool, so
+    parsing never occupies a web worker thread. Slow or overloaded analyses come back
+    with intent "unknown" and fallback_reason set instead of blocking.
+    POST /api/v1/platform-admin/ai-engine/nlu/analyze/
+    Request: { "query": "two margherita pizzas", "restaurant_id": "uuid" (optional),
+               "previous_intent": "greet" (optional), "dialog_context": {} (optional) }
+    Response: one NLUResult (see NLUBatchAnalyzeView).
+    Platform admins and tenant admins only, the latter for their own restaurants.
+    """
+    from rest_framework.exceptions import AuthenticationFailed
+    from .nlu_service import analyze_query_async
+
+    try:
+        drf_request = await sync_to_async(_authenticate_api_request)(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'detail': str(exc.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+    user = drf_request.user
+    if not user or not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=status.HTTP_401_UNAUTHORIZED)
+    if not (IsPlatformAdmin | IsTenantAdmin)().has_permission(drf_request, None):
+        return JsonResponse({'detail': 'You do not have permission to perform this action.'}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'detail': 'Request body must be JSON.'}, status=status.HTTP_400_BAD_REQUEST)
+    serializer = NLUAnalyzeRequestSerializer(data=payload)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+    if data.get('restaurant_id'):
+        _, error = await sync_to_async(_accessible_restaurant)(drf_request, data['restaurant_id'])
+        if error:
+            return JsonResponse({'error': error[0]}, status=error[1])
+
+    result = await analyze_query_async(
+        data['query'],
+        restaurant_id=data.get('restaurant_id'),
+        previous_intent=data.get('previous_intent'),
+        dialog_context=data.get('dialog_context'),
+    )
+    return JsonResponse(NLUResultSerializer(result).data, status=status.HTTP_200_OK)
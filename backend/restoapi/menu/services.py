@@ -0,0 +1,61 @@
+# backend/menu/services.py
+from django.core.cache import cache
+from django.db.models import Q
+
+from restaurants.models import Restaurant
+from .models import MenuItem, Ingredient
+from .versioning import get_menu_version
+
+# Shared-cache key of a restaurant's NLU vocabulary for one menu version.
+NLP_VOCABULARY_KEY = "menu:nlp-vocabulary:{restaurant_id}:{menu_version}"
+NLP_VOCABULARY_TIMEOUT = 24 * 60 * 60
+
+
+def get_nlp_vocabulary(restaurant_id) -> tuple[list[str], list[str]]:
+    """
+    Returns (menu item names, ingredient names) the NLU should recognise for a restaurant.
+    Ingredients are the restaurant tenant's own plus global (tenant-less) ones.
+    """
+    item_names = list(
+        MenuItem.objects.filter(restaurant_id=restaurant_id).values_list('name', flat=True).distinct()
+    )
+    tenant_id = Restaurant.objects.filter(pk=restaurant_id).values_list('tenant_id', flat=True).first()
+    ingredient_names = list(
+        Ingredient.objects.filter(Q(tenant_id=tenant_id) | Q(tenant__isnull=True))
+        .values_list('name', flat=True).distinct()
+    )
+    return item_names, ingredient_names
+
+
+def load_restaurant_menu_for_nlp(restaurant_id) -> str:
+    """
+    Makes sure the NLU phrase matchers for a restaurant are compiled for its current
+    menu version and returns that version. Pass both to extract_entities:
+
+        version = load_restaurant_menu_for_nlp(restaurant.id)
+        extract_entities(query, intent, restaurant_id=restaurant.id, menu_version=version)
+
+    Only the first call after a menu change touches the database.
+    """
+    from nlp.entity_extractor import menu_matcher_registry
+
+    menu_version = get_menu_version(restaurant_id)
+    menu_matcher_registry.get_or_build(restaurant_id, menu_version, lambda: get_nlp_vocabulary(restaurant_id))
+    return menu_version
+
+
+def get_nlp_menu_snapshot(restaurant_id) -> tuple[str, list[str], list[str]]:
+    """
+    Returns (menu version, menu item names, ingredient names) without compiling anything
+    in this process, for callers that hand the NLU work to nlp.worker_pool. The names are
+    kept in the shared cache per menu version, so the database is read once per menu
+    change across all web workers; a menu edit moves the version and the key with it.
+    """
+    menu_version = get_menu_version(restaurant_id)
+    key = NLP_VOCABULARY_KEY.format(restaurant_id=restaurant_id, menu_version=menu_version)
+    vocabulary = cache.get(key)
+    if vocabulary is None:
+        vocabulary = get_nlp_vocabulary(restaurant_id)
+        cache.set(key, vocabulary, timeout=NLP_VOCABULARY_TIMEOUT)
+    item_names, ingredient_names = vocabulary
+    return menu_version, item_names, ingredient_names
@@ -0,0 +1,70 @@
+# backend/menu/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from restaurants.models import Restaurant
+from .models import MenuCategory, MenuItem, Ingredient, CustomizationOption
+from .versioning import bump_menu_version
+
+
+def notify_menu_changed(restaurant_id=None):
+    """
+    Bumps the menu version once the current transaction commits (so other workers never
+    rebuild from uncommitted rows) and drops this process's compiled NLU matchers and
+    cached NLU results. Cached recommendations are keyed by the version and expire with it.
+    restaurant_id=None means every menu changed.
+    """
+    def _on_commit():
+        bump_menu_version(restaurant_id)
+        from nlp.entity_extractor import invalidate_menu_matchers
+        from nlp.cache import nlu_result_cache
+        invalidate_menu_matchers(restaurant_id)
+        nlu_result_cache.invalidate_restaurant(restaurant_id)
+
+    transaction.on_commit(_on_commit)
+
+
+@receiver([post_save, post_delete], sender=MenuItem)
+@receiver([post_save, post_delete], sender=MenuCategory)
+def menu_component_changed(sender, instance, **kwargs):
+    notify_menu_changed(instance.restaurant_id)
+
+
+@receiver([post_save, post_delete], sender=MenuCategory)
+def menu_category_changed(sender, instance, **kwargs):
+    from restaurants.search import reindex_restaurant
+
+    # Category names are part of the restaurant's search text
+    transaction.on_commit(lambda: reindex_restaurant(instance.restaurant_id))
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    if instance.tenant_id is None: # Global ingredient, part of every menu
+        notify_menu_changed(None)
+        return
+    # Tenant-scoped ingredient: only that tenant's restaurants are affected
+    for restaurant_id in Restaurant.objects.filter(tenant_id=instance.tenant_id).values_list('id', flat=True):
+        notify_menu_changed(restaurant_id)
+
+
+@receiver(pre_save, sender=CustomizationOption)
+def customization_option_availability_loaded(sender, instance, **kwargs):
+    # Remember the stored availability so post_save only bumps the menu when it changed
+    if instance._state.adding:
+        instance._previous_is_available = None
+    else:
+        instance._previous_is_available = sender.objects.filter(pk=instance.pk) \
+            .values_list('is_available', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=CustomizationOption)
+def customization_option_changed(sender, instance, **kwargs):
+    if kwargs.get('signal') is post_save and not kwargs.get('created') \
+            and getattr(instance, '_previous_is_available', None) == instance.is_available:
+        return # Name / price / order edits do not change what can be recommended
+    restaurant_id = MenuItem.objects.filter(customization_groups=instance.group_id) \
+        .values_list('restaurant_id', flat=True).first()
+    if restaurant_id is not None: # None when cascade-deleted along with its item (which bumps itself)
+        notify_menu_changed(restaurant_id)
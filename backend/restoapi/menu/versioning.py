@@ -0,0 +1,53 @@
+# backend/menu/versioning.py
+import time
+
+from django.core.cache import cache
+
+# Per-restaurant menu version counters live in the shared Django cache so every worker
+# process sees the same value. Anything compiled from a menu (NLU matchers, recommender
+# indexes, ...) is keyed by this version and is rebuilt lazily when it moves.
+MENU_VERSION_KEY = "menu:version:{restaurant_id}"
+# Bumped for platform-wide (tenant-less) ingredient changes, which affect every menu.
+GLOBAL_MENU_VERSION_KEY = "menu:version:__global__"
+
+
+def _initial_version() -> int:
+    # Seeded from the clock instead of 1 so a counter evicted from the cache comes back
+    # larger than any value handed out before, never reusing a stale version.
+    return int(time.time() * 1000)
+
+
+def _get_counter(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_counter(key: str) -> int:
+    try:
+        return cache.incr(key)
+    except ValueError:  # Counter missing (never read or evicted)
+        cache.add(key, _initial_version(), timeout=None)
+        return cache.incr(key)
+
+
+def get_menu_version(restaurant_id) -> str:
+    """
+    Returns the current menu version of a restaurant, e.g. "1718000000123.1718000000001".
+    Compare versions for equality only.
+    """
+    restaurant_version = _get_counter(MENU_VERSION_KEY.format(restaurant_id=restaurant_id))
+    global_version = _get_counter(GLOBAL_MENU_VERSION_KEY)
+    return f"{restaurant_version}.{global_version}"
+
+
+def bump_menu_version(restaurant_id=None) -> None:
+    """
+    Marks a restaurant's menu (or, with restaurant_id=None, every menu) as changed.
+    """
+    if restaurant_id is None:
+        _bump_counter(GLOBAL_MENU_VERSION_KEY)
+    else:
+        _bump_counter(MENU_VERSION_KEY.format(restaurant_id=restaurant_id))
@@ -239,13 +239,14 @@ class OrderCreateView(generics.CreateAPIView):
 
         # Create OrderItems from CartItems
         order_items_to_create = []
-        for cart_item in cart.items.all():
+        ordered_items = [] # (menu_item_id, category_id, quantity) for the popularity counters
+        for cart_item in cart.items.select_related('menu_item'):
+            ordered_items.append((cart_item.menu_item_id, cart_item.menu_item.category_id, cart_item.quantity))
             order_items_to_create.append(
                 OrderItem(
                     order=order,
                     menu_item_snapshot_name=cart_item.menu_item.name,
-                    menu_item_original=cart_item.menu_item, # Link to original
-                    original_menu_item_id_str=str(cart_item.menu_item.id),
+                    menu_item_original_id=cart_item.menu_item_id, # Link to original
                     quantity=cart_item.quantity,
                     unit_price=cart_item.unit_price_at_addition,
                     selected_customizations_snapshot=cart_item.selected_customizations_snapshot,
@@ -254,6 +255,19 @@ class OrderCreateView(generics.CreateAPIView):
             )
         OrderItem.objects.bulk_create(order_items_to_create)
 
+        # Popularity and the user's order history only count orders that actually commit
+        from ai_engine.popularity import record_ordered_items
+        from ai_engine.order_history import record_order_history
+        db_transaction.on_commit(
+            lambda: record_ordered_items(order.restaurant_id, ordered_items, ordered_at=order.created_at)
+        )
+        db_transaction.on_commit(
+            lambda: record_order_history(
+                order.user_id, order.restaurant_id, [menu_item_id for menu_item_id, _, _ in ordered_items],
+                ordered_at=order.created_at
+            )
+        )
+
         order.calculate_and_set_financials(commit=True) # Calculate totals and save order again
 
         # Create initial status history
@@ -343,6 +357,10 @@ class OrderListViewSet(viewsets.ReadOnlyModelViewSet):
             OrderStatusHistory.objects.create(
                 order=order, status=order.status, changed_by=request.user, notes=cancellation_reason
             )
+            from ai_engine.order_history import forget_order_history
+            from ai_engine.popularity import forget_order_popularity
+            db_transaction.on_commit(lambda: forget_order_history(order))
+            db_transaction.on_commit(lambda: forget_order_popularity(order))
             # TODO: Notify restaurant POS about cancellation if order was already sent.
         return Response(OrderDetailSerializer(order, context={'request': request}).data)
 
@@ -421,5 +439,10 @@ class OrderStaffUpdateView(generics.UpdateAPIView):
                 changed_by=self.request.user,
                 notes=f"Status changed to {updated_order.get_status_display()} by staff. Reason: {updated_order.cancellation_reason or 'N/A'}"
             )
+            if new_status.startswith('CANCELLED_') and not old_status.startswith('CANCELLED_'):
+                from ai_engine.order_history import forget_order_history
+                from ai_engine.popularity import forget_order_popularity
+                db_transaction.on_commit(lambda: forget_order_history(updated_order))
+                db_transaction.on_commit(lambda: forget_order_popularity(updated_order))
             # TODO: Notify customer of status change
             # TODO: Update POS if status change originated from your platform admin (if applicable)
\ No newline at end of file
@@ -9,6 +9,7 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .models import RestaurantPOSConfiguration, POSIntegrationLog
 from .serializers import RestaurantPOSConfigurationSerializer, POSIntegrationLogSerializer
 from restaurants.models import Restaurant # For context
+from menu.signals import notify_menu_changed
 from .permissions import IsTenantAdminAndOwnsRestaurantForPOSConfig, IsPlatformAdminForPOSAccess
 from users.permissions import IsPlatformAdmin, IsTenantAdmin # From users app
 
@@ -19,6 +20,10 @@ from users.permissions import IsPlatformAdmin, IsTenantAdmin # From users app
 # def get_pos_service(pos_config: RestaurantPOSConfiguration):
 #     return pos_service_factory.get_service(pos_config.pos_system_type, pos_config)
 
+# Webhook event types (by prefix) that can change menu items or their stock. They bump the
+# restaurant's menu version, which also invalidates its cached recommendations.
+MENU_AFFECTING_EVENT_PREFIXES = ('menu', 'item', 'inventory', 'stock')
+
 
 class RestaurantPOSConfigurationViewSet(viewsets.ModelViewSet):
     """
@@ -80,6 +85,7 @@ class RestaurantPOSConfigurationViewSet(viewsets.ModelViewSet):
             is_success=success, message=message
         )
         if success:
+            notify_menu_changed(pos_config.restaurant_id) # Synced items / availability
             pos_config.last_menu_sync_at = timezone.now()
             pos_config.last_sync_error = None
             pos_config.save(update_fields=['last_menu_sync_at', 'last_sync_error'])
@@ -161,6 +167,8 @@ class GenericPOSWebhookView(views.APIView):
         )
 
         if success:
+            if str(event_type or '').lower().startswith(MENU_AFFECTING_EVENT_PREFIXES):
+                notify_menu_changed(pos_config.restaurant_id)
             return Response({"status": "webhook received and processed"}, status=status.HTTP_200_OK)
         else:
             return Response({"error": message}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
@@ -0,0 +1,355 @@
+# backend/restaurants/geo.py
+"""
+Nearby search without PostGIS: every restaurant stores the id of the fixed lat/lon grid
+cell it lies in (Restaurant.geo_cell, indexed), so a radius query becomes a handful of
+index range scans over the cells its bounding box covers, plus the bounding box itself
+on latitude/longitude. Only those candidates get the exact haversine check.
+Plain integer and decimal columns, so it behaves the same on SQLite and Postgres.
+
+The same grid also orders the in-process CoordinateStore, which answers radius queries
+from numpy arrays without touching the database at all. The database prefilter
+(within_radius_prefilter) remains for queries that must join other tables over a whole
+radius, such as the text search's candidate subquery (restaurants.search).
+"""
+import heapq
+import math
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0
+# Grid cell size in degrees (about 5.5 km north-south). Changing it requires
+# `manage.py rebuild_geo_cells`, since stored cells would no longer match.
+GEO_CELL_DEGREES = 0.05
+GEO_CELL_ROWS = int(round(180 / GEO_CELL_DEGREES))
+GEO_CELL_COLUMNS = int(round(360 / GEO_CELL_DEGREES))
+# Above this many cell rows (very large radii) the cell predicate would be longer than
+# it is selective, and the query falls back to the bounding box alone.
+GEO_CELL_MAX_QUERY_ROWS = 64
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km."""
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a))) # asin: precise for small distances
+
+
+def _cell_row(latitude: float) -> int:
+    return min(max(int(math.floor((latitude + 90.0) / GEO_CELL_DEGREES)), 0), GEO_CELL_ROWS - 1)
+
+
+def _cell_column(longitude: float) -> int:
+    if not -180.0 <= longitude <= 180.0:
+        longitude = (longitude + 180.0) % 360.0 - 180.0
+    return min(int(math.floor((longitude + 180.0) / GEO_CELL_DEGREES)), GEO_CELL_COLUMNS - 1)
+
+
+def geo_cell(latitude, longitude) -> Optional[int]:
+    """Grid cell id of a point (row-major, rows from the south pole); None without coordinates."""
+    if latitude is None or longitude is None:
+        return None
+    return _cell_row(float(latitude)) * GEO_CELL_COLUMNS + _cell_column(float(longitude))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Tuple[float, float, List[Tuple[float, float]]]:
+    """
+    (min_lat, max_lat, [(min_lon, max_lon), ...]) enclosing the radius: one longitude
+    range, two when it crosses the antimeridian, the full circle near the poles.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+    # Widest longitude span of the circle (at the latitude where it touches the box sides)
+    ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude))
+    if ratio >= 1.0:
+        return min_lat, max_lat, [(-180.0, 180.0)]
+    delta_lon = math.degrees(math.asin(ratio))
+    min_lon, max_lon = longitude - delta_lon, longitude + delta_lon
+    if min_lon < -180.0:
+        return min_lat, max_lat, [(min_lon + 360.0, 180.0), (-180.0, max_lon)]
+    if max_lon > 180.0:
+        return min_lat, max_lat, [(min_lon, 180.0), (-180.0, max_lon - 360.0)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def cell_ranges(latitude: float, longitude: float, radius_km: float) -> Optional[List[Tuple[int, int]]]:
+    """
+    Inclusive (first, last) geo_cell ranges covering the radius, one per cell row and
+    longitude range; None when that would take more than GEO_CELL_MAX_QUERY_ROWS rows.
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_km)
+    first_row, last_row = _cell_row(min_lat), _cell_row(max_lat)
+    if last_row - first_row + 1 > GEO_CELL_MAX_QUERY_ROWS:
+        return None
+    columns = [(_cell_column(min_lon), _cell_column(max_lon)) for min_lon, max_lon in lon_ranges]
+    return [
+        (row * GEO_CELL_COLUMNS + first_column, row * GEO_CELL_COLUMNS + last_column)
+        for row in range(first_row, last_row + 1) for first_column, last_column in columns
+    ]
+
+
+def within_radius_prefilter(latitude: float, longitude: float, radius_km: float) -> Q:
+    """
+    Q for the restaurants that may lie within radius_km: the covering cell ranges
+    (index range scans on geo_cell) and the bounding box. Every restaurant within the
+    radius matches; the caller still checks the exact distance.
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_km)
+    condition = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+    if lon_ranges != [(-180.0, 180.0)]:
+        lon_condition = Q()
+        for min_lon, max_lon in lon_ranges:
+            lon_condition |= Q(longitude__gte=min_lon, longitude__lte=max_lon)
+        condition &= lon_condition
+    ranges = cell_ranges(latitude, longitude, radius_km)
+    if ranges is not None:
+        cell_condition = Q()
+        for first, last in ranges:
+            cell_condition |= Q(geo_cell__range=(first, last)) if first != last else Q(geo_cell=first)
+        condition &= cell_condition
+    return condition
+
+
+# --- In-process coordinate store ---
+# Version of the restaurant coordinate set, in the shared Django cache: bumped whenever a
+# restaurant's location or operational flag changes (restaurants.signals), so every
+# worker reloads its CoordinateStore on the next nearby search.
+GEO_VERSION_KEY = "restaurants:geo:version"
+
+
+def get_geo_version() -> int:
+    version = cache.get(GEO_VERSION_KEY)
+    if version is None:
+        # Seeded from the clock so a counter evicted from the cache never reuses a value
+        cache.add(GEO_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(GEO_VERSION_KEY)
+    return version
+
+
+def bump_geo_version() -> None:
+    try:
+        cache.incr(GEO_VERSION_KEY)
+    except ValueError: # Counter missing (never read or evicted)
+        cache.add(GEO_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        cache.incr(GEO_VERSION_KEY)
+
+
+def haversine_km_many(latitude: float, longitude: float, latitudes_rad: np.ndarray, longitudes_rad: np.ndarray,
+                      cos_latitudes: np.ndarray) -> np.ndarray:
+    """haversine_km() from one point to many (radian arrays, cos of their latitudes precomputed), in one pass."""
+    lat_rad = math.radians(latitude)
+    a = np.sin((latitudes_rad - lat_rad) / 2) ** 2 \
+        + math.cos(lat_rad) * cos_latitudes * np.sin((longitudes_rad - math.radians(longitude)) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class CoordinateStore:
+    """
+    Coordinates of every operational restaurant as contiguous float64 arrays, sorted by
+    grid cell: a radius query takes the covering cell ranges with searchsorted (no
+    database round trip), computes all candidate distances in one vectorized pass and
+    keeps the nearest with argpartition. Returns ids for a single in_bulk() fetch.
+    """
+
+    def __init__(self, rows):
+        rows = sorted(((geo_cell(lat, lon), restaurant_id, float(lat), float(lon)) for restaurant_id, lat, lon in rows),
+                      key=lambda row: row[0])
+        self.ids = [restaurant_id for _, restaurant_id, _, _ in rows]
+        self.id_keys = [str(restaurant_id) for restaurant_id in self.ids] # Tie-break / cursor order
+        self.cells = np.fromiter((cell for cell, _, _, _ in rows), dtype=np.int64, count=len(rows))
+        self.latitudes = np.fromiter((lat for _, _, lat, _ in rows), dtype=np.float64, count=len(rows))
+        self.longitudes = np.fromiter((lon for _, _, _, lon in rows), dtype=np.float64, count=len(rows))
+        self.latitudes_rad = np.radians(self.latitudes)
+        self.longitudes_rad = np.radians(self.longitudes)
+        self.cos_latitudes = np.cos(self.latitudes_rad)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def candidate_rows(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """Rows in the grid cells covering the radius (every row when the radius spans too many cell rows)."""
+        ranges = cell_ranges(latitude, longitude, radius_km)
+        if ranges is None:
+            return np.arange(len(self.ids))
+        return self._rows_in(ranges)
+
+    def _rows_in(self, ranges: List[Tuple[int, int]]) -> np.ndarray:
+        """Rows whose cell lies in any of the inclusive (first, last) cell ranges."""
+        bounds = np.asarray(ranges, dtype=np.int64).reshape(-1, 2)
+        starts = np.searchsorted(self.cells, bounds[:, 0], side='left')
+        ends = np.searchsorted(self.cells, bounds[:, 1], side='right')
+        return np.concatenate([np.arange(start, end) for start, end in zip(starts, ends) if end > start] or
+                              [np.empty(0, dtype=np.int64)])
+
+    def within_radius(self, latitude: float, longitude: float, radius_km: float,
+                      limit: Optional[int] = None) -> Tuple[list, np.ndarray]:
+        """([restaurant ids], distances in km) within radius_km, nearest first, at most limit of them."""
+        rows = self.candidate_rows(latitude, longitude, radius_km)
+        distances = haversine_km_many(latitude, longitude, self.latitudes_rad[rows], self.longitudes_rad[rows],
+                                      self.cos_latitudes[rows])
+        inside = distances <= radius_km
+        rows, distances = rows[inside], distances[inside]
+        if limit is not None and rows.size > limit:
+            nearest = np.argpartition(distances, limit - 1)[:limit]
+            rows, distances = rows[nearest], distances[nearest]
+        order = np.argsort(distances, kind='stable')
+        return [self.ids[row] for row in rows[order].tolist()], distances[order]
+
+
+    def nearest(self, latitude: float, longitude: float, k: int, max_radius_km: float,
+                after: Optional[Tuple[float, str]] = None) -> List[Tuple[Any, float]]:
+        """
+        The k nearest restaurants within max_radius_km as [(id, distance km)], in
+        (distance, str(id)) order, starting strictly after the `after` cursor (the
+        (distance, str(id)) of the previous page's last row).
+
+        Searches growing squares of grid cells around the user's cell and stops as soon as
+        the k-th best distance is within the distance every unvisited cell is guaranteed
+        to be beyond, so the work follows k and the local density, never the number of
+        restaurants in the radius. Squares double while fewer than k are found, then grow
+        straight to the width the k-th distance needs. Candidates sit in a k-bounded heap.
+        """
+        if k <= 0 or not self.ids:
+            return []
+        center_row, center_column = _cell_row(latitude), _cell_column(longitude)
+        _, _, lon_ranges = bounding_box(latitude, longitude, max_radius_km)
+        if lon_ranges == [(-180.0, 180.0)]:
+            box_columns = math.inf
+        else:
+            box_columns = math.ceil(sum(end - start for start, end in lon_ranges) / 2 / GEO_CELL_DEGREES) + 1
+        best: List[_Farther] = [] # heapq min-heap of _Farther, so best[0] is the farthest kept
+        visited, width = -1, 0 # Half-widths (cells) of the visited square and of the next one
+        while True:
+            rows = self._rows_in(_band_ranges(center_row, center_column, visited, width))
+            if rows.size:
+                distances = haversine_km_many(latitude, longitude, self.latitudes_rad[rows],
+                                              self.longitudes_rad[rows], self.cos_latitudes[rows])
+                keep = distances <= max_radius_km
+                if after is not None:
+                    keep &= distances >= after[0] # Ties on the cursor distance are settled by id below
+                if len(best) == k:
+                    keep &= distances <= best[0].distance
+                for row, distance in zip(rows[keep].tolist(), distances[keep].tolist()):
+                    key = (distance, self.id_keys[row])
+                    if after is not None and key <= after:
+                        continue
+                    if len(best) < k:
+                        heapq.heappush(best, _Farther(distance, self.id_keys[row], row))
+                    elif key < (best[0].distance, best[0].id_key):
+                        heapq.heapreplace(best, _Farther(distance, self.id_keys[row], row))
+            visited = width
+            bound = _unvisited_bound_km(latitude, visited, box_columns)
+            if bound > max_radius_km or (len(best) == k and best[0].distance <= bound):
+                break
+            if len(best) < k:
+                width = max(visited + 1, 2 * visited)
+            else:
+                width = max(visited + 1, _width_for_km(latitude, best[0].distance))
+        return [(self.ids[entry.row], entry.distance) for entry in sorted(best, key=lambda e: (e.distance, e.id_key))]
+
+
+class _Farther:
+    """Heap entry ordered farthest first, so heapq's min-heap keeps the k nearest."""
+    __slots__ = ('distance', 'id_key', 'row')
+
+    def __init__(self, distance: float, id_key: str, row: int):
+        self.distance, self.id_key, self.row = distance, id_key, row
+
+    def __lt__(self, other: "_Farther") -> bool:
+        return (self.distance, self.id_key) > (other.distance, other.id_key)
+
+
+def _band_ranges(center_row: int, center_column: int, inner: int, outer: int) -> List[Tuple[int, int]]:
+    """
+    Cell ranges of the square of half-width `outer` cells around a cell, minus the
+    already visited square of half-width `inner` (-1: nothing visited yet).
+    """
+    def row_span(row, first_column, last_column):
+        base = row * GEO_CELL_COLUMNS
+        if last_column - first_column + 1 >= GEO_CELL_COLUMNS:
+            return [(base, base + GEO_CELL_COLUMNS - 1)]
+        first_column %= GEO_CELL_COLUMNS
+        last_column %= GEO_CELL_COLUMNS
+        if first_column <= last_column:
+            return [(base + first_column, base + last_column)]
+        return [(base + first_column, base + GEO_CELL_COLUMNS - 1), (base, base + last_column)] # Antimeridian
+
+    ranges = []
+    first_column, last_column = center_column - outer, center_column + outer
+    for row in range(max(center_row - outer, 0), min(center_row + outer, GEO_CELL_ROWS - 1) + 1):
+        if inner < 0 or abs(row - center_row) > inner: # Above / below the visited square: the whole span
+            ranges += row_span(row, first_column, last_column)
+        elif 2 * inner + 1 >= GEO_CELL_COLUMNS: # The visited square already spans the whole row
+            continue
+        elif 2 * outer + 1 >= GEO_CELL_COLUMNS: # Beside it, wrapping all the way round: the rest of the row
+            ranges += row_span(row, center_column + inner + 1, center_column - inner - 1 + GEO_CELL_COLUMNS)
+        else: # Beside it: the columns left and right of it
+            ranges += row_span(row, first_column, center_column - inner - 1)
+            ranges += row_span(row, center_column + inner + 1, last_column)
+    return ranges
+
+
+def _width_for_km(latitude: float, distance_km: float) -> int:
+    """Square half-width (cells) at which _unvisited_bound_km() reaches distance_km."""
+    north_south = math.degrees(distance_km / EARTH_RADIUS_KM)
+    ratio = math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi / 2)) / max(math.cos(math.radians(latitude)), 1e-12)
+    east_west = math.degrees(math.asin(ratio)) if ratio < 1.0 else 180.0
+    return math.ceil(max(north_south, east_west) / GEO_CELL_DEGREES)
+
+
+def _unvisited_bound_km(latitude: float, ring: int, box_columns: float) -> float:
+    """
+    Lower bound on the distance to any point outside the square of half-width `ring`
+    cells: such a point lies at least ring whole cells beyond the user's cell,
+    north/south or east/west.
+    box_columns: columns either side of the user's cell that the search radius's bounding
+    box needs; once visited, unvisited columns are out of range altogether (this matters
+    near the poles, where the east/west bound alone grows very slowly).
+    """
+    span = math.radians(ring * GEO_CELL_DEGREES)
+    center_row = _cell_row(latitude)
+    if center_row - ring <= 0 and center_row + ring >= GEO_CELL_ROWS - 1:
+        north_south = math.inf
+    else:
+        north_south = EARTH_RADIUS_KM * span
+    if ring >= box_columns or 2 * ring + 1 >= GEO_CELL_COLUMNS:
+        east_west = math.inf
+    else: # Closest approach to a meridian span degrees away: asin(sin(dlon) * cos(lat)), dlon <= 90
+        east_west = EARTH_RADIUS_KM * math.asin(min(1.0, math.sin(min(span, math.pi / 2)) * math.cos(math.radians(latitude))))
+    return min(north_south, east_west)
+
+
+_store_lock = threading.Lock()
+_store: Optional[Tuple[int, CoordinateStore]] = None # (geo version, store) of this process
+
+
+def get_coordinate_store() -> CoordinateStore:
+    """This process's CoordinateStore, reloaded from the database when the geo version moved."""
+    global _store
+    from .models import Restaurant
+
+    version = get_geo_version()
+    current = _store
+    if current is not None and current[0] == version:
+        return current[1]
+    with _store_lock:
+        if _store is None or _store[0] != version:
+            rows = Restaurant.objects.filter(is_operational=True, latitude__isnull=False, longitude__isnull=False) \
+                .values_list('id', 'latitude', 'longitude')
+            _store = (version, CoordinateStore(rows))
+        return _store[1]
+
+
+def invalidate_coordinate_store() -> None:
+    """Drops this process's store and tells the other processes to reload theirs."""
+    global _store
+    _store = None
+    bump_geo_version()
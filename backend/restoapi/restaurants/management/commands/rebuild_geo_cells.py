@@ -0,0 +1,34 @@
+# backend/restaurants/management/commands/rebuild_geo_cells.py
+from django.core.management.base import BaseCommand
+
+from restaurants.geo import geo_cell
+from restaurants.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes Restaurant.geo_cell from latitude/longitude, for rows saved before the "
+        "grid index existed, written with queryset.update(), or after GEO_CELL_DEGREES changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Restaurants read and written per round trip.")
+
+    def handle(self, *args, **options):
+        checked = changed = 0
+        stale = []
+        for restaurant in Restaurant.objects.only('id', 'latitude', 'longitude', 'geo_cell') \
+                .order_by('pk').iterator(chunk_size=options['chunk_size']):
+            checked += 1
+            cell = geo_cell(restaurant.latitude, restaurant.longitude)
+            if cell != restaurant.geo_cell:
+                restaurant.geo_cell = cell
+                stale.append(restaurant)
+            if len(stale) >= options['chunk_size']:
+                Restaurant.objects.bulk_update(stale, ['geo_cell'])
+                changed += len(stale)
+                stale = []
+        if stale:
+            Restaurant.objects.bulk_update(stale, ['geo_cell'])
+            changed += len(stale)
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} restaurants; updated {changed} geo cells."))
@@ -0,0 +1,26 @@
+# backend/restaurants/management/commands/rebuild_search_terms.py
+from django.core.management.base import BaseCommand
+
+from restaurants.models import Restaurant
+from restaurants.search import reindex_restaurant
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-derives the restaurant search index (RestaurantSearchTerm) from names, descriptions, "
+        "cities and menu category names, for restaurants saved before the index existed, changed "
+        "with queryset.update(), or after the normalization in restaurants.search changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurant', help="Only reindex this restaurant ID.")
+
+    def handle(self, *args, **options):
+        restaurants = Restaurant.objects.order_by('pk')
+        if options['restaurant']:
+            restaurants = restaurants.filter(pk=options['restaurant'])
+        count = 0
+        for restaurant_id in restaurants.values_list('pk', flat=True).iterator():
+            reindex_restaurant(restaurant_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {count} restaurants for search."))
@@ -50,6 +50,9 @@ class Restaurant(models.Model):
     # and a PostGIS backend. For now, these are simple decimal fields.
     latitude = models.DecimalField(_("latitude"), max_digits=10, decimal_places=7, null=True, blank=True)
     longitude = models.DecimalField(_("longitude"), max_digits=10, decimal_places=7, null=True, blank=True)
+    # Grid cell of (latitude, longitude), kept in sync by save(); indexed so nearby
+    # searches only scan the cells around the user (see restaurants.geo).
+    geo_cell = models.PositiveIntegerField(_("geo cell"), null=True, blank=True, editable=False, db_index=True)
 
     # Branding
     logo_image = models.ImageField(_("logo image"), upload_to='restaurants/logos/', blank=True, null=True)
@@ -94,6 +97,11 @@ class Restaurant(models.Model):
                 slug = f"{base_slug}-{counter}"
                 counter += 1
             self.slug = slug
+        from .geo import geo_cell
+        self.geo_cell = geo_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geo_cell'}
         super().save(*args, **kwargs)
 
     def get_full_address(self) -> str:
@@ -192,6 +200,29 @@ class SpecialDayOverride(models.Model):
         elif self.open_time or self.close_time: # If closed all day, open/close times should be null
             raise ValidationError(_("If marked as closed all day, open and close times should be blank."))
 
+class RestaurantSearchTerm(models.Model):
+    """
+    One trigram of a restaurant's searchable text (name, description, city and menu
+    category names), the index behind restaurant search (see restaurants.search).
+    Kept up to date from save signals; rebuild with `manage.py rebuild_search_terms`.
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+        verbose_name=_("restaurant")
+    )
+    term = models.CharField(_("term"), max_length=3)
+
+    class Meta:
+        verbose_name = _("restaurant search term")
+        verbose_name_plural = _("restaurant search terms")
+        # Term first: lookups read all candidate restaurants having a query trigram
+        unique_together = [['term', 'restaurant']]
+
+    def __str__(self):
+        return f"{self.restaurant_id}: {self.term!r}"
+
 # Potentially in a new 'staff' app or even 'restaurants' app
 # class StaffLocationAssignment(models.Model):
 #     staff_user = models.ForeignKey('users.User', on_delete=models.CASCADE)
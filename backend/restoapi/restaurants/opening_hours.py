@@ -0,0 +1,160 @@
+# backend/restaurants/opening_hours.py
+"""
+"Is it open now?" for many restaurants at once. Each restaurant's OperatingHoursRules
+and upcoming SpecialDayOverrides are compiled into an OpeningSchedule (sorted open
+intervals per weekday plus per-date replacements) that lives in the shared Django cache
+and is dropped whenever a rule or override changes (restaurants.signals). Evaluating a
+whole page of restaurants is then one cache get_many(), plus two queries for the
+schedules not cached yet.
+
+Times are local to the project TIME_ZONE (restaurants have no time zone of their own).
+"""
+import bisect
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.utils import timezone
+
+MINUTES_PER_DAY = 24 * 60
+# Days ahead searched for the next opening (a week plus a day of overrides).
+NEXT_OPEN_SEARCH_DAYS = 8
+OPENING_SCHEDULE_KEY = "restaurants:opening:{restaurant_id}"
+# Compiled schedules hold the overrides from the compile day on, so they are rebuilt at
+# least daily even without edits.
+OPENING_SCHEDULE_TTL_SECONDS = 24 * 3600
+
+Intervals = List[Tuple[int, int]] # [(open minute, close minute)] of a day; close > 1440 runs past midnight
+
+
+def _minutes(value: dt_time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def _merge(intervals: Iterable[Tuple[int, int]]) -> Intervals:
+    merged: Intervals = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class OpeningSchedule:
+    """
+    Compiled opening hours of one restaurant: per weekday (0=Monday) the sorted, merged
+    open intervals in minutes from that day's midnight (overnight shifts end after 1440),
+    and per overridden date the intervals that replace the weekday's ([] = closed).
+    has_hours is False for a restaurant without any rules: its status is unknown.
+    """
+
+    def __init__(self, weekly: Dict[int, Intervals], overrides: Dict[date, Intervals], has_hours: bool = True):
+        self.weekly = weekly
+        self.overrides = overrides
+        self.has_hours = has_hours
+
+    @classmethod
+    def compile(cls, rules: Iterable[Tuple[int, dt_time, dt_time, bool]],
+                overrides: Iterable[Tuple[date, bool, Optional[dt_time], Optional[dt_time]]] = ()) -> "OpeningSchedule":
+        """
+        rules: OperatingHoursRule (day_of_week, open_time, close_time, is_closed_on_this_day_override);
+        a close at or before the open time runs past midnight, a closed flag closes the whole weekday.
+        overrides: SpecialDayOverride (date, is_closed_all_day, open_time, close_time); one without
+        times (and not closed) keeps the regular hours.
+        """
+        rules = list(rules)
+        closed_days = {day for day, _, _, closed in rules if closed}
+        by_day: Dict[int, Intervals] = {}
+        for day, open_time, close_time, closed in rules:
+            if day in closed_days or open_time is None or close_time is None:
+                continue
+            start, end = _minutes(open_time), _minutes(close_time)
+            by_day.setdefault(day, []).append((start, end if end > start else end + MINUTES_PER_DAY))
+        special: Dict[date, Intervals] = {}
+        for day, closed_all_day, open_time, close_time in overrides:
+            if closed_all_day:
+                special[day] = []
+            elif open_time is not None and close_time is not None:
+                start, end = _minutes(open_time), _minutes(close_time)
+                special[day] = [(start, end if end > start else end + MINUTES_PER_DAY)]
+        return cls({day: _merge(intervals) for day, intervals in by_day.items()}, special, has_hours=bool(rules))
+
+    def day_intervals(self, day: date) -> Intervals:
+        if day in self.overrides:
+            return self.overrides[day]
+        return self.weekly.get(day.weekday(), [])
+
+    def is_open(self, moment: datetime) -> Optional[bool]:
+        """Open at a local (naive or aware, read as local wall-clock) datetime; None if hours are unknown."""
+        if not self.has_hours and not self.overrides:
+            return None
+        day, minute = moment.date(), moment.hour * 60 + moment.minute
+        intervals = self.day_intervals(day)
+        position = bisect.bisect_right(intervals, (minute, float('inf'))) - 1 # Last interval opening at or before now
+        if position >= 0 and minute < intervals[position][1]:
+            return True
+        # Yesterday's overnight shift still running
+        return any(end > MINUTES_PER_DAY and minute + MINUTES_PER_DAY < end
+                   for _, end in self.day_intervals(day - timedelta(days=1)))
+
+    def next_open(self, moment: datetime) -> Optional[datetime]:
+        """Next local opening time strictly after moment (within NEXT_OPEN_SEARCH_DAYS), or None."""
+        day, minute = moment.date(), moment.hour * 60 + moment.minute
+        for offset in range(NEXT_OPEN_SEARCH_DAYS):
+            current = day + timedelta(days=offset)
+            for start, _ in self.day_intervals(current):
+                if offset or start > minute:
+                    return datetime.combine(current, dt_time.min, tzinfo=moment.tzinfo) + timedelta(minutes=start)
+        return None
+
+    def status(self, moment: datetime) -> Tuple[Optional[bool], Optional[datetime]]:
+        """(is open, next opening if closed) at a local datetime."""
+        is_open = self.is_open(moment)
+        return is_open, self.next_open(moment) if is_open is False else None
+
+
+def compile_opening_schedules(restaurant_ids, today: Optional[date] = None) -> Dict:
+    """{restaurant_id: OpeningSchedule} from the database: two queries however many restaurants."""
+    from .models import OperatingHoursRule, SpecialDayOverride
+
+    today = today or timezone.localdate()
+    rules, overrides = {}, {}
+    for restaurant_id, *rule in OperatingHoursRule.objects.filter(restaurant_id__in=restaurant_ids).values_list(
+            'restaurant_id', 'day_of_week', 'open_time', 'close_time', 'is_closed_on_this_day_override'):
+        rules.setdefault(restaurant_id, []).append(rule)
+    for restaurant_id, *override in SpecialDayOverride.objects.filter(
+            restaurant_id__in=restaurant_ids, date__gte=today - timedelta(days=1)).values_list(
+            'restaurant_id', 'date', 'is_closed_all_day', 'open_time', 'close_time'):
+        overrides.setdefault(restaurant_id, []).append(override)
+    return {
+        restaurant_id: OpeningSchedule.compile(rules.get(restaurant_id, ()), overrides.get(restaurant_id, ()))
+        for restaurant_id in restaurant_ids
+    }
+
+
+def get_opening_schedules(restaurant_ids) -> Dict:
+    """{restaurant_id: OpeningSchedule}, compiled ones from the cache, the rest compiled and cached."""
+    restaurant_ids = list(dict.fromkeys(restaurant_ids))
+    keys = {OPENING_SCHEDULE_KEY.format(restaurant_id=restaurant_id): restaurant_id for restaurant_id in restaurant_ids}
+    cached = cache.get_many(keys)
+    schedules = {keys[key]: schedule for key, schedule in cached.items()}
+    missing = [restaurant_id for restaurant_id in restaurant_ids if restaurant_id not in schedules]
+    if missing:
+        compiled = compile_opening_schedules(missing)
+        cache.set_many(
+            {OPENING_SCHEDULE_KEY.format(restaurant_id=restaurant_id): schedule for restaurant_id, schedule in compiled.items()},
+            timeout=OPENING_SCHEDULE_TTL_SECONDS
+        )
+        schedules.update(compiled)
+    return schedules
+
+
+def invalidate_opening_schedule(restaurant_id) -> None:
+    cache.delete(OPENING_SCHEDULE_KEY.format(restaurant_id=restaurant_id))
+
+
+def opening_statuses(restaurant_ids, now: Optional[datetime] = None) -> Dict:
+    """{restaurant_id: (is open, next opening if closed)} for many restaurants in one call."""
+    local_now = timezone.localtime(now or timezone.now())
+    return {restaurant_id: schedule.status(local_now) for restaurant_id, schedule in get_opening_schedules(restaurant_ids).items()}
@@ -0,0 +1,200 @@
+# backend/restaurants/search.py
+"""
+Restaurant text search over an indexed trigram table (RestaurantSearchTerm) instead of
+name__icontains scans. A restaurant's name, description, city and menu category names
+are normalized (accents stripped, case folded, split into words) and stored as the set
+of word trigrams, padded like pg_trgm: "pizza" -> "  p", " pi", "piz", "izz", "zza", "za ".
+
+A query word is matched as a prefix of one of the restaurant's words: "piz" needs
+"  p", " pi", "piz", all of which any word starting with "piz" has. Words of
+SEARCH_TYPO_MIN_LENGTH letters or more may be one edit away from such a prefix
+("pizzs", "brunhc"), which costs them a few trigrams: up to SEARCH_TYPO_MAX_MISSING, or
+SEARCH_LONG_TYPO_MAX_MISSING from SEARCH_LONG_TYPO_MIN_LENGTH letters on. Every query
+word must match.
+
+The trigram counts only shortlist restaurants (the trigrams may come from different
+words); the shortlist is then checked word by word against the restaurants' texts.
+Lookups are always restricted to the candidate restaurants of the spatial filter (a
+page of ids, or the grid prefilter as a subquery), so they read the (term, restaurant)
+index for the restaurants around the search area only.
+"""
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Set
+
+from django.db.models import Count
+
+# Query words looked up (one indexed query each); the rest are ignored.
+SEARCH_MAX_QUERY_WORDS = 5
+# Query words at least this long are matched with typo tolerance, shorter ones as exact prefixes.
+SEARCH_TYPO_MIN_LENGTH = 5
+# Query trigrams a typo may cost (a substituted letter changes up to three, a swap two);
+# shorter words tolerate fewer, so a typo in their middle is not found.
+SEARCH_TYPO_MAX_MISSING = 2
+SEARCH_LONG_TYPO_MIN_LENGTH = 7
+SEARCH_LONG_TYPO_MAX_MISSING = 3
+# Restaurant ids sent as one IN list at most; larger candidate sets are chunked or
+# looked up through a subquery.
+SEARCH_MAX_ID_LIST = 500
+# Description characters indexed (long descriptions add trigrams, not findability).
+SEARCH_DESCRIPTION_MAX_CHARS = 2000
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercase, accent-free words of text: "Café Zürich-Nord" -> ['cafe', 'zurich', 'nord']."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return _WORD_RE.findall(stripped.casefold())
+
+
+def document_trigrams(texts: Iterable[str]) -> Set[str]:
+    """Trigrams stored for a restaurant's searchable texts (each word padded '  word ')."""
+    trigrams = set()
+    for text in texts:
+        for word in normalize_words(text):
+            padded = f"  {word} "
+            trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def query_trigrams(word: str) -> List[str]:
+    """Trigrams a restaurant needs for a normalized query word, as a prefix (no trailing pad)."""
+    padded = f"  {word}"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+def required_matches(word: str, trigram_count: int) -> int:
+    """How many of the word's query trigrams must be present; fewer than all tolerates a typo."""
+    if len(word) >= SEARCH_LONG_TYPO_MIN_LENGTH:
+        return trigram_count - SEARCH_LONG_TYPO_MAX_MISSING
+    if len(word) >= SEARCH_TYPO_MIN_LENGTH:
+        return trigram_count - SEARCH_TYPO_MAX_MISSING
+    return trigram_count
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """a and b differ by at most one inserted, deleted or substituted letter, or one swap of neighbours."""
+    if len(a) == len(b):
+        differences = [i for i, (char_a, char_b) in enumerate(zip(a, b)) if char_a != char_b]
+        if len(differences) == 2:
+            first, second = differences
+            return second == first + 1 and a[first] == b[second] and a[second] == b[first]
+        return len(differences) <= 1
+    if abs(len(a) - len(b)) != 1:
+        return False
+    shorter, longer = sorted((a, b), key=len)
+    common = 0
+    while common < len(shorter) and shorter[common] == longer[common]:
+        common += 1
+    return shorter[common:] == longer[common + 1:]
+
+
+def word_matches(query_word: str, word: str) -> bool:
+    """
+    query_word is a prefix of word: exactly if it is shorter than SEARCH_TYPO_MIN_LENGTH,
+    else within one edit ("brunhc" matches "brunch", but not "brunswick").
+    """
+    if word.startswith(query_word):
+        return True
+    if len(query_word) < SEARCH_TYPO_MIN_LENGTH:
+        return False
+    # The prefix a one-letter insertion, substitution / swap or deletion would have typed
+    return any(_within_one_edit(query_word, word[:length])
+               for length in (len(query_word) - 1, len(query_word), len(query_word) + 1) if length <= len(word))
+
+
+def texts_match(query_words: List[str], texts: Iterable[str]) -> bool:
+    """Every normalized query word matches (word_matches) a word of texts."""
+    words = {word for text in texts for word in normalize_words(text)}
+    return all(any(word_matches(query_word, word) for word in words) for query_word in query_words)
+
+
+def _id_chunks(restaurant_ids) -> Iterable[List]:
+    """restaurant_ids in lists of at most SEARCH_MAX_ID_LIST."""
+    restaurant_ids = list(restaurant_ids)
+    for start in range(0, len(restaurant_ids), SEARCH_MAX_ID_LIST):
+        yield restaurant_ids[start:start + SEARCH_MAX_ID_LIST]
+
+
+def search_texts_by_restaurant(restaurant_ids) -> Dict[Any, List[str]]:
+    """
+    {restaurant_id: searchable texts} (name, description, city and menu category names)
+    of the restaurants that exist, in two queries per SEARCH_MAX_ID_LIST restaurants.
+    """
+    from menu.models import MenuCategory
+    from .models import Restaurant
+
+    texts = {}
+    for chunk in _id_chunks(restaurant_ids):
+        chunk_texts = {
+            restaurant_id: [name, (description or '')[:SEARCH_DESCRIPTION_MAX_CHARS], city]
+            for restaurant_id, name, description, city in Restaurant.objects.filter(pk__in=chunk)
+            .values_list('pk', 'name', 'description', 'city')
+        }
+        for restaurant_id, name in MenuCategory.objects.filter(restaurant_id__in=list(chunk_texts)) \
+                .values_list('restaurant_id', 'name'):
+            chunk_texts[restaurant_id].append(name)
+        texts.update(chunk_texts)
+    return texts
+
+
+def restaurant_search_texts(restaurant_id) -> List[str]:
+    """The searchable texts of a restaurant: name, description, city and menu category names."""
+    return search_texts_by_restaurant([restaurant_id]).get(restaurant_id, [])
+
+
+def reindex_restaurant(restaurant_id) -> None:
+    """Brings the restaurant's RestaurantSearchTerm rows in line with its current texts (a diff, not a rewrite)."""
+    from .models import RestaurantSearchTerm
+
+    texts = restaurant_search_texts(restaurant_id)
+    if not texts: # Deleted; its terms went with it
+        return
+    wanted = document_trigrams(texts)
+    existing = set(RestaurantSearchTerm.objects.filter(restaurant_id=restaurant_id).values_list('term', flat=True))
+    if existing - wanted:
+        RestaurantSearchTerm.objects.filter(restaurant_id=restaurant_id, term__in=existing - wanted).delete()
+    RestaurantSearchTerm.objects.bulk_create(
+        [RestaurantSearchTerm(restaurant_id=restaurant_id, term=term) for term in wanted - existing],
+        ignore_conflicts=True # A concurrent reindex of the same restaurant
+    )
+
+
+def search_restaurant_ids(query: str, restaurant_ids) -> Set:
+    """
+    The subset of restaurant_ids whose text matches every word of query. restaurant_ids
+    is either a list of candidates (a page of the spatial filter) or a queryset of
+    restaurant ids (the indexed grid prefilter of a whole radius, see restaurants.geo),
+    which the lookups run as a subquery instead of a long IN list. A query without any
+    words filters nothing.
+    """
+    from django.db.models import QuerySet
+    from .models import RestaurantSearchTerm
+
+    query_words = list(dict.fromkeys(normalize_words(query)))[:SEARCH_MAX_QUERY_WORDS]
+    if not query_words:
+        return set(restaurant_ids)
+    subquery = restaurant_ids if isinstance(restaurant_ids, QuerySet) else None
+    matching = set(restaurant_ids) if subquery is None else None
+    for word in query_words:
+        if matching is not None and not matching:
+            break
+        # Later words look up the restaurants still matching, once few enough for an IN list
+        candidates = subquery if matching is None or (subquery is not None and len(matching) > SEARCH_MAX_ID_LIST) \
+            else matching
+        trigrams = query_trigrams(word)
+        found = set()
+        for chunk in [candidates] if candidates is subquery else _id_chunks(candidates):
+            found.update(
+                RestaurantSearchTerm.objects.filter(restaurant_id__in=chunk, term__in=trigrams)
+                .values('restaurant_id').annotate(matched=Count('term'))
+                .filter(matched__gte=required_matches(word, len(trigrams)))
+                .values_list('restaurant_id', flat=True)
+            )
+        matching = found if matching is None else matching & found
+    if matching and query_words: # Word by word check of the shortlist
+        texts = search_texts_by_restaurant(matching)
+        matching = {restaurant_id for restaurant_id in matching if texts_match(query_words, texts.get(restaurant_id, ()))}
+    return matching
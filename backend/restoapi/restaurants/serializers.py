@@ -135,12 +135,47 @@ class RestaurantManageSerializer(serializers.ModelSerializer):
 
         return instance
 
+class RestaurantSlimListSerializer(serializers.ListSerializer):
+    """
+    Evaluates the open/closed status of the whole list in one batch (restaurants.opening_hours)
+    before serializing the rows, so each row reads it from the context.
+    """
+    def to_representation(self, data):
+        from .opening_hours import opening_statuses
+
+        restaurants = list(data.all() if hasattr(data, 'all') else data)
+        self.context.setdefault('opening_statuses', {}).update(
+            opening_statuses([restaurant.pk for restaurant in restaurants])
+        )
+        return super().to_representation(restaurants)
+
+
 class RestaurantSlimSerializer(serializers.ModelSerializer):
     """
     A lightweight serializer for restaurant listings, e.g., in nearby search.
     """
     distance_km = serializers.FloatField(read_only=True, required=False, allow_null=True) # For annotated distance
+    is_open_now = serializers.SerializerMethodField() # None when the restaurant has no opening hours
+    next_open_at = serializers.SerializerMethodField() # Next opening within a week, when closed
 
     class Meta:
         model = Restaurant
-        fields = ['id', 'name', 'slug', 'city', 'latitude', 'longitude', 'logo_image', 'is_operational', 'distance_km']
\ No newline at end of file
+        fields = ['id', 'name', 'slug', 'city', 'latitude', 'longitude', 'logo_image', 'is_operational', 'distance_km',
+                  'is_open_now', 'next_open_at']
+        list_serializer_class = RestaurantSlimListSerializer
+
+    def _opening_status(self, obj):
+        if not obj.is_operational:
+            return False, None
+        statuses = self.context.setdefault('opening_statuses', {})
+        if obj.pk not in statuses: # Serialized on its own (or nested): evaluate just this one
+            from .opening_hours import opening_statuses
+            statuses.update(opening_statuses([obj.pk]))
+        return statuses[obj.pk]
+
+    def get_is_open_now(self, obj):
+        return self._opening_status(obj)[0]
+
+    def get_next_open_at(self, obj):
+        next_open = self._opening_status(obj)[1]
+        return serializers.DateTimeField().to_representation(next_open) if next_open else None
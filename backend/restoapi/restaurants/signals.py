@@ -0,0 +1,50 @@
+# backend/restaurants/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Restaurant, OperatingHoursRule, SpecialDayOverride
+
+# Fields the nearby search's CoordinateStore is built from
+GEO_FIELDS = ('latitude', 'longitude', 'is_operational')
+# Restaurant fields indexed for text search (restaurants.search), besides menu category names
+SEARCH_FIELDS = ('name', 'description', 'city')
+
+
+@receiver(pre_save, sender=Restaurant)
+def restaurant_location_loaded(sender, instance, **kwargs):
+    # Remember the stored location and searchable text so post_save only refreshes what changed
+    if instance._state.adding:
+        instance._previous_geo = instance._previous_search = None
+        return
+    row = sender.objects.filter(pk=instance.pk).values_list(*GEO_FIELDS, *SEARCH_FIELDS).first()
+    instance._previous_geo = row and row[:len(GEO_FIELDS)]
+    instance._previous_search = row and row[len(GEO_FIELDS):]
+
+
+@receiver([post_save, post_delete], sender=Restaurant)
+def restaurant_location_changed(sender, instance, **kwargs):
+    from .geo import invalidate_coordinate_store
+
+    if kwargs.get('signal') is post_save and not kwargs.get('created') \
+            and getattr(instance, '_previous_geo', None) == tuple(getattr(instance, field) for field in GEO_FIELDS):
+        return # Name / address / branding edits do not move the restaurant
+    transaction.on_commit(invalidate_coordinate_store)
+
+
+@receiver(post_save, sender=Restaurant)
+def restaurant_search_text_changed(sender, instance, created, **kwargs):
+    from .search import reindex_restaurant
+
+    if not created and getattr(instance, '_previous_search', None) == tuple(getattr(instance, field) for field in SEARCH_FIELDS):
+        return
+    transaction.on_commit(lambda: reindex_restaurant(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=OperatingHoursRule)
+@receiver([post_save, post_delete], sender=SpecialDayOverride)
+def opening_hours_changed(sender, instance, **kwargs):
+    from .opening_hours import invalidate_opening_schedule
+
+    # Drop the compiled schedule; the next status lookup recompiles it
+    transaction.on_commit(lambda: invalidate_opening_schedule(instance.restaurant_id))
@@ -1,3 +1,125 @@
-from django.test import TestCase
+import random
+from datetime import date, datetime, time
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .geo import CoordinateStore, haversine_km_many
+from .opening_hours import OpeningSchedule
+from .search import document_trigrams, query_trigrams, required_matches, texts_match, word_matches
+
+
+def passes_trigram_shortlist(query_word, texts):
+    """The per-word trigram count search_restaurant_ids() runs in the database."""
+    trigrams = query_trigrams(query_word)
+    return len(set(trigrams) & document_trigrams(texts)) >= required_matches(query_word, len(trigrams))
+
+
+class RestaurantSearchTests(SimpleTestCase):
+    def test_prefixes_match(self):
+        self.assertTrue(texts_match(['piz'], ["Luigi's Pizzeria"]))
+        self.assertTrue(texts_match(['cafe', 'zur'], ["Café Zürich-Nord"]))
+        self.assertFalse(texts_match(['izz'], ["Luigi's Pizzeria"]))
+
+    def test_one_typo_matches(self):
+        self.assertTrue(texts_match(['pizzs'], ["Pizza Place"]))
+        self.assertTrue(texts_match(['brunhc'], ["Brunch Bar"]))
+        self.assertTrue(texts_match(['margerita'], ["Margherita Corner"]))
+        self.assertTrue(passes_trigram_shortlist('pizzs', ["Pizza Place"]))
+        self.assertTrue(passes_trigram_shortlist('brunhc', ["Brunch Bar"]))
+
+    def test_trigrams_spread_over_several_words_do_not_match(self):
+        self.assertFalse(texts_match(['sushi'], ["Sunset Shish House"]))
+        self.assertFalse(texts_match(['brunch'], ["Brunswick Diner"]))
+
+    def test_short_words_need_an_exact_prefix(self):
+        self.assertTrue(word_matches('sush', 'sushi'))
+        self.assertFalse(word_matches('susj', 'sushi'))
+
+    def test_every_query_word_must_match(self):
+        self.assertTrue(texts_match(['sushi', 'bar'], ["Sushi Bar", "Tokyo"]))
+        self.assertFalse(texts_match(['sushi', 'pizza'], ["Sushi Bar", "Tokyo"]))
+
+    def test_short_words_tolerate_fewer_missing_trigrams(self):
+        self.assertEqual(required_matches('piz', 3), 3)
+        self.assertEqual(required_matches('sushi', 5), 3)
+        self.assertEqual(required_matches('margerita', 9), 6)
+
+
+class CoordinateStoreTests(SimpleTestCase):
+    def setUp(self):
+        generator = random.Random(7)
+        rows = [(f"r{i}", 48.85 + generator.uniform(-0.3, 0.3), 2.35 + generator.uniform(-0.4, 0.4)) for i in range(300)]
+        rows += [(f"a{i}", -17.0 + generator.uniform(-0.2, 0.2), generator.choice([179.9, -179.9]) + generator.uniform(-0.08, 0.08))
+                 for i in range(60)] # Around the antimeridian
+        rows += [(f"t{i}", 48.9, 2.4) for i in range(5)] # Tied distances
+        self.store = CoordinateStore(rows)
+
+    def brute_force(self, latitude, longitude, radius_km):
+        distances = haversine_km_many(latitude, longitude, self.store.latitudes_rad, self.store.longitudes_rad,
+                                      self.store.cos_latitudes).tolist()
+        return sorted((distance, str(restaurant_id)) for restaurant_id, distance in zip(self.store.ids, distances)
+                      if distance <= radius_km)
+
+    def paged(self, latitude, longitude, radius_km, page_size):
+        rows, after = [], None
+        while True:
+            page = self.store.nearest(latitude, longitude, page_size, radius_km, after=after)
+            rows += page
+            if len(page) < page_size:
+                return [(distance, str(restaurant_id)) for restaurant_id, distance in rows]
+            after = (page[-1][1], str(page[-1][0]))
+
+    def test_nearest_pages_match_a_brute_force_sort(self):
+        for latitude, longitude, radius_km, page_size in [
+            (48.85, 2.35, 15, 7),
+            (48.9, 2.4, 30, 4), # Starts on the tied points
+            (-17.0, 179.95, 25, 9),
+            (-17.0, -179.99, 40, 1),
+        ]:
+            with self.subTest(latitude=latitude, longitude=longitude):
+                expected = self.brute_force(latitude, longitude, radius_km)
+                self.assertTrue(expected)
+                self.assertEqual(self.paged(latitude, longitude, radius_km, page_size), expected)
+
+    def test_within_radius_keeps_the_nearest(self):
+        expected = self.brute_force(48.85, 2.35, 10)
+        ids, distances = self.store.within_radius(48.85, 2.35, 10, limit=20)
+        self.assertEqual(distances.tolist(), [distance for distance, _ in expected[:20]])
+        ids, distances = self.store.within_radius(-17.0, 179.99, 30)
+        self.assertEqual(sorted(map(str, ids)), sorted(key for _, key in self.brute_force(-17.0, 179.99, 30)))
+
+
+class OpeningScheduleTests(SimpleTestCase):
+    def setUp(self):
+        self.schedule = OpeningSchedule.compile(
+            [
+                (0, time(11), time(14), False),
+                (0, time(18), time(2), False), # Monday evening, past midnight
+                (1, time(9), time(17), True), # Tuesday closed
+                (2, time(9), time(17), False),
+            ],
+            [
+                (date(2026, 10, 21), True, None, None),
+                (date(2026, 10, 28), False, time(12), time(13)),
+            ],
+        )
+
+    def test_between_shifts(self):
+        self.assertEqual(self.schedule.status(datetime(2026, 10, 19, 10)), (False, datetime(2026, 10, 19, 11)))
+        self.assertEqual(self.schedule.status(datetime(2026, 10, 19, 15)), (False, datetime(2026, 10, 19, 18)))
+        self.assertTrue(self.schedule.is_open(datetime(2026, 10, 19, 13, 59)))
+
+    def test_overnight_shift_runs_into_the_next_day(self):
+        self.assertTrue(self.schedule.is_open(datetime(2026, 10, 19, 23, 30)))
+        self.assertTrue(self.schedule.is_open(datetime(2026, 10, 20, 1, 30)))
+        # Tuesday is closed and Wednesday is overridden closed: next opening is next Monday
+        self.assertEqual(self.schedule.status(datetime(2026, 10, 20, 2)), (False, datetime(2026, 10, 26, 11)))
+
+    def test_overrides_replace_the_weekday(self):
+        self.assertFalse(self.schedule.is_open(datetime(2026, 10, 21, 10)))
+        self.assertTrue(self.schedule.is_open(datetime(2026, 10, 28, 12, 30)))
+        self.assertFalse(self.schedule.is_open(datetime(2026, 10, 28, 10)))
+        self.assertEqual(self.schedule.status(datetime(2026, 10, 27, 3)), (False, datetime(2026, 10, 28, 12)))
+
+    def test_no_rules_is_unknown(self):
+        self.assertEqual(OpeningSchedule.compile([]).status(datetime(2026, 10, 19, 12)), (None, None))
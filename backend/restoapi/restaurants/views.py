@@ -1,14 +1,21 @@
 # backend/restaurants/views.py
+import base64
+import binascii
+import json
+
+from django.conf import settings
 from django.db.models import Q, F, ExpressionWrapper, FloatField
 from django.utils import timezone
 from rest_framework import viewsets, generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
-from math import radians, sin, cos, sqrt, atan2, asin # For Haversine
 
+from .geo import get_coordinate_store, within_radius_prefilter
 from .models import Restaurant, OperatingHoursRule, SpecialDayOverride
+from .search import search_restaurant_ids
 from .serializers import (
     RestaurantSerializer, RestaurantManageSerializer, RestaurantSlimSerializer,
     OperatingHoursRuleSerializer, SpecialDayOverrideSerializer
@@ -22,14 +29,24 @@ class NearbyRestaurantListView(generics.ListAPIView):
     """
     Lists restaurants near a given latitude/longitude.
     Requires 'lat' and 'lon' query parameters.
-    Optional 'radius' (in km, default 5) and 'search' (for name) parameters.
+    Optional 'radius' (in km, default 5, at most settings.NEARBY_MAX_RADIUS_KM) and
+    'search' (name, description, city or menu category words; prefix and typo-tolerant,
+    see restaurants.search) parameters.
+    The paginated list holds at most settings.NEARBY_MAX_RESULTS restaurants, the nearest
+    ones: 'count' is capped there and the response's 'truncated' is true when more lie
+    in the radius. With 'mode=nearest', returns the nearest 'page_size' restaurants and a 'next' link
+    carrying a (distance, id) cursor instead of numbered pages, so each page only costs
+    its own size (see CoordinateStore.nearest).
     """
     serializer_class = RestaurantSlimSerializer # Use slim serializer for lists
     permission_classes = [AllowAny]
     filter_backends = [DjangoFilterBackend] # For potential future filters like cuisine
     # filterset_fields = ['cuisine_tags__name'] # If you add cuisine tags
+    # Store lookups per nearest-mode page when the search term filters most rows out
+    NEAREST_MAX_ROUNDS = 10
 
-    def get_queryset(self):
+    def _location_params(self):
+        """(latitude, longitude, radius_km, search_term), or None if missing / invalid."""
         latitude_str = self.request.query_params.get('lat')
         longitude_str = self.request.query_params.get('lon')
         radius_km_str = self.request.query_params.get('radius', '5')
@@ -39,56 +56,117 @@ class NearbyRestaurantListView(generics.ListAPIView):
             # Potentially return popular restaurants or an error, or an empty list
             # For now, let's return an empty list if no location.
             # Alternatively: raise serializers.ValidationError("Latitude and longitude are required.")
-            return Restaurant.objects.none()
+            return None
 
         try:
             latitude = float(latitude_str)
             longitude = float(longitude_str)
             radius_km = float(radius_km_str)
         except ValueError:
-            return Restaurant.objects.none() # Invalid parameters
+            return None # Invalid parameters
 
-        # Base queryset: operational restaurants with location data
-        queryset = Restaurant.objects.filter(is_operational=True, latitude__isnull=False, longitude__isnull=False)
+        if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0) or radius_km <= 0:
+            return None
+        radius_km = min(radius_km, settings.NEARBY_MAX_RADIUS_KM) # Bounds the candidates of a search
+        return latitude, longitude, radius_km, search_term
+
+    def get_queryset(self):
+        params = self._location_params()
+        if params is None:
+            return Restaurant.objects.none()
+        latitude, longitude, radius_km, search_term = params
 
+        # Nearest operational restaurants from this process's coordinate arrays (one vectorized
+        # distance pass over the grid cells around the user, see restaurants.geo), then a
+        # single fetch of those rows.
+        # One row past the cap tells whether the list was cut.
+        restaurant_ids, distances = get_coordinate_store().within_radius(
+            latitude, longitude, radius_km, limit=None if search_term else settings.NEARBY_MAX_RESULTS + 1
+        )
+        nearest = list(zip(restaurant_ids, distances.tolist()))
         if search_term:
-            queryset = queryset.filter(name__icontains=search_term)
+            # Indexed trigram lookup over every restaurant in the radius (see restaurants.search),
+            # then the nearest matches: cutting to NEARBY_MAX_RESULTS first would drop the
+            # matches beyond the nearest non-matching rows. The candidates go to the database as
+            # the indexed grid prefilter (geo_cell ranges and bounding box), not as an id list.
+            candidates = Restaurant.objects.filter(within_radius_prefilter(latitude, longitude, radius_km)).values('pk')
+            matching = search_restaurant_ids(search_term, candidates)
+            nearest = [row for row in nearest if row[0] in matching]
+        self.results_truncated = len(nearest) > settings.NEARBY_MAX_RESULTS
+        nearest = nearest[:settings.NEARBY_MAX_RESULTS]
+        restaurants = Restaurant.objects.filter(is_operational=True).in_bulk(
+            [restaurant_id for restaurant_id, _ in nearest]
+        )
 
-        # Haversine distance calculation (for non-PostGIS setups)
-        # This is NOT efficient for millions of records. PostGIS is the way.
-        # For PostGIS, you'd use Distance functions and spatial indexes.
-        
-        # Convert user location to radians
-        lat1_rad = radians(latitude)
-        lon1_rad = radians(longitude)
-        R = 6371  # Earth radius in kilometers
-
-        # Annotate with distance. This can be slow without DB level support.
-        # It's often better to filter with a bounding box first, then calculate precise distance.
-        # For very large datasets, this in-Python loop is a bottleneck.
         restaurants_with_distance = []
-        for restaurant in queryset: # This iterates over ALL restaurants if no search term. BE CAREFUL.
-            if restaurant.latitude is None or restaurant.longitude is None:
-                continue
+        for restaurant_id, distance in nearest:
+            restaurant = restaurants.get(restaurant_id)
+            if restaurant is not None: # Filtered out by the search term (or gone since the store was built)
+                restaurant.distance_km = round(distance, 2) # Annotate the instance
+                restaurants_with_distance.append(restaurant) # Already nearest first
+        
+        return restaurants_with_distance # Returns a list, ListAPIView handles pagination if setup
 
-            lat2_rad = radians(float(restaurant.latitude))
-            lon2_rad = radians(float(restaurant.longitude))
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('mode') != 'nearest':
+            self.results_truncated = False
+            response = super().list(request, *args, **kwargs)
+            if isinstance(response.data, dict): # Paginated
+                response.data['truncated'] = self.results_truncated
+            return response
 
-            dlon = lon2_rad - lon1_rad
-            dlat = lat2_rad - lat1_rad
+        params = self._location_params()
+        try:
+            page_size = int(request.query_params.get('page_size', settings.REST_FRAMEWORK['PAGE_SIZE']))
+            after = decode_nearest_cursor(request.query_params.get('cursor'))
+        except ValueError:
+            return Response({'detail': "Invalid page_size or cursor."}, status=status.HTTP_400_BAD_REQUEST)
+        if params is None:
+            return Response({'next': None, 'results': []})
+        latitude, longitude, radius_km, search_term = params
+        page_size = min(max(page_size, 1), settings.NEARBY_MAX_PAGE_SIZE)
 
-            a = sin(dlat / 2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(dlon / 2)**2
-            c = 2 * asin(sqrt(a)) # Using asin for better precision with small distances
-            distance = R * c
+        queryset = Restaurant.objects.filter(is_operational=True)
+        store = get_coordinate_store()
+        results, exhausted = [], False
+        for _ in range(self.NEAREST_MAX_ROUNDS):
+            wanted = page_size - len(results)
+            nearest = store.nearest(latitude, longitude, wanted, radius_km, after=after)
+            candidate_ids = [restaurant_id for restaurant_id, _ in nearest]
+            if search_term:
+                matching = search_restaurant_ids(search_term, candidate_ids)
+                candidate_ids = [restaurant_id for restaurant_id in candidate_ids if restaurant_id in matching]
+            restaurants = queryset.in_bulk(candidate_ids)
+            for restaurant_id, distance in nearest:
+                after = (distance, str(restaurant_id))
+                restaurant = restaurants.get(restaurant_id)
+                if restaurant is not None: # Filtered out by the search term (or gone since the store was built)
+                    restaurant.distance_km = round(distance, 2)
+                    results.append(restaurant)
+            exhausted = len(nearest) < wanted
+            if exhausted or len(results) >= page_size:
+                break
 
-            if distance <= radius_km:
-                restaurant.distance_km = round(distance, 2) # Annotate the instance
-                restaurants_with_distance.append(restaurant)
-        
-        # Sort by distance
-        restaurants_with_distance.sort(key=lambda r: r.distance_km)
-        
-        return restaurants_with_distance # Returns a list, ListAPIView handles pagination if setup
+        next_url = None
+        if not exhausted and after is not None:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', encode_nearest_cursor(after))
+        return Response({'next': next_url, 'results': self.get_serializer(results, many=True).data})
+
+
+def encode_nearest_cursor(after) -> str:
+    """Opaque 'next' cursor for a (distance, id) position; the float round-trips exactly through repr."""
+    return base64.urlsafe_b64encode(json.dumps([after[0], after[1]]).encode()).decode()
+
+
+def decode_nearest_cursor(cursor):
+    """(distance, id) of an encode_nearest_cursor() value; None for no cursor. Raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        distance, restaurant_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(distance), str(restaurant_id)
+    except (TypeError, ValueError, UnicodeError, binascii.Error) as e:
+        raise ValueError("Malformed cursor.") from e
 
 
 class RestaurantDetailView(generics.RetrieveAPIView):
@@ -14,3 +14,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'restoapi.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402 (settings are configured by get_asgi_application)
+
+if settings.NLP_WARM_UP_ON_STARTUP:
+    from nlp.utils import warm_up
+    warm_up()
+
+if settings.NLP_WORKER_POOL_ON_STARTUP:
+    from ai_engine.nlu_service import get_nlu_worker_pool
+    get_nlu_worker_pool()
@@ -248,6 +248,39 @@ LOGGING = {
 # CELERY_TIMEZONE = TIME_ZONE
 
 
+# --- NLU (spaCy) Settings ---
+# The spaCy model is loaded lazily on first use. With NLP_WARM_UP_ON_STARTUP the WSGI/ASGI
+# module loads it at import time instead; combine with `gunicorn --preload` so the model is
+# loaded once in the master process and shared copy-on-write by the forked workers.
+# Pipes to exclude and the model name are read from NLP_SPACY_EXCLUDE / NLP_SPACY_MODEL (see nlp/utils.py).
+NLP_WARM_UP_ON_STARTUP = config('NLP_WARM_UP_ON_STARTUP', default=False, cast=bool)
+
+# NLU worker pool (nlp/worker_pool.py, ai_engine/nlu_service.py): spaCy runs in these
+# processes instead of the request threads. Requests beyond NLP_WORKER_MAX_PENDING
+# (0 = 8 per process) or slower than NLP_WORKER_TIMEOUT_SECONDS get INTENT_UNKNOWN.
+NLP_WORKER_PROCESSES = config('NLP_WORKER_PROCESSES', default=2, cast=int)
+NLP_WORKER_MAX_PENDING = config('NLP_WORKER_MAX_PENDING', default=0, cast=int)
+NLP_WORKER_TIMEOUT_SECONDS = config('NLP_WORKER_TIMEOUT_SECONDS', default=2.0, cast=float)
+# Start the worker processes when the ASGI application loads instead of on the first request.
+NLP_WORKER_POOL_ON_STARTUP = config('NLP_WORKER_POOL_ON_STARTUP', default=False, cast=bool)
+
+
+# --- Recommendation Settings ---
+# Rule results are cached in the Django cache under the restaurant's menu version
+# (ai_engine/recommendation_cache.py), so menu or availability changes invalidate them;
+# the TTL only bounds how long unused entries linger.
+RECOMMENDATION_CACHE_TTL_SECONDS = config('RECOMMENDATION_CACHE_TTL_SECONDS', default=3600, cast=int)
+# Directory for memory-mapped MenuSnapshot files shared by the worker processes of a host
+# (ai_engine.recommendation_service). Empty: each process builds its snapshots in memory.
+RECOMMENDER_SNAPSHOT_DIR = config('RECOMMENDER_SNAPSHOT_DIR', default='')
+# Nearest restaurants a nearby search returns at most (restaurants.geo.CoordinateStore).
+NEARBY_MAX_RESULTS = config('NEARBY_MAX_RESULTS', default=500, cast=int)
+# Largest page_size of the nearby search's mode=nearest (cursor-paginated k-nearest).
+NEARBY_MAX_PAGE_SIZE = config('NEARBY_MAX_PAGE_SIZE', default=100, cast=int)
+# Largest 'radius' (km) of a nearby search; larger ones are clamped to it.
+NEARBY_MAX_RADIUS_KM = config('NEARBY_MAX_RADIUS_KM', default=50, cast=float)
+
+
 # --- JWT Settings (Specific to your implementation or a library like SimpleJWT) ---
 # Example for the custom JWT logic sketched earlier
 JWT_SECRET_KEY = config('JWT_SECRET_KEY', default='fallback-secret-key-for-jwt-dev-only')
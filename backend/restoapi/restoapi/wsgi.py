@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'restoapi.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402 (settings are configured by get_wsgi_application)
+
+if settings.NLP_WARM_UP_ON_STARTUP:
+    from nlp.utils import warm_up
+    warm_up()